@@ -1,11 +1,26 @@
 import csv
+import sys
+import time
 import typer
 from datetime import datetime
+from typing import Optional
+from sqlalchemy import update
 from sqlmodel import Session, select, delete
 from app.database import engine, create_db_and_tables
+from app.core.cache import get_stats_cache
+from app.dals.rollups import RollupDal
+from app.dals.transactions import TransactionDal
+from app.models.rollup import TransactionDailyRollup
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.passwords import hash_password
+from app.services.exports import (
+    EXPORT_FORMATS,
+    ExportUnavailable,
+    ensure_format_available,
+)
+from app.services.imports import IMPORT_FORMATS, detect_format, iter_rows
+from app.services.transactions import TransactionService
 
 app = typer.Typer(help="SpendWise CLI: Manage financial telemetry and users.")
 
@@ -27,7 +42,7 @@ def seed():
             typer.echo("👤 Default user 'john' not found. Creating now...")
             db_user = User(
                 username="john",
-                hashed_password=get_password_hash("password123"),
+                hashed_password=hash_password("password123"),
                 role="user",
             )
             session.add(db_user)
@@ -51,7 +66,11 @@ def seed():
                     )
 
             session.add_all(transactions)
+            session.flush()
+            RollupDal(session).rebuild(user_id=db_user.id)
+            TransactionDal(session).bump_ledger_version(db_user.id)
             session.commit()
+            get_stats_cache().invalidate(db_user.id)
             typer.echo(
                 f"🚀 Seeded {len(transactions)} transactions for user {db_user.username}"
             )
@@ -59,6 +78,77 @@ def seed():
             typer.echo(f"❌ Error: CSV file not found at {csv_path}")
 
 
+@app.command("import")
+def import_ledger(
+    path: str = typer.Argument(..., help="CSV or NDJSON ledger file."),
+    username: str = typer.Option("john", help="Owner of the imported rows."),
+    format: Optional[str] = typer.Option(
+        None, help=f"One of {', '.join(IMPORT_FORMATS)}; guessed from the file name."
+    ),
+):
+    """Stream a ledger file into the database in batched inserts."""
+    create_db_and_tables()
+    fmt = format or detect_format(path, None)
+    if fmt not in IMPORT_FORMATS:
+        typer.echo(f"❌ Unknown format '{fmt}'.")
+        raise typer.Exit(code=1)
+
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == username)).first()
+        if not user:
+            typer.echo(f"❌ User '{username}' not found.")
+            raise typer.Exit(code=1)
+
+        started = time.perf_counter()
+        with open(path, "rb") as stream:
+            result = TransactionService(session).import_transactions(
+                iter_rows(stream, fmt), user.id
+            )
+        elapsed = time.perf_counter() - started
+
+    rate = result.imported / elapsed if elapsed else 0
+    typer.echo(
+        f"📥 Imported {result.imported} rows ({result.failed} rejected) "
+        f"in {elapsed:.2f}s — {rate:,.0f} rows/s"
+    )
+    for error in result.errors:
+        typer.echo(f"   line {error.line}: {error.error}")
+
+
+@app.command()
+def export(
+    username: str = typer.Option("john", help="Whose ledger to export."),
+    format: str = typer.Option("csv", help=f"One of {', '.join(EXPORT_FORMATS)}."),
+    output: str = typer.Option("-", help="Destination file, or '-' for stdout."),
+):
+    """Stream one user's ledger to a CSV, NDJSON, Parquet or Arrow file."""
+    if format not in EXPORT_FORMATS:
+        typer.echo(f"❌ Unknown format '{format}'.", err=True)
+        raise typer.Exit(code=1)
+    try:
+        ensure_format_available(format)
+    except ExportUnavailable as exc:
+        typer.echo(f"❌ {exc}", err=True)
+        raise typer.Exit(code=1)
+
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == username)).first()
+        if not user:
+            typer.echo(f"❌ User '{username}' not found.", err=True)
+            raise typer.Exit(code=1)
+
+        chunks = TransactionService(session).export_user_transactions(user.id, format)
+        if output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            with open(output, "wb") as target:
+                for chunk in chunks:
+                    target.write(chunk)
+            typer.echo(f"📤 Exported {username}'s ledger to {output}", err=True)
+
+
 @app.command()
 def list():
     """List all financial transactions currently in the database."""
@@ -76,12 +166,50 @@ def list():
             )
 
 
+@app.command()
+def migrate():
+    """Bring an existing database schema up to date (tables, indexes)."""
+    applied = create_db_and_tables()
+    if applied:
+        typer.echo(f"🛠 Applied migrations: {', '.join(applied)}")
+    else:
+        typer.echo("✅ Schema already up to date.")
+
+
+@app.command()
+def rollups(
+    check: bool = typer.Option(
+        False, "--check", help="Only verify; do not rebuild first."
+    ),
+):
+    """Rebuild the daily rollups from raw transactions and verify them."""
+    create_db_and_tables()
+    with Session(engine) as session:
+        dal = RollupDal(session)
+        if not check:
+            rows = dal.rebuild()
+            session.commit()
+            get_stats_cache().clear()
+            typer.echo(f"🔁 Rebuilt {rows} rollup rows.")
+
+        mismatches = dal.verify()
+        if mismatches:
+            typer.echo(f"❌ {len(mismatches)} rollup rows disagree with raw data:")
+            for row in mismatches[:20]:
+                typer.echo(f"   {row}")
+            raise typer.Exit(code=1)
+        typer.echo("✅ Rollups match the transaction table.")
+
+
 @app.command()
 def reset():
     """Delete all transactions from the database."""
     with Session(engine) as session:
+        session.execute(delete(TransactionDailyRollup))
         session.execute(delete(Transaction))
+        session.execute(update(User).values(ledger_version=User.ledger_version + 1))
         session.commit()
+        get_stats_cache().clear()
         typer.echo("🧹 Database Reset: Deleted transactions.")
 
 
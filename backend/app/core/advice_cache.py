@@ -0,0 +1,223 @@
+"""Cache and single-flight for AI advice.
+
+Answers are keyed on (user, normalized query, ledger version), so any
+write to the user's transactions makes their old answers unreachable. The
+first tier is an in-process LRU with a TTL (AI_ADVICE_CACHE_TTL,
+AI_ADVICE_CACHE_SIZE). Setting AI_ADVICE_CACHE_URL adds a shared Redis
+tier behind it. Redis failures are logged and treated as misses.
+
+Concurrent requests for the same key share one agent run instead of each
+starting their own, whether that run is a plain request or a stream (see
+`claim`). If a stream is abandoned, whoever was waiting on it starts over.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+from prometheus_client import Counter
+
+from app.core.cache import async_client_from_url
+
+logger = logging.getLogger(__name__)
+
+AI_ADVICE_CACHE_TTL = float(os.getenv("AI_ADVICE_CACHE_TTL", "3600"))
+AI_ADVICE_CACHE_SIZE = int(os.getenv("AI_ADVICE_CACHE_SIZE", "1024"))
+# Empty disables the Redis tier; "memory://" uses an in-process fake.
+AI_ADVICE_CACHE_URL = os.getenv("AI_ADVICE_CACHE_URL", "")
+
+ADVICE_CACHE_REQUESTS = Counter(
+    "spendwise_ai_advice_cache_requests_total",
+    "AI advice lookups by outcome: local hit, redis hit, coalesced or miss.",
+    ["result"],
+)
+ADVICE_SAVED_SECONDS = Counter(
+    "spendwise_ai_advice_saved_seconds_total",
+    "Agent run time avoided by serving advice from cache or a shared run.",
+)
+
+# (advice, seconds the agent took to produce it)
+Entry = Tuple[str, float]
+
+
+class RunAbandoned(Exception):
+    """The run a request was waiting on ended without an answer."""
+
+
+def normalize_query(query: str) -> str:
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip(" ?!.")
+
+
+def advice_key(user_id: int, query: str, data_version) -> str:
+    digest = hashlib.sha1(
+        f"{normalize_query(query)}|{data_version}".encode()
+    ).hexdigest()
+    return f"ai:advice:{user_id}:{digest}"
+
+
+class AdviceCache:
+    def __init__(
+        self,
+        maxsize: int = AI_ADVICE_CACHE_SIZE,
+        ttl: float = AI_ADVICE_CACHE_TTL,
+        client=None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.client = client
+        self._entries: "OrderedDict[str, Tuple[float, Entry]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_local(self, key: str) -> Optional[Entry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: str, entry: Entry):
+        self._entries[key] = (time.monotonic() + self.ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _get_remote(self, key: str) -> Optional[Entry]:
+        if self.client is None:
+            return None
+        try:
+            raw = await self.client.get(key)
+        except redis.RedisError as exc:
+            logger.warning("advice cache get failed: %s", exc)
+            return None
+        if raw is None:
+            return None
+        advice, seconds = json.loads(raw)
+        return advice, seconds
+
+    async def _put_remote(self, key: str, entry: Entry):
+        if self.client is None:
+            return
+        try:
+            # Milliseconds: `ex` would round a sub-second TTL down to an
+            # invalid 0.
+            px = max(1, int(self.ttl * 1000))
+            await self.client.set(key, json.dumps(entry), px=px)
+        except redis.RedisError as exc:
+            logger.warning("advice cache set failed: %s", exc)
+
+    async def get_or_run(
+        self, key: str, run: Callable[[], Awaitable[str]]
+    ) -> Tuple[str, str]:
+        """(advice, how it was served: "local", "redis", "coalesced" or "miss")."""
+        entry = self._get_local(key)
+        if entry is not None:
+            return self._served(entry, "local")
+
+        while (inflight := self._inflight.get(key)) is not None:
+            entry = await self._join(inflight)
+            if entry is not None:
+                return self._served(entry, "coalesced")
+
+        future = asyncio.ensure_future(self._fill(key, run))
+        self._track(key, future)
+        advice, seconds, source = await asyncio.shield(future)
+        if source == "redis":
+            return self._served((advice, seconds), "redis")
+        ADVICE_CACHE_REQUESTS.labels(result="miss").inc()
+        return advice, "miss"
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """The cached or in-flight answer for `key`, without starting a run."""
+        entry = self._get_local(key)
+        if entry is not None:
+            return self._served(entry, "local")[0]
+        while (inflight := self._inflight.get(key)) is not None:
+            entry = await self._join(inflight)
+            if entry is not None:
+                return self._served(entry, "coalesced")[0]
+        entry = await self._get_remote(key)
+        if entry is not None:
+            self._put_local(key, entry)
+            return self._served(entry, "redis")[0]
+        ADVICE_CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    async def store(self, key: str, advice: str, seconds: float):
+        entry = (advice, seconds)
+        self._put_local(key, entry)
+        await self._put_remote(key, entry)
+
+    def claim(self, key: str) -> Optional[asyncio.Future]:
+        """Register the caller's own run for `key`; None if one is in flight.
+
+        For runs that cannot go through `get_or_run`, such as streams. Others
+        asking for `key` wait on the returned future until the caller settles
+        it with `finish` or `abandon`.
+        """
+        if key in self._inflight:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._track(key, future)
+        return future
+
+    async def finish(self, key: str, run: asyncio.Future, advice: str, seconds: float):
+        await self.store(key, advice, seconds)
+        if not run.done():
+            run.set_result((advice, seconds))
+
+    def abandon(self, run: asyncio.Future):
+        if not run.done():
+            run.set_exception(RunAbandoned())
+
+    def _track(self, key: str, future: asyncio.Future):
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # waiters see it; nobody waiting is not an error
+
+    async def _join(self, inflight: asyncio.Future) -> Optional[Entry]:
+        """The shared run's answer, or None if it was abandoned."""
+        try:
+            # shield: one waiter disconnecting must not cancel the shared run.
+            return await asyncio.shield(inflight)
+        except RunAbandoned:
+            return None
+
+    async def _fill(self, key: str, run: Callable[[], Awaitable[str]]):
+        entry = await self._get_remote(key)
+        if entry is not None:
+            self._put_local(key, entry)
+            return entry[0], entry[1], "redis"
+        started = time.perf_counter()
+        advice = await run()
+        seconds = time.perf_counter() - started
+        await self.store(key, advice, seconds)
+        return advice, seconds, "agent"
+
+    def _served(self, entry, result: str) -> Tuple[str, str]:
+        advice, seconds = entry[0], entry[1]
+        ADVICE_CACHE_REQUESTS.labels(result=result).inc()
+        ADVICE_SAVED_SECONDS.inc(seconds)
+        return advice, result
+
+    def clear(self):
+        self._entries.clear()
+
+
+advice_cache = AdviceCache(client=async_client_from_url(AI_ADVICE_CACHE_URL))
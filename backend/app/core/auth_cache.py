@@ -0,0 +1,177 @@
+"""Resolved-user cache for `get_current_user`.
+
+Maps a token subject (username) to a snapshot of the user's id and role so
+most authenticated requests skip the `user` table. Entries expire after
+AUTH_CACHE_TTL seconds and the least recently used entry is evicted beyond
+AUTH_CACHE_SIZE.
+
+Call `invalidate_user` after committing any change to a user or deleting
+one. It records the time in Redis (AUTH_REVOCATION_URL), where every replica
+reads it on each request: cached snapshots taken before it and id/role
+claims in tokens issued before it are ignored, so those requests go back to
+the database. If Redis can't be read, nothing is trusted but the database.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+from prometheus_client import Counter, Gauge
+
+from app.core.cache import REDIS_URL, async_client_from_url
+from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# "memory://" keeps revocations in process (tests, single-process dev).
+AUTH_REVOCATION_URL = os.getenv("AUTH_REVOCATION_URL", REDIS_URL)
+
+AUTH_USER_RESOLUTIONS = Counter(
+    "spendwise_auth_user_resolutions_total",
+    "How get_current_user resolved the caller: token claims, cache or database.",
+    ["source"],
+)
+AUTH_CACHE_HIT_RATIO = Gauge(
+    "spendwise_auth_user_cache_hit_ratio",
+    "Share of non-claims user lookups served from the in-process cache.",
+)
+
+UserSnapshot = Tuple[int, str, str]
+# (monotonic expiry, wall-clock time the snapshot was read, snapshot)
+CacheEntry = Tuple[float, float, UserSnapshot]
+
+
+def _to_user(snapshot: UserSnapshot) -> User:
+    user_id, username, role = snapshot
+    # Detached copy without the password hash: route handlers only need
+    # identity and role, and must never see a shared mutable instance.
+    return User(id=user_id, username=username, role=role, hashed_password="")
+
+
+class UserCache:
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        AUTH_USER_RESOLUTIONS.labels(source="cache" if hit else "database").inc()
+        AUTH_CACHE_HIT_RATIO.set(self.hit_rate)
+
+    def get(self, subject: str, not_before: float = 0.0) -> Optional[User]:
+        """The cached user, unless expired or read before `not_before`."""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and (
+                entry[0] <= time.monotonic() or entry[1] <= not_before
+            ):
+                del self._entries[subject]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(subject)
+            self._count(entry is not None)
+        return _to_user(entry[2]) if entry is not None else None
+
+    def put(self, subject: str, user: User, read_at: Optional[float] = None):
+        """Cache `user`, read from the database at wall-clock time `read_at`."""
+        snapshot = (user.id, user.username, user.role)
+        read_at = time.time() if read_at is None else read_at
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl, read_at, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class Revocations:
+    """When each user was last changed, shared by every replica through Redis.
+
+    A record only needs to outlive the tokens and cache entries it distrusts,
+    so it expires after the longer of the token lifetime and AUTH_CACHE_TTL.
+    """
+
+    key_prefix = "auth:revoked:"
+
+    def __init__(self, client, ttl: float):
+        self.client = client
+        self.ttl = math.ceil(ttl)
+
+    def _key(self, subject: str) -> str:
+        return f"{self.key_prefix}{subject}"
+
+    async def revoked_at(self, subject: str) -> float:
+        """Wall-clock time of the last revocation; 0 if none, inf if unknown."""
+        try:
+            raw = await self.client.get(self._key(subject))
+        except redis.RedisError as exc:
+            logger.warning("auth revocation lookup failed: %s", exc)
+            return math.inf
+        return float(raw) if raw is not None else 0.0
+
+    async def revoke(self, subject: str):
+        # Errors propagate: a revocation other replicas never see must not
+        # look like it succeeded.
+        await self.client.set(self._key(subject), repr(time.time()), ex=self.ttl)
+
+
+revocations = Revocations(
+    async_client_from_url(AUTH_REVOCATION_URL),
+    ttl=max(ACCESS_TOKEN_EXPIRE_MINUTES * 60, AUTH_CACHE_TTL),
+)
+
+
+async def invalidate_user(username: str):
+    """Hook for code that changes or deletes a user, called after the commit."""
+    user_cache.invalidate(username)
+    await revocations.revoke(username)
+
+
+def user_from_claims(
+    payload: Dict[str, Any], not_before: float = 0.0
+) -> Optional[User]:
+    """Build the caller from `uid`/`role` token claims, if present and trusted.
+
+    Claims are not trusted in tokens issued at or before `not_before`.
+    """
+    username = payload.get("sub")
+    user_id, role = payload.get("uid"), payload.get("role")
+    if username is None or user_id is None or role is None:
+        return None
+    if not_before:
+        # `iat` has one-second resolution: treat the same second as "before".
+        issued_at = payload.get("iat")
+        if not isinstance(issued_at, (int, float)) or issued_at <= not_before:
+            return None
+    AUTH_USER_RESOLUTIONS.labels(source="claims").inc()
+    return _to_user((user_id, username, role))
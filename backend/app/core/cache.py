@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import threading
+import time
+from fnmatch import fnmatchcase
+from typing import Any, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from anyio import to_thread
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+# "memory://" swaps Redis for an in-process FakeRedis (tests, local dev).
+STATS_CACHE_URL = os.getenv("STATS_CACHE_URL", REDIS_URL)
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "60"))
+
+STATS_CACHE_REQUESTS = Counter(
+    "spendwise_stats_cache_requests_total",
+    "Dashboard stats cache lookups by result.",
+    ["result"],
+)
+
+
+class FakeRedis:
+    """The slice of the redis-py client the caches use, kept in process memory."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        value, expires_at = self._data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            # Like Redis, INCR keeps whatever TTL the key already has.
+            _, expires_at = self._data.get(key, (None, None))
+            self._data[key] = (str(value).encode(), expires_at)
+            return value
+
+    def set(self, key, value, ex=None, px=None):
+        if not isinstance(value, bytes):
+            value = str(value).encode()
+        ttl = px / 1000 if px else ex
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            keys = [key for key in self._data if fnmatchcase(key, match)]
+        return iter(keys)
+
+
+class AsyncFakeRedis:
+    """Awaitable facade over a FakeRedis, sharing its data."""
+
+    def __init__(self, fake: FakeRedis):
+        self._fake = fake
+
+    async def get(self, key):
+        return self._fake.get(key)
+
+    async def mget(self, keys):
+        return self._fake.mget(keys)
+
+    async def incr(self, key):
+        return self._fake.incr(key)
+
+    async def set(self, key, value, ex=None, px=None):
+        return self._fake.set(key, value, ex=ex, px=px)
+
+    async def delete(self, *keys):
+        return self._fake.delete(*keys)
+
+
+def redis_from_url(url: str):
+    if url.startswith("memory://"):
+        return FakeRedis()
+    # Short timeouts: a cache that is down must degrade to a miss, not a stall.
+    return redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+def async_redis_from_url(url: str):
+    return aioredis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+def async_client_from_url(url: str):
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return AsyncFakeRedis(FakeRedis())
+    return async_redis_from_url(url)
+
+
+class StatsCache:
+    """Per-user cache of the `get_dashboard_stats` payload.
+
+    Each user has a generation counter that `invalidate` bumps after every
+    write. An entry records the generation read before its stats were
+    computed, so stats computed while a write landed are never served after
+    it. A lookup is one MGET of the counter and the entry.
+
+    Redis failures are logged and treated as misses so the dashboard keeps
+    working (uncached) while Redis is unavailable.
+    """
+
+    key_prefix = "stats:dashboard:"
+
+    def __init__(self, client, ttl: int = STATS_CACHE_TTL, async_client=None):
+        self.client = client
+        if async_client is None and isinstance(client, FakeRedis):
+            async_client = AsyncFakeRedis(client)
+        self.async_client = async_client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    def _generation_key(self, user_id: int) -> str:
+        # No TTL: one small counter per user, and an entry must never
+        # outlive the counter it was checked against.
+        return f"{self.key_prefix}generation:{user_id}"
+
+    def _keys(self, user_id: int):
+        return [self._generation_key(user_id), self._key(user_id)]
+
+    def get(self, user_id: int) -> Tuple[Optional[Any], Optional[int]]:
+        """(cached stats or None, generation to pass to `set`).
+
+        The generation is None when Redis failed; `set` then stores nothing.
+        """
+        try:
+            raw = self.client.mget(self._keys(user_id))
+        except redis.RedisError as exc:
+            logger.warning("stats cache get failed: %s", exc)
+            STATS_CACHE_REQUESTS.labels(result="error").inc()
+            return None, None
+        return self._decode(*raw)
+
+    async def aget(self, user_id: int) -> Tuple[Optional[Any], Optional[int]]:
+        if self.async_client is None:
+            return await to_thread.run_sync(self.get, user_id)
+        try:
+            raw = await self.async_client.mget(self._keys(user_id))
+        except redis.RedisError as exc:
+            logger.warning("stats cache get failed: %s", exc)
+            STATS_CACHE_REQUESTS.labels(result="error").inc()
+            return None, None
+        return self._decode(*raw)
+
+    def _decode(self, raw_generation, raw) -> Tuple[Optional[Any], int]:
+        generation = int(raw_generation or 0)
+        entry = json.loads(raw) if raw is not None else None
+        if entry is None or entry["generation"] != generation:
+            self.misses += 1
+            STATS_CACHE_REQUESTS.labels(result="miss").inc()
+            return None, generation
+        self.hits += 1
+        STATS_CACHE_REQUESTS.labels(result="hit").inc()
+        return entry["stats"], generation
+
+    def _encode(self, payload: Any, generation: int) -> str:
+        return json.dumps({"generation": generation, "stats": payload})
+
+    def set(self, user_id: int, payload: Any, generation: Optional[int]):
+        if generation is None:
+            return
+        try:
+            self.client.set(
+                self._key(user_id), self._encode(payload, generation), ex=self.ttl
+            )
+        except redis.RedisError as exc:
+            logger.warning("stats cache set failed: %s", exc)
+
+    async def aset(self, user_id: int, payload: Any, generation: Optional[int]):
+        if generation is None:
+            return
+        if self.async_client is None:
+            return await to_thread.run_sync(self.set, user_id, payload, generation)
+        try:
+            await self.async_client.set(
+                self._key(user_id), self._encode(payload, generation), ex=self.ttl
+            )
+        except redis.RedisError as exc:
+            logger.warning("stats cache set failed: %s", exc)
+
+    def invalidate(self, user_id: int):
+        try:
+            self.client.incr(self._generation_key(user_id))
+            self.client.delete(self._key(user_id))
+        except redis.RedisError as exc:
+            # The entry can now serve stale data for at most `ttl` seconds.
+            logger.warning("stats cache invalidation failed: %s", exc)
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.key_prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError as exc:
+            logger.warning("stats cache clear failed: %s", exc)
+
+
+_stats_cache: Optional[StatsCache] = None
+
+
+def get_stats_cache() -> StatsCache:
+    global _stats_cache
+    if _stats_cache is None:
+        client = redis_from_url(STATS_CACHE_URL)
+        async_client = None
+        if not isinstance(client, FakeRedis):
+            async_client = async_redis_from_url(STATS_CACHE_URL)
+        _stats_cache = StatsCache(client, async_client=async_client)
+    return _stats_cache
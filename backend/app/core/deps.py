@@ -1,28 +1,54 @@
-from fastapi import Depends, HTTPException
+import os
+import secrets
+import time
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
 from app.models.user import User
-from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.auth_cache import revocations, user_cache, user_from_claims
+from app.core.security import ALGORITHM, get_secret_key
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Shared secret for service-to-service calls (scripts/refresh.py); unset
+# disables those endpoints.
+REFRESH_API_TOKEN = os.getenv("REFRESH_API_TOKEN", "")
+
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session),
 ):
     credentials_exception = HTTPException(
         status_code=401, detail="Could not validate credentials"
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, get_secret_key(), algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = session.exec(select(User).where(User.username == username)).first()
+
+    revoked_at = await revocations.revoked_at(username)
+    user = user_from_claims(payload, revoked_at) or user_cache.get(username, revoked_at)
+    if user is not None:
+        return user
+
+    # Taken before the read, so a change committed during it still counts.
+    read_at = time.time()
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if user is None:
         raise credentials_exception
+    user_cache.put(username, user, read_at)
     return user
+
+
+async def require_refresh_token(x_refresh_token: str = Header("")):
+    if not REFRESH_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Analysis refresh is disabled")
+    if not secrets.compare_digest(x_refresh_token, REFRESH_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
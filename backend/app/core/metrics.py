@@ -0,0 +1,262 @@
+"""Request, query and DAL timing, exported with the other metrics at /metrics.
+
+Requests are labelled with their route template (`/transactions/{transaction_id}`)
+rather than the raw path, so label cardinality stays bounded. The route is
+carried in a context variable, which lets query and DAL timings recorded
+deeper in the stack be attributed to the request that caused them; outside
+a request (worker, CLI) the route label is "-".
+
+The slowest DAL call per route, for example:
+
+    topk by (route) (1, sum by (route, call) (
+        rate(spendwise_dal_call_duration_seconds_sum[5m])))
+
+Every statement is also appended to the QueryLog of each enclosing
+`track_queries` block. The middleware opens one per request and logs a
+warning when a request runs more than QUERY_BUDGET statements, or the same
+statement more than QUERY_REPEAT_LIMIT times (the shape of an N+1). Either
+setting at 0 turns that check off.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "20"))
+QUERY_REPEAT_LIMIT = int(os.getenv("QUERY_REPEAT_LIMIT", "5"))
+
+REQUEST_LATENCY = Histogram(
+    "spendwise_http_request_duration_seconds",
+    "HTTP request latency, until the last body byte is sent.",
+    ["method", "route", "status"],
+)
+QUERY_LATENCY = Histogram(
+    "spendwise_db_query_duration_seconds",
+    "SQL statement execution time by statement type and originating route.",
+    ["operation", "route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DAL_LATENCY = Histogram(
+    "spendwise_dal_call_duration_seconds",
+    "DAL method time by method and originating route.",
+    ["route", "call"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+QUERIES_PER_REQUEST = Histogram(
+    "spendwise_http_request_queries",
+    "SQL statements run per request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+OVER_BUDGET = Counter(
+    "spendwise_query_budget_exceeded_total",
+    "Requests over QUERY_BUDGET statements or QUERY_REPEAT_LIMIT repeats.",
+    ["route", "reason"],
+)
+
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+# The ASGI scope of the request being served; routing fills in its "route".
+_request_scope: ContextVar[Optional[dict]] = ContextVar(
+    "spendwise_request_scope", default=None
+)
+
+
+@dataclass
+class QueryLog:
+    """Statements run inside a `track_queries` block, with their durations."""
+
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        if not self.statements:
+            return None, 0
+        return Tally(statement for statement, _ in self.statements).most_common(1)[0]
+
+    def describe(self, width: int = 160) -> str:
+        """One line per distinct statement, in first-run order."""
+        runs, seconds = Tally(), Tally()
+        for statement, elapsed in self.statements:
+            runs[statement] += 1
+            seconds[statement] += elapsed
+        lines = []
+        for statement in runs:
+            text = " ".join(statement.split())[:width]
+            ms = seconds[statement] * 1000
+            lines.append(f"  {runs[statement]:>3}x {ms:8.2f} ms  {text}")
+        return "\n".join(lines)
+
+
+_query_logs: ContextVar[Tuple[QueryLog, ...]] = ContextVar(
+    "spendwise_query_logs", default=()
+)
+
+# Called with (scope, QueryLog) as each request finishes; tests use this to
+# see requests served on TestClient's event loop thread.
+request_query_listeners: List[Callable[[dict, QueryLog], None]] = []
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryLog]:
+    """Collect the statements run in this block (and tasks/threads it starts)."""
+    log = QueryLog()
+    token = _query_logs.set(_query_logs.get() + (log,))
+    try:
+        yield log
+    finally:
+        _query_logs.reset(token)
+
+
+def check_query_budget(method: str, route: str, queries: QueryLog):
+    if QUERY_BUDGET and queries.count > QUERY_BUDGET:
+        OVER_BUDGET.labels(route, "budget").inc()
+        logger.warning(
+            "%s %s ran %d SQL statements (budget %d) in %.1f ms:\n%s",
+            method,
+            route,
+            queries.count,
+            QUERY_BUDGET,
+            queries.seconds * 1000,
+            queries.describe(),
+        )
+    statement, repeats = queries.most_repeated()
+    if QUERY_REPEAT_LIMIT and repeats > QUERY_REPEAT_LIMIT:
+        OVER_BUDGET.labels(route, "repeated").inc()
+        logger.warning(
+            "%s %s ran one statement %d times, likely an N+1: %s",
+            method,
+            route,
+            repeats,
+            " ".join(statement.split()),
+        )
+
+
+def route_label(scope: Optional[dict]) -> str:
+    if scope is None:
+        return "-"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_route() -> str:
+    return route_label(_request_scope.get())
+
+
+class MetricsMiddleware:
+    """Pure ASGI, so streaming responses are timed and counted to their last chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        token = _request_scope.set(scope)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                method, route = scope["method"], route_label(scope)
+                REQUEST_LATENCY.labels(method, route, str(status)).observe(
+                    time.perf_counter() - started
+                )
+                QUERIES_PER_REQUEST.labels(route).observe(queries.count)
+                check_query_budget(method, route, queries)
+                for listener in request_query_listeners:
+                    listener(scope, queries)
+                _request_scope.reset(token)
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in QUERY_OPERATIONS else "OTHER"
+
+
+def instrument_queries(sync_engine):
+    """Time every statement `sync_engine` (or an AsyncEngine's .sync_engine) runs."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._spendwise_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._spendwise_started
+        QUERY_LATENCY.labels(_operation(statement), current_route()).observe(elapsed)
+        for log in _query_logs.get():
+            log.statements.append((statement, elapsed))
+
+
+def _timed(call: str, fn):
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def timed_async(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                DAL_LATENCY.labels(current_route(), call).observe(
+                    time.perf_counter() - started
+                )
+
+        return timed_async
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            DAL_LATENCY.labels(current_route(), call).observe(
+                time.perf_counter() - started
+            )
+
+    return timed
+
+
+def instrument_dal(cls):
+    """Class decorator timing each public DAL method into DAL_LATENCY.
+
+    Generator methods are left alone: their time is interleaved with the
+    consumer's, and their queries are still timed individually.
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(member):
+            continue
+        if inspect.isgeneratorfunction(member) or inspect.isasyncgenfunction(member):
+            continue
+        setattr(cls, name, _timed(f"{cls.__name__}.{name}", member))
+    return cls
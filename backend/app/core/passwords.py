@@ -0,0 +1,121 @@
+"""Bcrypt hashing off the event loop, in a dedicated process pool.
+
+bcrypt is deliberately slow (~250 ms at cost 12). Run in the request
+threadpool, every login holds a worker thread for that long, so a login
+storm starves every other sync route. Hash and verify calls go to a small
+process pool instead, which also spreads them over the cores. Admission is
+bounded: once PASSWORD_HASH_MAX_PENDING calls are queued or running, new
+ones fail fast with PasswordHashingBusy (surfaced as 503) instead of
+piling up.
+
+Worker processes use the "spawn" start method and import only this module,
+so they don't fork the API's threads, sockets or DB connections.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+_pwd_context: Optional["CryptContext"] = None
+
+
+def get_pwd_context() -> "CryptContext":
+    """Built on first use, which in the API is inside a hashing worker."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        # Pinning min/max to the configured cost makes `needs_update` flag any
+        # hash made with a different cost, so logins migrate users when
+        # BCRYPT_ROUNDS moves.
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=BCRYPT_ROUNDS,
+            bcrypt__min_rounds=BCRYPT_ROUNDS,
+            bcrypt__max_rounds=BCRYPT_ROUNDS,
+        )
+    return _pwd_context
+
+
+class PasswordHashingBusy(RuntimeError):
+    pass
+
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(valid, replacement hash or None) — see CryptContext.verify_and_update."""
+    return get_pwd_context().verify_and_update(password, hashed)
+
+
+class PasswordHasherPool:
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _replace(self, broken: ProcessPoolExecutor):
+        # Calls that failed on the same broken pool all land here; only the
+        # first replaces it.
+        if self._executor is broken:
+            self.shutdown()
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise PasswordHashingBusy("Too many password operations in flight")
+        self.pending += 1
+        try:
+            executor = self.start()
+            try:
+                return await asyncio.wrap_future(executor.submit(fn, *args))
+            except BrokenProcessPool:
+                # A worker died (OOM killer, segfault), which breaks the whole
+                # pool: start a new one and retry once.
+                self._replace(executor)
+                return await asyncio.wrap_future(self.start().submit(fn, *args))
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update, password, hashed)
+
+
+password_hasher = PasswordHasherPool()
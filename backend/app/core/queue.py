@@ -0,0 +1,67 @@
+"""The API's shared arq pool and report job enqueueing.
+
+One pool is opened in the app lifespan and reused by every request. Report
+jobs use a deterministic id per user, so repeated clicks while a report is
+queued or rendering return the existing job instead of queuing more work.
+"""
+
+import asyncio
+import logging
+from typing import Tuple
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.constants import result_key_prefix
+from arq.jobs import Job, JobStatus
+from starlette.requests import Request  # not fastapi's: the worker imports this
+
+from app.core.cache import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+REDIS_SETTINGS = RedisSettings.from_dsn(REDIS_URL)
+REPORT_JOB = "generate_monthly_report"
+
+_pool_lock = asyncio.Lock()
+
+
+async def create_queue_pool() -> ArqRedis:
+    return await create_pool(REDIS_SETTINGS)
+
+
+async def get_queue_pool(request: Request) -> ArqRedis:
+    """The lifespan pool; opened here on first use if startup couldn't reach Redis."""
+    pool = getattr(request.app.state, "arq_pool", None)
+    if pool is None:
+        async with _pool_lock:
+            pool = getattr(request.app.state, "arq_pool", None)
+            if pool is None:
+                pool = request.app.state.arq_pool = await create_queue_pool()
+    return pool
+
+
+def report_job_id(user_id: int) -> str:
+    return f"monthly_report:{user_id}"
+
+
+async def enqueue_report(pool: ArqRedis, user_id: int) -> Tuple[str, JobStatus, bool]:
+    """Queue a report unless one is pending; returns (job_id, status, created)."""
+    job_id = report_job_id(user_id)
+    job = Job(job_id, pool)
+    status = await job.status()
+    if status == JobStatus.complete:
+        # arq keeps finished results for keep_result seconds and refuses to
+        # reuse the id meanwhile; the user is asking for a fresh report.
+        await pool.delete(result_key_prefix + job_id)
+    elif status != JobStatus.not_found:
+        return job_id, status, False
+
+    if await pool.enqueue_job(REPORT_JOB, user_id=user_id, _job_id=job_id) is None:
+        # A concurrent request queued it between our check and enqueue.
+        return job_id, await job.status(), False
+    return job_id, JobStatus.queued, True
+
+
+async def report_status(pool: ArqRedis, user_id: int) -> Tuple[str, JobStatus]:
+    job_id = report_job_id(user_id)
+    return job_id, await Job(job_id, pool).status()
@@ -1,40 +1,49 @@
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Dict, Optional, Union
 from jose import jwt
-from passlib.context import CryptContext
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-if not SECRET_KEY:
-    raise ValueError("JWT_SECRET_KEY is not set in the environment variables")
-
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Embed the user's id and role in access tokens so get_current_user can skip
+# the database entirely for tokens that carry them.
+AUTH_EMBED_CLAIMS = os.getenv("AUTH_EMBED_CLAIMS", "true").lower() == "true"
+
+
+def get_secret_key() -> str:
+    """JWT_SECRET_KEY, checked when first needed rather than at import.
+
+    The API checks it at startup; commands that never sign or read a token
+    run without it.
+    """
+    secret_key = os.getenv("JWT_SECRET_KEY")
+    if not secret_key:
+        raise ValueError("JWT_SECRET_KEY is not set in the environment variables")
+    return secret_key
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode = {"exp": expire, "iat": now, "sub": str(subject)}
+    if claims:
+        to_encode.update(claims)
+    encoded_jwt = jwt.encode(to_encode, get_secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+def user_claims(user) -> Optional[Dict[str, Any]]:
+    if not AUTH_EMBED_CLAIMS:
+        return None
+    return {"uid": user.id, "role": user.role}
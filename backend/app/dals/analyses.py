@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.metrics import instrument_dal
+from app.dals.rollups import _UPSERTS
+from app.models.analysis import UserAnalysis
+
+
+@instrument_dal
+class AsyncAnalysisDal:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, user_id: int) -> Optional[UserAnalysis]:
+        return await self.session.get(UserAnalysis, user_id)
+
+    async def get_fingerprints(self, user_ids: List[int]) -> Dict[int, str]:
+        statement = select(UserAnalysis.user_id, UserAnalysis.fingerprint).where(
+            UserAnalysis.user_id.in_(user_ids)
+        )
+        return dict((await self.session.exec(statement)).all())
+
+    async def save(self, user_id: int, advice: str, fingerprint: str):
+        # An upsert: two refreshes of the same user may race to the first insert.
+        upsert = _UPSERTS[self.session.get_bind().dialect.name]
+        values = {
+            "advice": advice,
+            "fingerprint": fingerprint,
+            "updated_at": datetime.utcnow(),
+        }
+        statement = upsert(UserAnalysis).values(user_id=user_id, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id"], set_=values
+        )
+        await self.session.exec(statement)
+        await self.session.commit()
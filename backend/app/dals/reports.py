@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.metrics import instrument_dal
+from app.models.report import Report
+
+
+def page_statement(user_id: int, limit: int, before: Optional[int] = None):
+    """Newest-first ready reports with id below `before`."""
+    statement = select(Report).where(
+        Report.user_id == user_id, Report.status == "ready"
+    )
+    if before is not None:
+        statement = statement.where(Report.id < before)
+    return statement.order_by(Report.id.desc()).limit(limit)
+
+
+@instrument_dal
+class ReportDal:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get(self, report_id: int) -> Optional[Report]:
+        return self.session.get(Report, report_id)
+
+    def get_by_fingerprint(self, user_id: int, fingerprint: str) -> Optional[Report]:
+        statement = (
+            select(Report)
+            .where(
+                Report.user_id == user_id,
+                Report.status == "ready",
+                Report.fingerprint == fingerprint,
+            )
+            .order_by(Report.id.desc())
+        )
+        return self.session.exec(statement).first()
+
+    def get_page_by_user(
+        self, user_id: int, limit: int, before: Optional[int] = None
+    ) -> List[Report]:
+        return self.session.exec(page_statement(user_id, limit, before)).all()
+
+    def create(self, report: Report) -> Report:
+        self.session.add(report)
+        self.session.commit()
+        self.session.refresh(report)
+        return report
+
+    def update(self, report: Report) -> Report:
+        self.session.add(report)
+        self.session.commit()
+        self.session.refresh(report)
+        return report
+
+    def delete(self, report: Report):
+        self.session.delete(report)
+        self.session.commit()
+
+    def fail_abandoned(self, user_id: int, started_before: datetime) -> List[Report]:
+        """Mark "rendering" rows created before `started_before` failed.
+
+        Their job crashed or timed out without finishing them. Returns them.
+        """
+        statement = select(Report).where(
+            Report.user_id == user_id,
+            Report.status == "rendering",
+            Report.created_at < started_before,
+        )
+        abandoned = self.session.exec(statement).all()
+        for report in abandoned:
+            report.status = "failed"
+            self.session.add(report)
+        if abandoned:
+            self.session.commit()
+        return abandoned
+
+    def prune(self, user_id: int, keep: int) -> List[Report]:
+        """Delete all but the `keep` newest finished reports; returns those removed."""
+        statement = (
+            select(Report)
+            .where(Report.user_id == user_id, Report.status != "rendering")
+            .order_by(Report.id.desc())
+            .offset(keep)
+        )
+        stale = self.session.exec(statement).all()
+        for report in stale:
+            self.session.delete(report)
+        self.session.commit()
+        return stale
+
+
+@instrument_dal
+class AsyncReportDal:
+    """Read side of ReportDal for the async request path."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_page_by_user(
+        self, user_id: int, limit: int, before: Optional[int] = None
+    ) -> List[Report]:
+        return (await self.session.exec(page_statement(user_id, limit, before))).all()
@@ -0,0 +1,304 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import String, case, cast, delete, insert, literal, null, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.metrics import instrument_dal
+from app.models.rollup import TransactionDailyRollup as Rollup
+from app.models.transaction import Transaction
+
+RollupKey = Tuple[int, date, str]
+
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+_MONTH_OF = {
+    "sqlite": lambda day: func.strftime("%Y-%m", day),
+    "postgresql": lambda day: func.to_char(day, "YYYY-MM"),
+}
+
+
+class RollupDeltas:
+    """Accumulates (amount, count) changes per rollup key before applying them."""
+
+    def __init__(self):
+        self._deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0.0, 0])
+
+    def add(self, user_id: int, day: date, category: str, amount: float, count: int):
+        entry = self._deltas[(user_id, day, category)]
+        entry[0] += amount
+        entry[1] += count
+
+    def add_transaction(self, transaction: Transaction, sign: int = 1):
+        self.add(
+            transaction.user_id,
+            transaction.date.date(),
+            transaction.category,
+            sign * transaction.amount,
+            sign,
+        )
+
+    def items(self):
+        return (
+            (key, amount, count)
+            for key, (amount, count) in self._deltas.items()
+            if amount or count
+        )
+
+
+class DashboardSummary(NamedTuple):
+    this_month: float
+    last_month: float
+    categories: List[Tuple[str, float]]
+    history: List[Tuple[date, float]]
+
+
+def category_breakdown_statement(user_id: int):
+    return (
+        select(Rollup.category, func.sum(Rollup.total).label("total"))
+        .where(Rollup.user_id == user_id)
+        .group_by(Rollup.category)
+    )
+
+
+def daily_spending_statement(user_id: int, start_day: date):
+    return (
+        select(Rollup.day, func.sum(Rollup.total).label("total"))
+        .where(Rollup.user_id == user_id, Rollup.day >= start_day)
+        .group_by(Rollup.day)
+        .order_by(Rollup.day)
+    )
+
+
+def dashboard_summary_statement(
+    user_id: int, month_start: date, prev_month_start: date, history_start: date
+):
+    """Month totals, category split and daily series as one UNION ALL.
+
+    Each branch seeks the (user_id, day) index on its own range rather than
+    sharing a CTE, which SQLite would materialise and scan once per branch.
+    Rows are tagged: one `month` row (this month, last month), then one row
+    per category and per day of the history window.
+    """
+    this_month = case((Rollup.day >= month_start, Rollup.total), else_=0.0)
+    last_month = case((Rollup.day < month_start, Rollup.total), else_=0.0)
+    months = select(
+        literal("month").label("kind"),
+        cast(null(), String).label("key"),
+        func.coalesce(func.sum(this_month), 0.0).label("value"),
+        func.coalesce(func.sum(last_month), 0.0).label("extra"),
+    ).where(Rollup.user_id == user_id, Rollup.day >= prev_month_start)
+    categories = (
+        select(literal("category"), Rollup.category, func.sum(Rollup.total), null())
+        .where(Rollup.user_id == user_id)
+        .group_by(Rollup.category)
+    )
+    days = (
+        select(literal("day"), cast(Rollup.day, String), func.sum(Rollup.total), null())
+        .where(Rollup.user_id == user_id, Rollup.day >= history_start)
+        .group_by(Rollup.day)
+    )
+    return union_all(months, categories, days).order_by("kind", "key")
+
+
+def summary_from_rows(rows) -> DashboardSummary:
+    """Fold `dashboard_summary_statement` rows back into a DashboardSummary."""
+    this_month = last_month = 0.0
+    categories, history = [], []
+    for kind, key, value, extra in rows:
+        if kind == "month":
+            this_month, last_month = float(value), float(extra)
+        elif kind == "category":
+            categories.append((key, float(value)))
+        else:
+            history.append((date.fromisoformat(key), float(value)))
+    return DashboardSummary(this_month, last_month, categories, history)
+
+
+@instrument_dal
+class RollupDal:
+    """Reads and maintains `transaction_daily_rollup`.
+
+    Writes never commit: they join the caller's unit of work so the rollup
+    changes land in the same DB transaction as the transaction rows.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def apply(self, deltas: RollupDeltas):
+        rows = [
+            dict(user_id=user_id, day=day, category=category, total=amount, count=count)
+            for (user_id, day, category), amount, count in deltas.items()
+        ]
+        if not rows:
+            return
+        upsert = _UPSERTS[self.session.get_bind().dialect.name]
+        statement = upsert(Rollup.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "day", "category"],
+            set_={
+                "total": Rollup.total + statement.excluded.total,
+                "count": Rollup.count + statement.excluded.count,
+            },
+        )
+        # One executemany for the whole batch; an import touches hundreds of keys.
+        self.session.exec(statement, params=rows)
+
+        for row in rows:
+            if row["count"] < 0:
+                self.session.exec(
+                    delete(Rollup).where(
+                        Rollup.user_id == row["user_id"],
+                        Rollup.day == row["day"],
+                        Rollup.category == row["category"],
+                        Rollup.count <= 0,
+                    )
+                )
+
+    def get_total_since(self, user_id: int, start_day: date) -> float:
+        statement = select(func.sum(Rollup.total)).where(
+            Rollup.user_id == user_id, Rollup.day >= start_day
+        )
+        result = self.session.exec(statement).first()
+        return float(result) if result else 0.0
+
+    def get_category_breakdown(self, user_id: int) -> List:
+        return self.session.exec(category_breakdown_statement(user_id)).all()
+
+    def get_category_totals(
+        self,
+        user_id: int,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+    ) -> List:
+        """(category, total, count) over [start_day, end_day), largest total first."""
+        statement = select(
+            Rollup.category,
+            func.sum(Rollup.total).label("total"),
+            func.sum(Rollup.count).label("count"),
+        ).where(Rollup.user_id == user_id)
+        if start_day is not None:
+            statement = statement.where(Rollup.day >= start_day)
+        if end_day is not None:
+            statement = statement.where(Rollup.day < end_day)
+        statement = statement.group_by(Rollup.category).order_by(
+            func.sum(Rollup.total).desc()
+        )
+        return self.session.exec(statement).all()
+
+    def get_monthly_totals(self, user_id: int, start_day: date) -> List:
+        """(month "YYYY-MM", category, total, count) since start_day, by month."""
+        month = _MONTH_OF[self.session.get_bind().dialect.name](Rollup.day)
+        statement = (
+            select(
+                month.label("month"),
+                Rollup.category,
+                func.sum(Rollup.total).label("total"),
+                func.sum(Rollup.count).label("count"),
+            )
+            .where(Rollup.user_id == user_id, Rollup.day >= start_day)
+            .group_by(month, Rollup.category)
+            .order_by(month, func.sum(Rollup.total).desc())
+        )
+        return self.session.exec(statement).all()
+
+    def get_day_span(self, user_id: int) -> Tuple[Optional[date], Optional[date]]:
+        statement = select(func.min(Rollup.day), func.max(Rollup.day)).where(
+            Rollup.user_id == user_id
+        )
+        return tuple(self.session.exec(statement).one())
+
+    def get_daily_spending(self, user_id: int, start_day: date) -> List:
+        return self.session.exec(daily_spending_statement(user_id, start_day)).all()
+
+    def get_dashboard_summary(
+        self,
+        user_id: int,
+        month_start: date,
+        prev_month_start: date,
+        history_start: date,
+    ) -> DashboardSummary:
+        """The dashboard's aggregates in one round trip."""
+        statement = dashboard_summary_statement(
+            user_id, month_start, prev_month_start, history_start
+        )
+        return summary_from_rows(self.session.exec(statement))
+
+    def _raw_aggregate(self, user_id: Optional[int]):
+        day = func.date(Transaction.date)
+        statement = select(
+            Transaction.user_id,
+            day.label("day"),
+            Transaction.category,
+            func.sum(Transaction.amount).label("total"),
+            func.count().label("count"),
+        ).group_by(Transaction.user_id, day, Transaction.category)
+        if user_id is not None:
+            statement = statement.where(Transaction.user_id == user_id)
+        return statement
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Recompute rollups from the raw table (all users, or just one)."""
+        clear = delete(Rollup)
+        if user_id is not None:
+            clear = clear.where(Rollup.user_id == user_id)
+        self.session.exec(clear)
+        self.session.exec(
+            insert(Rollup).from_select(
+                ["user_id", "day", "category", "total", "count"],
+                self._raw_aggregate(user_id),
+            )
+        )
+        count = select(func.count()).select_from(Rollup)
+        if user_id is not None:
+            count = count.where(Rollup.user_id == user_id)
+        return self.session.exec(count).one()
+
+    def verify(self, user_id: Optional[int] = None, places: int = 4) -> List[Tuple]:
+        """Rows present on only one side of rollup vs raw; empty when consistent."""
+        raw = self._raw_aggregate(user_id).subquery()
+        rolled = select(
+            Rollup.user_id, Rollup.day, Rollup.category, Rollup.total, Rollup.count
+        )
+        if user_id is not None:
+            rolled = rolled.where(Rollup.user_id == user_id)
+        rolled = rolled.subquery()
+
+        def normalized(source):
+            user_col, day_col, category_col, total_col, count_col = source.c
+            return select(
+                user_col,
+                func.date(day_col),
+                category_col,
+                func.round(total_col, places),
+                count_col,
+            )
+
+        raw_rows = set(map(tuple, self.session.exec(normalized(raw)).all()))
+        rolled_rows = set(map(tuple, self.session.exec(normalized(rolled)).all()))
+        return sorted(
+            [("missing",) + r for r in raw_rows - rolled_rows]
+            + [("unexpected",) + r for r in rolled_rows - raw_rows]
+        )
+
+
+@instrument_dal
+class AsyncRollupDal:
+    """Dashboard reads of the rollup table for the async request path."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_dashboard_summary(
+        self,
+        user_id: int,
+        month_start: date,
+        prev_month_start: date,
+        history_start: date,
+    ) -> DashboardSummary:
+        statement = dashboard_summary_statement(
+            user_id, month_start, prev_month_start, history_start
+        )
+        return summary_from_rows(await self.session.exec(statement))
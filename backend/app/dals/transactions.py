@@ -1,65 +1,213 @@
+from sqlalchemy import insert, tuple_, update
 from sqlmodel import Session, select, func
-from typing import Optional, List
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.metrics import instrument_dal
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, List, Tuple
 from app.models.transaction import Transaction
-from datetime import datetime, timedelta, timezone
+from app.models.user import User
+from datetime import datetime
 
 
+# Statement builders shared by the sync and async DALs.
+
+
+def page_statement(
+    user_id: int,
+    limit: Optional[int],
+    before: Optional[Tuple[datetime, int]] = None,
+    columns=(Transaction,),
+):
+    """Newest-first keyset page: rows strictly older than `before` (date, id)."""
+    statement = select(*columns).where(Transaction.user_id == user_id)
+    if before is not None:
+        statement = statement.where(
+            tuple_(Transaction.date, Transaction.id) < tuple_(*before)
+        )
+    return statement.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(
+        limit
+    )
+
+
+def stream_statement(user_id: int, chunk_size: int, columns):
+    return (
+        select(*columns)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .execution_options(yield_per=chunk_size)
+    )
+
+
+def ledger_version_statement(user_id: int):
+    return select(User.ledger_version).where(User.id == user_id)
+
+
+def by_id_statement(transaction_id: int, user_id: int):
+    return select(Transaction).where(
+        Transaction.id == transaction_id, Transaction.user_id == user_id
+    )
+
+
+@instrument_dal
 class TransactionDal:
     def __init__(self, session: Session):
         self.session = session
 
-    def get_monthly_total(self, user_id: int, start_date: datetime) -> float:
-        statement = select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == user_id, Transaction.date >= start_date
+    def get_page_by_user(
+        self,
+        user_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Transaction]:
+        return self.session.exec(page_statement(user_id, limit, before)).all()
+
+    def iter_row_chunks(
+        self,
+        user_id: int,
+        columns,
+        chunk_size: int = 5000,
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[List[Tuple]]:
+        """Stream plain column tuples in date order, `chunk_size` rows at a time."""
+        order = (Transaction.date, Transaction.id)
+        if newest_first:
+            order = (Transaction.date.desc(), Transaction.id.desc())
+        statement = (
+            select(*columns)
+            .where(Transaction.user_id == user_id)
+            .order_by(*order)
+            .limit(limit)
+            .execution_options(yield_per=chunk_size)
         )
-        result = self.session.exec(statement).first()
-        return float(result) if result else 0.0
+        yield from self.session.exec(statement).partitions()
+
+    def get_row_page(
+        self,
+        user_id: int,
+        columns,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tuple]:
+        """A newest-first keyset page of column tuples dated in [since, until)."""
+        statement = page_statement(user_id, limit, before, columns)
+        if since is not None:
+            statement = statement.where(Transaction.date >= since)
+        if until is not None:
+            statement = statement.where(Transaction.date < until)
+        return self.session.exec(statement).all()
 
-    def get_category_breakdown(self, user_id: int) -> List:
+    def get_top_descriptions(self, user_id: int, limit: int = 10) -> List:
+        """(description, total, count) for the biggest-spend descriptions."""
+        total = func.sum(Transaction.amount)
         statement = (
-            select(Transaction.category, func.sum(Transaction.amount).label("total"))
+            select(Transaction.description, total.label("total"), func.count())
             .where(Transaction.user_id == user_id)
-            .group_by(Transaction.category)
+            .group_by(Transaction.description)
+            .order_by(total.desc())
+            .limit(limit)
         )
         return self.session.exec(statement).all()
 
-    def get_daily_spending(self, user_id: int, days: int = 30):
-        start_date = datetime.now(timezone.utc) - timedelta(days=days)
+    def get_largest_since(
+        self, user_id: int, since: datetime, limit: int = 5
+    ) -> List[Tuple]:
+        """(date, category, description, amount) of the largest rows since `since`."""
         statement = (
             select(
-                func.date(Transaction.date).label("day"),
-                func.sum(Transaction.amount).label("total"),
+                Transaction.date,
+                Transaction.category,
+                Transaction.description,
+                Transaction.amount,
             )
-            .where(Transaction.user_id == user_id, Transaction.date >= start_date)
-            .group_by(func.date(Transaction.date))
-            .order_by(func.date(Transaction.date))
+            .where(Transaction.user_id == user_id, Transaction.date >= since)
+            .order_by(Transaction.amount.desc())
+            .limit(limit)
         )
         return self.session.exec(statement).all()
 
-    def get_all_by_user(self, user_id: int) -> List[Transaction]:
-        return self.session.exec(
-            select(Transaction).where(Transaction.user_id == user_id)
-        ).all()
+    def get_ledger_version(self, user_id: int) -> int:
+        return self.session.exec(ledger_version_statement(user_id)).first() or 0
+
+    def bump_ledger_version(self, user_id: int):
+        """Move the user's ledger version; no commit, so it lands with the write."""
+        self.session.exec(
+            update(User)
+            .where(User.id == user_id)
+            .values(ledger_version=User.ledger_version + 1)
+        )
 
     def get_by_id(self, transaction_id: int, user_id: int) -> Optional[Transaction]:
-        return self.session.exec(
-            select(Transaction).where(
-                Transaction.id == transaction_id, Transaction.user_id == user_id
-            )
-        ).first()
+        return self.session.exec(by_id_statement(transaction_id, user_id)).first()
 
     def create(self, transaction: Transaction) -> Transaction:
+        self.bump_ledger_version(transaction.user_id)
         self.session.add(transaction)
         self.session.commit()
         self.session.refresh(transaction)
         return transaction
 
+    def bulk_insert(self, rows: List[Dict[str, Any]]):
+        """Core-level executemany; no ORM objects, no commit."""
+        if not rows:
+            return
+        for user_id in {row["user_id"] for row in rows}:
+            self.bump_ledger_version(user_id)
+        self.session.exec(insert(Transaction.__table__), params=rows)
+
     def update(self, transaction: Transaction) -> Transaction:
+        self.bump_ledger_version(transaction.user_id)
         self.session.add(transaction)
         self.session.commit()
         self.session.refresh(transaction)
         return transaction
 
     def delete(self, transaction: Transaction):
+        self.bump_ledger_version(transaction.user_id)
         self.session.delete(transaction)
         self.session.commit()
+
+
+@instrument_dal
+class AsyncTransactionDal:
+    """Read side of TransactionDal for the async request path."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_rows_by_user(
+        self,
+        user_id: int,
+        columns,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Tuple]:
+        """Newest-first plain column tuples, keyset-paged like get_page_by_user."""
+        statement = page_statement(user_id, limit, before, columns)
+        return (await self.session.exec(statement)).all()
+
+    async def iter_row_chunks_by_user(
+        self, user_id: int, columns, chunk_size: int = 1000
+    ) -> AsyncIterator[List[Tuple]]:
+        """Newest-first column tuples in `chunk_size` lists from a streaming cursor."""
+        result = await self.session.stream(
+            stream_statement(user_id, chunk_size, columns)
+        )
+        async for chunk in result.partitions():
+            yield chunk
+
+    async def get_ledger_version(self, user_id: int) -> int:
+        return (await self.session.exec(ledger_version_statement(user_id))).first() or 0
+
+    async def get_ledger_versions(self, user_ids: List[int]) -> Dict[int, int]:
+        """Ledger version per user id; ids without a user are left out."""
+        statement = select(User.id, User.ledger_version).where(User.id.in_(user_ids))
+        return dict((await self.session.exec(statement)).all())
+
+    async def get_by_id(
+        self, transaction_id: int, user_id: int
+    ) -> Optional[Transaction]:
+        return (
+            await self.session.exec(by_id_statement(transaction_id, user_id))
+        ).first()
@@ -1,19 +1,121 @@
 import os
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.metrics import instrument_queries
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///app/app/data/database.db")
 
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+# Same database as DATABASE_URL, reached through an asyncio driver.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# "tuned" applies SQLITE_PRAGMAS on every new connection; "default" leaves
+# SQLite's stock settings (rollback journal, 2 MB cache, no mmap).
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned")
+
+# The API and the arq worker share one database file. WAL lets readers run
+# alongside the single writer, and busy_timeout makes a blocked writer wait
+# instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB: -65536 is a 64 MB page cache per connection.
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 if DATABASE_URL.startswith("sqlite"):
     db_path = DATABASE_URL.replace("sqlite:///", "")
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.endswith("://"))
+
+
+def _engine_options(url: str, profile: str, poolclass) -> dict:
+    options = {}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if profile == "tuned":
+            options["connect_args"]["timeout"] = SQLITE_PRAGMAS["busy_timeout"] / 1000
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+def apply_sqlite_pragmas(sync_engine, pragmas: dict):
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def make_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    sync_engine = create_engine(url, **_engine_options(url, profile, QueuePool))
+    if url.startswith("sqlite") and profile == "tuned":
+        apply_sqlite_pragmas(sync_engine, SQLITE_PRAGMAS)
+    instrument_queries(sync_engine)
+    return sync_engine
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, profile: str = DB_PROFILE):
+    options = _engine_options(url, profile, AsyncAdaptedQueuePool)
+    # aiosqlite manages its own thread; the sqlite3 flag does not apply.
+    options.get("connect_args", {}).pop("check_same_thread", None)
+    async_engine = create_async_engine(url, **options)
+    if url.startswith("sqlite") and profile == "tuned":
+        apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+    instrument_queries(async_engine.sync_engine)
+    return async_engine
+
+
+engine = make_engine()
+async_engine = make_async_engine()
 
 
 def create_db_and_tables():
+    # Register every table with the metadata, whatever the caller imported.
+    from app.models import analysis, report, rollup, transaction, user  # noqa: F401
+    from app.migrations import run_migrations
+
     SQLModel.metadata.create_all(engine)
+    return run_migrations(engine)
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+def async_session() -> AsyncSession:
+    # expire_on_commit=False: attribute access after commit would otherwise
+    # need implicit IO, which the async session cannot do.
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def get_async_session():
+    async with async_session() as session:
+        yield session
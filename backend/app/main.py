@@ -1,23 +1,51 @@
+import logging
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from prometheus_client import make_asgi_app
+from redis.exceptions import RedisError
+from app.core.metrics import MetricsMiddleware
+from app.core.passwords import password_hasher
+from app.core.queue import create_queue_pool
+from app.core.security import get_secret_key
 from app.database import create_db_and_tables
 from app.routes import auth, transactions, ai
+from app.services.reports import REPORT_DIR
 from contextlib import asynccontextmanager
 
-# Define the exact path where the worker is saving files
-REPORTS_DIR = os.path.join("app", "data", "reports")
-os.makedirs(REPORTS_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
+
+# Statements are sharded per user below this directory (see services.reports)
+os.makedirs(REPORT_DIR, exist_ok=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Refuse to boot without a signing key rather than fail the first login.
+    get_secret_key()
     create_db_and_tables()
+    password_hasher.start()
+    try:
+        app.state.arq_pool = await create_queue_pool()
+    except RedisError as exc:
+        # Don't refuse to boot over the report queue; the first report
+        # request opens the pool instead.
+        logger.warning("Report queue unavailable at startup: %s", exc)
+        app.state.arq_pool = None
     yield
+    if app.state.arq_pool is not None:
+        await app.state.arq_pool.aclose()
+        app.state.arq_pool = None
+    password_hasher.shutdown()
 
 
-app = FastAPI(lifespan=lifespan, title="💰 SpendWise API")
+app = FastAPI(
+    lifespan=lifespan,
+    title="💰 SpendWise API",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,10 +53,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Added last so it is outermost and times the whole stack.
+app.add_middleware(MetricsMiddleware)
 
 # Mount the specific reports folder
-app.mount("/reports-files", StaticFiles(directory=REPORTS_DIR), name="reports")
+app.mount("/reports-files", StaticFiles(directory=REPORT_DIR), name="reports")
+app.mount("/metrics", make_asgi_app(), name="metrics")
 
 app.include_router(auth.router)
 app.include_router(transactions.router)
@@ -0,0 +1,158 @@
+"""Versioned, idempotent schema migrations.
+
+`SQLModel.metadata.create_all` only creates missing tables; it never touches
+tables that already exist, so new indexes or columns would never reach a
+database created by an older release. Each migration below runs once per
+database and is recorded in the `schema_migration` table.
+
+Migrations must be idempotent: on a fresh database `create_all` has already
+built the latest schema, and the migration only gets recorded. They are
+written in plain SQL against the schema as it stood when they were added,
+not against the app's models or DALs, so later changes to those never change
+what an old migration does.
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import Engine, inspect
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, Field, select
+
+
+class SchemaMigration(SQLModel, table=True):
+    __tablename__ = "schema_migration"
+
+    version: int = Field(primary_key=True)
+    name: str
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+def _transaction_indexes(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_transaction_user_date_amount "
+        'ON "transaction" (user_id, date, amount)'
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_transaction_user_category_amount "
+        'ON "transaction" (user_id, category, amount)'
+    )
+
+
+def _backfill_daily_rollups(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS transaction_daily_rollup ("
+        "user_id INTEGER NOT NULL, day DATE NOT NULL, category VARCHAR NOT NULL, "
+        "total FLOAT NOT NULL, count INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, day, category), "
+        "FOREIGN KEY(user_id) REFERENCES user (id))"
+    )
+    conn.exec_driver_sql("DELETE FROM transaction_daily_rollup")
+    conn.exec_driver_sql(
+        "INSERT INTO transaction_daily_rollup (user_id, day, category, total, count) "
+        "SELECT user_id, date(date), category, sum(amount), count(*) "
+        'FROM "transaction" GROUP BY user_id, date(date), category'
+    )
+
+
+# Statements written before the catalog: flat files named by the old worker.
+_FLAT_STATEMENT = re.compile(r"^Statement_(\d{8}_\d{6})_(\d+)\.pdf$")
+
+
+def _flat_statements(report_dir: str):
+    if not os.path.isdir(report_dir):
+        return
+    with os.scandir(report_dir) as entries:
+        for entry in entries:
+            match = _FLAT_STATEMENT.match(entry.name)
+            if match and entry.is_file():
+                created_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+                # The text form SQLAlchemy stores DATETIME columns in.
+                created_at = created_at.strftime("%Y-%m-%d %H:%M:%S.%f")
+                yield int(match.group(2)), entry.name, entry.stat().st_size, created_at
+
+
+def _report_catalog(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS report ("
+        "id INTEGER NOT NULL, user_id INTEGER NOT NULL, filename VARCHAR NOT NULL, "
+        "path VARCHAR NOT NULL, fingerprint VARCHAR NOT NULL, "
+        "status VARCHAR NOT NULL, size INTEGER NOT NULL, "
+        "created_at DATETIME NOT NULL, PRIMARY KEY (id), "
+        "FOREIGN KEY(user_id) REFERENCES user (id))"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_report_user_fingerprint "
+        "ON report (user_id, fingerprint)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_report_user_status ON report (user_id, status)"
+    )
+
+    # Catalogue statements the pre-catalog worker left flat in REPORT_DIR.
+    report_dir = os.getenv("REPORT_DIR", os.path.join("app", "data", "reports"))
+    users = {row[0] for row in conn.exec_driver_sql('SELECT id FROM "user"')}
+    known = {row[0] for row in conn.exec_driver_sql("SELECT path FROM report")}
+    rows = [
+        (user_id, name, name, "", "ready", size, created_at)
+        for user_id, name, size, created_at in _flat_statements(report_dir)
+        if user_id in users and name not in known
+    ]
+    if rows:
+        conn.exec_driver_sql(
+            "INSERT INTO report (user_id, filename, path, fingerprint, status, "
+            "size, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def _user_analysis(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS user_analysis ("
+        "user_id INTEGER NOT NULL, advice VARCHAR NOT NULL, "
+        "fingerprint VARCHAR NOT NULL, updated_at DATETIME NOT NULL, "
+        "PRIMARY KEY (user_id), FOREIGN KEY(user_id) REFERENCES user (id))"
+    )
+
+
+def _ledger_version(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("user")}
+    if "ledger_version" not in columns:
+        conn.exec_driver_sql(
+            'ALTER TABLE "user" ADD COLUMN ledger_version INTEGER NOT NULL DEFAULT 0'
+        )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "transaction_user_indexes", _transaction_indexes),
+    (2, "transaction_daily_rollups", _backfill_daily_rollups),
+    (3, "report_catalog", _report_catalog),
+    (4, "user_analysis", _user_analysis),
+    (5, "ledger_version", _ledger_version),
+]
+
+
+def applied_versions(conn: Connection) -> set:
+    if not inspect(conn).has_table(SchemaMigration.__tablename__):
+        return set()
+    return set(conn.execute(select(SchemaMigration.version)).scalars())
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order and return the names applied."""
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        # One transaction per migration so a failure leaves earlier ones recorded.
+        with engine.begin() as conn:
+            if version in applied_versions(conn):
+                continue
+            migrate(conn)
+            conn.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                )
+            )
+        applied.append(name)
+    return applied
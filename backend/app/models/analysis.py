@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+class UserAnalysis(SQLModel, table=True):
+    """The latest precomputed advisor analysis for a user.
+
+    `fingerprint` is the ledger version it was generated from (see
+    User.ledger_version); a refresh skips users whose ledger hasn't moved
+    since.
+    """
+
+    __tablename__ = "user_analysis"
+
+    user_id: int = Field(primary_key=True, foreign_key="user.id")
+    advice: str
+    fingerprint: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
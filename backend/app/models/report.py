@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+class Report(SQLModel, table=True):
+    """A generated statement PDF and the ledger state it was rendered from.
+
+    `path` is relative to REPORT_DIR. Rows are "rendering" while the worker
+    builds the file, then "ready" or "failed".
+    """
+
+    # SQLite appends the rowid to each index, so (user_id, status) also
+    # serves the newest-first, id-keyset listing.
+    __table_args__ = (
+        Index("ix_report_user_fingerprint", "user_id", "fingerprint"),
+        Index("ix_report_user_status", "user_id", "status"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    filename: str
+    path: str = ""
+    fingerprint: str
+    status: str = "ready"
+    size: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,18 @@
+from datetime import date
+from sqlmodel import SQLModel, Field
+
+
+class TransactionDailyRollup(SQLModel, table=True):
+    """Per-user spend per (day, category), maintained alongside every write.
+
+    The primary key order matches the dashboard reads: a user's rows, then a
+    day range. A user holds O(days x categories) rows instead of O(transactions).
+    """
+
+    __tablename__ = "transaction_daily_rollup"
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    category: str = Field(primary_key=True)
+    total: float = 0.0
+    count: int = 0
@@ -1,9 +1,18 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class Transaction(SQLModel, table=True):
+    # Every DAL query filters on user_id, most also on a date range. The first
+    # index serves range/ordered reads (SQLite appends the rowid, so it also
+    # orders by (date, id)); both carry `amount` so the aggregates are covered.
+    __table_args__ = (
+        Index("ix_transaction_user_date_amount", "user_id", "date", "amount"),
+        Index("ix_transaction_user_category_amount", "user_id", "category", "amount"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     amount: float
     category: str
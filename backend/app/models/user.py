@@ -7,3 +7,7 @@ class User(SQLModel, table=True):
     username: str = Field(index=True, unique=True)
     hashed_password: str
     role: str = "user"
+    # Bumped in the same DB transaction as every insert, edit or delete of the
+    # user's transactions (see TransactionDal); caches of ledger-derived data
+    # key on it.
+    ledger_version: int = 0
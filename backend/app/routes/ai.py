@@ -1,16 +1,149 @@
-from fastapi import APIRouter, Depends
-from app.services.ai_service import AIService
-from app.core.deps import get_current_user
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.dals.transactions import AsyncTransactionDal
+from app.database import get_async_session
+from app.services.ai_service import ai_service
+from app.core.deps import get_current_user, require_refresh_token
 from app.models.user import User
+from app.schemas.analysis import (
+    AnalyzeBatchRequest,
+    AnalyzeBatchResult,
+    AnalyzeResult,
+    UserAnalysisRead,
+)
+from app.services.analysis import AnalysisService
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ai", tags=["AI Advisor"])
 
+DEFAULT_QUERY = "Give me a summary of my spending"
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    # JSON-encode the payload so newlines in the advice can't end the frame.
+    frame = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{frame}" if event else frame
+
+
+async def sse_until_disconnect(
+    request: Request, chunks: AsyncIterator[str]
+) -> AsyncIterator[str]:
+    """SSE frames for `chunks`, cancelling generation once the client leaves.
+
+    Generation runs in its own task so a disconnect is noticed even while
+    the model is still thinking, not just on the next write.
+    """
+    frames: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for chunk in chunks:
+                await frames.put(sse_event(chunk))
+            await frames.put(sse_event("", event="done"))
+        except Exception:
+            logger.exception("advice stream failed")
+            await frames.put(sse_event("Advice is unavailable.", event="error"))
+        finally:
+            await frames.put(None)
+
+    async def watch():
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        logger.info("client left; cancelling advice stream")
+        producer.cancel()
+
+    producer = asyncio.create_task(produce())
+    watcher = asyncio.create_task(watch())
+    try:
+        while (frame := await frames.get()) is not None:
+            yield frame
+    finally:
+        producer.cancel()
+        watcher.cancel()
+
 
 @router.get("/advice")
 async def get_financial_advice(
-    query: str = "Give me a summary of my spending",
+    query: str = DEFAULT_QUERY,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    service = AIService()
-    advice = await service.get_advice(current_user.id, query)
+    data_version = await AsyncTransactionDal(session).get_ledger_version(
+        current_user.id
+    )
+    # Hand the connection back before the agent run, which can take seconds.
+    await session.close()
+    advice = await ai_service.get_advice(current_user.id, query, data_version)
     return {"advice": advice}
+
+
+@router.get("/advice/stream")
+async def stream_financial_advice(
+    request: Request,
+    query: str = DEFAULT_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """`/advice` as server-sent events: one `data` frame per text delta.
+
+    Each payload is a JSON string. The stream ends with a `done` event, or an
+    `error` event if generation failed part-way.
+    """
+    data_version = await AsyncTransactionDal(session).get_ledger_version(
+        current_user.id
+    )
+    # Otherwise every open stream would pin a pooled connection until it ends.
+    await session.close()
+    chunks = ai_service.stream_advice(current_user.id, query, data_version)
+    return StreamingResponse(
+        sse_until_disconnect(request, chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/analysis", response_model=UserAnalysisRead)
+async def get_stored_analysis(current_user: User = Depends(get_current_user)):
+    """The analysis last precomputed for the current user by a refresh run."""
+    analysis = await AnalysisService().get(current_user.id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="No analysis yet")
+    return analysis
+
+
+@router.post(
+    "/analyze",
+    response_model=AnalyzeResult,
+    dependencies=[Depends(require_refresh_token)],
+)
+async def analyze_user(user_id: int):
+    """Regenerate and store one user's analysis if their ledger changed."""
+    status = await AnalysisService().refresh(user_id)
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="User not found")
+    if status == "failed":
+        raise HTTPException(status_code=502, detail="Analysis failed")
+    return AnalyzeResult(user_id=user_id, status=status)
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=AnalyzeBatchResult,
+    dependencies=[Depends(require_refresh_token)],
+)
+async def analyze_users(payload: AnalyzeBatchRequest):
+    """`/analyze` for many users; failures are reported per user, not raised."""
+    statuses = await AnalysisService().refresh_many(payload.user_ids)
+    return AnalyzeBatchResult(
+        results=[
+            AnalyzeResult(user_id=user_id, status=status)
+            for user_id, status in statuses.items()
+        ]
+    )
@@ -1,43 +1,90 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session
 from app.models.user import User
 from app.schemas.user import UserCreate, Token
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.passwords import PasswordHashingBusy, password_hasher
+from app.core.security import create_access_token, user_claims
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Authentication is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=Token)
-def register(user_in: UserCreate, session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.username == user_in.username)).first()
+async def register(
+    user_in: UserCreate, session: AsyncSession = Depends(get_async_session)
+):
+    statement = select(User).where(User.username == user_in.username)
+    user = (await session.exec(statement)).first()
+    # Hand the connection back before hashing, which takes ~250 ms.
+    await session.close()
     if user:
         raise HTTPException(status_code=400, detail="User already exists")
 
+    try:
+        hashed_password = await password_hasher.hash(user_in.password)
+    except PasswordHashingBusy:
+        raise _busy()
+
     db_user = User(
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         role="user",
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # The same username was registered while we were hashing.
+        raise HTTPException(status_code=400, detail="User already exists")
 
     # Simplified to match your login logic
-    access_token = create_access_token(subject=db_user.username)
+    access_token = create_access_token(
+        subject=db_user.username, claims=user_claims(db_user)
+    )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/token", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    user = session.exec(select(User).where(User.username == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    statement = select(User).where(User.username == form_data.username)
+    user = (await session.exec(statement)).first()
+    # Hand the connection back before verifying, which takes ~250 ms.
+    await session.close()
+    if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-    access_token = create_access_token(subject=user.username)
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    except PasswordHashingBusy:
+        raise _busy()
+    if not valid:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+
+    if new_hash:
+        # Stored hash used an outdated scheme or BCRYPT_ROUNDS; upgrade it now
+        # that we have the plaintext, in a transaction of its own.
+        await session.execute(
+            update(User).where(User.id == user.id).values(hashed_password=new_hash)
+        )
+        await session.commit()
+
+    access_token = create_access_token(subject=user.username, claims=user_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
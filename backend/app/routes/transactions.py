@@ -1,39 +1,91 @@
-import os
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import logging
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from arq import create_pool
-from arq.connections import RedisSettings
+from arq.connections import ArqRedis
 
-from app.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dals.reports import AsyncReportDal
+from app.database import get_async_session, get_session
 from app.models.user import User
 from app.schemas.transaction import (
     TransactionCreate,
+    TransactionImportResult,
     TransactionRead,
     TransactionUpdate,
 )
-from app.services.transactions import TransactionService
+from app.services.exports import (
+    EXPORT_FORMATS,
+    ExportUnavailable,
+    ensure_format_available,
+)
+from app.services.imports import detect_format, iter_rows
+from app.services.transactions import (
+    AsyncTransactionService,
+    TransactionService,
+    transactions_json,
+)
 from app.core.deps import get_current_user
+from app.core.queue import enqueue_report, get_queue_pool, report_status
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
-REPORT_DIR = os.path.join("app", "data", "reports")
+MAX_PAGE_SIZE = 1000
+REPORT_PAGE_SIZE = 50
+MAX_REPORT_PAGE_SIZE = 200
 
 
 @router.get("/stats/detailed")
-def get_detailed_stats(
-    session: Session = Depends(get_session),
+async def get_detailed_stats(
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    return TransactionService(session).get_dashboard_stats(current_user.id)
+    return await AsyncTransactionService(session).get_dashboard_stats(current_user.id)
 
 
 @router.get("", response_model=List[TransactionRead])
-def list_transactions(
-    session: Session = Depends(get_session),
+async def list_transactions(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    return TransactionService(session).list_user_transactions(current_user.id)
+    """Newest-first ledger.
+
+    `limit`/`cursor` page through it by (date, id); the next page's cursor is
+    returned in the `X-Next-Cursor` header. `format=ndjson` streams the whole
+    ledger one JSON object per line. Without either, the full list is returned.
+
+    Rows are encoded straight from column tuples; `response_model` only
+    documents the shape.
+    """
+    service = AsyncTransactionService(session)
+    if format == "ndjson":
+        return StreamingResponse(
+            service.stream_user_transactions_ndjson(current_user.id),
+            media_type="application/x-ndjson",
+        )
+    headers = {}
+    if limit is None and cursor is None:
+        rows = await service.list_user_transactions(current_user.id)
+    else:
+        try:
+            rows, next_cursor = await service.list_user_transactions_page(
+                current_user.id, limit or MAX_PAGE_SIZE, cursor
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+    return Response(
+        transactions_json(rows), media_type="application/json", headers=headers
+    )
 
 
 @router.post("", response_model=TransactionRead)
@@ -47,6 +99,48 @@ def create_transaction(
     )
 
 
+@router.get("/export")
+def export_transactions(
+    format: Literal["csv", "ndjson", "parquet", "arrow"] = "csv",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the caller's full ledger, oldest first, as a file download."""
+    try:
+        ensure_format_available(format)
+    except ExportUnavailable as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        TransactionService(session).export_user_transactions(current_user.id, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{extension}"'
+        },
+    )
+
+
+@router.post("/import", response_model=TransactionImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Bulk-load a CSV (header: amount,category,description,date) or NDJSON file.
+
+    Bad rows are skipped and listed in `errors`; the rest are imported.
+    """
+    fmt = format or detect_format(file.filename, file.content_type)
+    try:
+        return TransactionService(session).import_transactions(
+            iter_rows(file.file, fmt), current_user.id
+        )
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(status_code=400, detail=f"Unreadable {fmt} file: {exc}")
+
+
 @router.put("/{transaction_id}", response_model=TransactionRead)
 def update_transaction(
     transaction_id: int,
@@ -77,23 +171,45 @@ def delete_transaction(
 
 
 @router.post("/report")
-async def trigger_report(current_user: User = Depends(get_current_user)):
-    # Use 'redis' as the host because that is the service name in docker-compose
-    redis = await create_pool(RedisSettings(host="redis", port=6379))
-    await redis.enqueue_job("generate_monthly_report", user_id=current_user.id)
-    print(
-        f"!!! JOB ENQUEUED FOR USER {current_user.id} !!!"
-    )  # Check backend logs for this
-    return {"message": "Report generation started"}
-
-
-@router.get("/report/list")
-async def list_reports(current_user: User = Depends(get_current_user)):
-    if not os.path.exists(REPORT_DIR):
-        return []
-
-    all_files = os.listdir(REPORT_DIR)
-    user_id_suffix = f"_{current_user.id}.pdf"
-    user_reports = [f for f in all_files if f.endswith(user_id_suffix)]
-
-    return sorted(user_reports, reverse=True)
+async def trigger_report(
+    current_user: User = Depends(get_current_user),
+    queue: ArqRedis = Depends(get_queue_pool),
+):
+    job_id, status, created = await enqueue_report(queue, current_user.id)
+    if created:
+        logger.info("Report job %s enqueued for user %s", job_id, current_user.id)
+    message = (
+        "Report generation started" if created else "Report generation already pending"
+    )
+    return {"message": message, "job_id": job_id, "status": status.value}
+
+
+@router.get("/report/status")
+async def get_report_status(
+    current_user: User = Depends(get_current_user),
+    queue: ArqRedis = Depends(get_queue_pool),
+):
+    """Status of the user's latest report job; "complete" once it is in the list."""
+    job_id, status = await report_status(queue, current_user.id)
+    return {"job_id": job_id, "status": status.value}
+
+
+@router.get("/report/list", response_model=List[str])
+async def list_reports(
+    response: Response,
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=MAX_REPORT_PAGE_SIZE),
+    cursor: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Newest-first statement paths, relative to `/reports-files/`.
+
+    Pages by report id; the next page's cursor is in `X-Next-Cursor`.
+    """
+    reports = await AsyncReportDal(session).get_page_by_user(
+        current_user.id, limit + 1, cursor
+    )
+    if len(reports) > limit:
+        reports = reports[:limit]
+        response.headers["X-Next-Cursor"] = str(reports[-1].id)
+    return [report.path for report in reports]
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List
+from pydantic import Field
+from sqlmodel import SQLModel
+
+ANALYZE_BATCH_MAX = 100
+
+
+class AnalyzeBatchRequest(SQLModel):
+    user_ids: List[int] = Field(min_length=1, max_length=ANALYZE_BATCH_MAX)
+
+
+class AnalyzeResult(SQLModel):
+    user_id: int
+    # "refreshed", "unchanged", "not_found" or "failed"
+    status: str
+
+
+class AnalyzeBatchResult(SQLModel):
+    results: List[AnalyzeResult]
+
+
+class UserAnalysisRead(SQLModel):
+    advice: str
+    updated_at: datetime
@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class TransactionBase(SQLModel):
@@ -24,3 +24,14 @@ class TransactionUpdate(TransactionBase):
 class TransactionRead(TransactionBase):
     id: int
     user_id: int
+
+
+class TransactionImportError(SQLModel):
+    line: int
+    error: str
+
+
+class TransactionImportResult(SQLModel):
+    imported: int
+    failed: int
+    errors: List[TransactionImportError]
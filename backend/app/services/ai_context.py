@@ -0,0 +1,207 @@
+"""Fixed-size spend context for the AI advisor's get_spend_history tool.
+
+Instead of one line per transaction, the advisor sees a summary built from
+SQL aggregates: an overview, totals by category and by month, the biggest
+descriptions ("merchants"), the largest recent transactions and a sample of
+the newest rows. Sections are added in that priority order until
+AI_CONTEXT_TOKEN_BUDGET is reached, so prompt size is bounded whatever the
+ledger size. Summaries are cached per user until their ledger version
+changes.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from sqlmodel import Session
+
+from app.dals.rollups import RollupDal
+from app.dals.transactions import TransactionDal
+from app.database import engine
+from app.models.transaction import Transaction
+
+AI_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "1200"))
+AI_CONTEXT_MONTHS = int(os.getenv("AI_CONTEXT_MONTHS", "6"))
+AI_CONTEXT_CACHE_SIZE = int(os.getenv("AI_CONTEXT_CACHE_SIZE", "1024"))
+
+TOP_DESCRIPTIONS = 10
+OUTLIER_DAYS = 90
+OUTLIERS = 5
+RECENT_ROWS = 15
+# Rough English-text ratio for GPT tokenizers; close enough for a budget.
+CHARS_PER_TOKEN = 4
+
+RECENT_COLUMNS = (
+    Transaction.date,
+    Transaction.category,
+    Transaction.description,
+    Transaction.amount,
+)
+
+Section = Tuple[str, Sequence[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def fit_to_budget(sections: Sequence[Section], budget: int) -> str:
+    """Join sections in priority order, dropping lines that would overflow."""
+    lines: List[str] = []
+    used = 0
+    for title, body in sections:
+        # A heading alone is useless; require room for it plus one line.
+        if not body or used + estimate_tokens(f"{title}\n{body[0]}\n") > budget:
+            continue
+        lines.append(title)
+        used += estimate_tokens(title + "\n")
+        for line in body:
+            cost = estimate_tokens(line + "\n")
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+    return "\n".join(lines)
+
+
+def _money(value: float) -> str:
+    return f"${value:,.2f}"
+
+
+def _short(description: Optional[str], width: int = 40) -> str:
+    description = description or ""
+    return description if len(description) <= width else description[:width] + "..."
+
+
+def _row_line(day, category: str, description: str, amount: float) -> str:
+    day = day.strftime("%Y-%m-%d") if hasattr(day, "strftime") else str(day)
+    return f"- {day} {category} {_money(amount)} ({_short(description)})"
+
+
+def build_spend_context(
+    session: Session,
+    user_id: int,
+    budget: int = AI_CONTEXT_TOKEN_BUDGET,
+    now: Optional[datetime] = None,
+) -> str:
+    now = now or datetime.now()
+    rollups = RollupDal(session)
+    transactions = TransactionDal(session)
+
+    categories = rollups.get_category_totals(user_id)
+    if not categories:
+        return "No transactions found."
+
+    total = sum(c.total for c in categories)
+    count = sum(c.count for c in categories)
+    first_day, last_day = rollups.get_day_span(user_id)
+    overview = [
+        f"{count:,} transactions, {_money(total)} total, "
+        f"from {first_day} to {last_day}."
+    ]
+
+    by_category = [
+        f"- {c.category}: {_money(c.total)} over {c.count:,} txns" for c in categories
+    ]
+
+    # First day of the month AI_CONTEXT_MONTHS - 1 months back.
+    month_start = now.date().replace(day=1)
+    for _ in range(AI_CONTEXT_MONTHS - 1):
+        month_start = (month_start - timedelta(days=1)).replace(day=1)
+    months: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+    for month, category, month_total, _ in rollups.get_monthly_totals(
+        user_id, month_start
+    ):
+        months.setdefault(month, []).append((category, month_total))
+    by_month = [
+        f"- {month}: {_money(sum(t for _, t in parts))} ("
+        + ", ".join(f"{c} {_money(t)}" for c, t in parts[:4])
+        + ")"
+        for month, parts in reversed(months.items())
+    ]
+
+    top = [
+        f"- {_short(description)}: {_money(spent)} over {n:,} txns"
+        for description, spent, n in transactions.get_top_descriptions(
+            user_id, TOP_DESCRIPTIONS
+        )
+    ]
+
+    since = now - timedelta(days=OUTLIER_DAYS)
+    largest = [
+        _row_line(*row)
+        for row in transactions.get_largest_since(user_id, since, OUTLIERS)
+    ]
+
+    recent_chunk = next(
+        transactions.iter_row_chunks(
+            user_id, RECENT_COLUMNS, RECENT_ROWS, newest_first=True, limit=RECENT_ROWS
+        ),
+        [],
+    )
+    recent = [_row_line(*row) for row in recent_chunk]
+
+    return fit_to_budget(
+        [
+            ("Overview:", overview),
+            ("By category (all time):", by_category),
+            (f"By month (last {AI_CONTEXT_MONTHS}, newest first):", by_month),
+            ("Top descriptions by spend:", top),
+            (f"Largest in the last {OUTLIER_DAYS} days:", largest),
+            ("Most recent:", recent),
+        ],
+        budget,
+    )
+
+
+class SpendContextCache:
+    """Per-user LRU of built contexts, valid while the ledger version holds.
+
+    Every write to a user's transactions bumps their ledger version (see
+    TransactionDal), and reading it is a primary-key lookup, much cheaper
+    than rebuilding the summary.
+    """
+
+    def __init__(self, maxsize: int = AI_CONTEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int, Tuple[tuple, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(
+        self, session: Session, user_id: int, budget: int = AI_CONTEXT_TOKEN_BUDGET
+    ) -> str:
+        # The day matters too: the month and outlier windows move with it.
+        version = TransactionDal(session).get_ledger_version(user_id)
+        key = (version, budget, date.today())
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        context = build_spend_context(session, user_id, budget)
+        with self._lock:
+            self._entries[user_id] = (key, context)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return context
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+spend_context_cache = SpendContextCache()
+
+
+def get_spend_context(user_id: int, bind=None) -> str:
+    with Session(bind or engine) as session:
+        return spend_context_cache.get_or_build(session, user_id)
@@ -1,34 +1,107 @@
-from pydantic_ai import Agent, RunContext
-from sqlmodel import Session, select
-from app.models.transaction import Transaction
-from app.database import engine
-
-advisor_agent = Agent(
-    "openai:gpt-4o-mini",
-    system_prompt=(
-        "You are a professional financial advisor for SpendWise. "
-        "Analyze the user's spending habits and provide advice. "
-        "Use the get_spend_history tool to see their actual data."
-    ),
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+from app.core.advice_cache import AdviceCache, advice_cache, advice_key
+from app.services.ai_context import get_spend_context
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+
+ADVISOR_MODEL = "openai:gpt-4o-mini"
+ADVISOR_PROMPT = (
+    "You are a professional financial advisor for SpendWise. "
+    "Analyze the user's spending habits and provide advice. "
+    "Use the get_spend_history tool to see their actual data."
 )
 
+_advisor_agent: Optional["Agent[int, str]"] = None
+
+
+def get_advisor_agent() -> "Agent[int, str]":
+    """The advisor, built on first use.
 
-@advisor_agent.tool
-async def get_spend_history(ctx: RunContext[int]) -> str:
-    user_id = ctx.deps
-    with Session(engine) as session:
-        statement = select(Transaction).where(Transaction.user_id == user_id)
-        results = session.exec(statement).all()
-        if not results:
-            return "No transactions found."
+    pydantic_ai and the OpenAI client cost a large share of the API's import
+    time, and processes that never ask for advice (CLI, worker, most tests)
+    shouldn't pay for them. The model is resolved on the first run, so
+    OPENAI_API_KEY is only needed by then.
+    """
+    global _advisor_agent
+    if _advisor_agent is None:
+        from pydantic_ai import Agent, RunContext
 
-        summary = "\n".join(
-            [f"- {t.date}: {t.amount} {t.category} ({t.description})" for t in results]
+        agent = Agent(
+            ADVISOR_MODEL,
+            deps_type=int,
+            system_prompt=ADVISOR_PROMPT,
+            defer_model_check=True,
         )
-        return f"User Transactions:\n{summary}"
+
+        @agent.tool
+        async def get_spend_history(ctx: RunContext[int]) -> str:
+            """Bounded summary of the user's spending: totals, trends, notable rows."""
+            return await asyncio.to_thread(get_spend_context, ctx.deps)
+
+        _advisor_agent = agent
+    return _advisor_agent
 
 
 class AIService:
-    async def get_advice(self, user_id: int, user_query: str) -> str:
-        result = await advisor_agent.run(user_query, deps=user_id)
+    def __init__(self, cache: Optional[AdviceCache] = None):
+        self.cache = cache or advice_cache
+
+    async def run_agent(self, user_id: int, user_query: str) -> str:
+        result = await get_advisor_agent().run(user_query, deps=user_id)
         return result.data
+
+    async def get_advice(self, user_id: int, user_query: str, data_version=None) -> str:
+        """Advice for `user_query`, reused while the user's ledger is unchanged.
+
+        `data_version` is the user's ledger version; without it nothing is cached.
+        """
+        if data_version is None:
+            return await self.run_agent(user_id, user_query)
+        advice, _ = await self.cache.get_or_run(
+            advice_key(user_id, user_query, data_version),
+            lambda: self.run_agent(user_id, user_query),
+        )
+        return advice
+
+    async def stream_advice(
+        self, user_id: int, user_query: str, data_version=None
+    ) -> AsyncIterator[str]:
+        """Advice as text deltas, as the model produces them.
+
+        A cached answer, or one another request is already producing, is
+        yielded whole. A completed stream is cached like `get_advice`'s
+        answers; an abandoned one is not.
+        """
+        key = run = None
+        if data_version is not None:
+            key = advice_key(user_id, user_query, data_version)
+        while key is not None and run is None:
+            cached = await self.cache.lookup(key)
+            if cached is not None:
+                yield cached
+                return
+            run = self.cache.claim(key)
+
+        started = time.perf_counter()
+        parts = []
+        try:
+            async with get_advisor_agent().run_stream(
+                user_query, deps=user_id
+            ) as result:
+                # debounce_by=None: forward every delta rather than batching them.
+                async for delta in result.stream_text(delta=True, debounce_by=None):
+                    parts.append(delta)
+                    yield delta
+        except BaseException:
+            if run is not None:
+                self.cache.abandon(run)
+            raise
+        if run is not None:
+            seconds = time.perf_counter() - started
+            await self.cache.finish(key, run, "".join(parts), seconds)
+
+
+ai_service = AIService()
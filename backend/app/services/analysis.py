@@ -0,0 +1,80 @@
+"""Precomputed per-user advisor analyses, refreshed in bulk by scripts/refresh.py.
+
+An analysis is regenerated only when the user's ledger version has moved
+since the stored one. Agent runs for a batch go out concurrently, at most
+ANALYZE_CONCURRENCY at a time. Reads and each save use their own short
+session, so no connection is held while the agent runs.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dals.analyses import AsyncAnalysisDal
+from app.dals.transactions import AsyncTransactionDal
+from app.database import async_session
+from app.models.analysis import UserAnalysis
+from app.services.ai_service import AIService, ai_service
+
+logger = logging.getLogger(__name__)
+
+ANALYZE_CONCURRENCY = int(os.getenv("ANALYZE_CONCURRENCY", "4"))
+ANALYSIS_PROMPT = (
+    "Review my spending and give me a short analysis: where the money goes, "
+    "how it is trending, and the two or three changes that would help most."
+)
+
+
+class AnalysisService:
+    def __init__(
+        self,
+        sessions: Callable[[], AsyncSession] = async_session,
+        ai: Optional[AIService] = None,
+    ):
+        self.sessions = sessions
+        self.ai = ai or ai_service
+
+    async def get(self, user_id: int) -> Optional[UserAnalysis]:
+        async with self.sessions() as session:
+            return await AsyncAnalysisDal(session).get(user_id)
+
+    async def refresh(self, user_id: int) -> str:
+        return (await self.refresh_many([user_id]))[user_id]
+
+    async def refresh_many(self, user_ids: List[int]) -> Dict[int, str]:
+        """Status per user: "refreshed", "unchanged", "not_found" or "failed"."""
+        user_ids = list(dict.fromkeys(user_ids))
+        statuses = dict.fromkeys(user_ids, "not_found")
+        async with self.sessions() as session:
+            stored = await AsyncAnalysisDal(session).get_fingerprints(user_ids)
+            versions = await AsyncTransactionDal(session).get_ledger_versions(user_ids)
+        stale = {}
+        for user_id, version in versions.items():
+            fingerprint = str(version)
+            if stored.get(user_id) == fingerprint:
+                statuses[user_id] = "unchanged"
+            else:
+                stale[user_id] = (version, fingerprint)
+
+        semaphore = asyncio.Semaphore(ANALYZE_CONCURRENCY)
+
+        async def analyze(user_id: int, version) -> str:
+            async with semaphore:
+                return await self.ai.get_advice(user_id, ANALYSIS_PROMPT, version)
+
+        results = await asyncio.gather(
+            *(analyze(user_id, version) for user_id, (version, _) in stale.items()),
+            return_exceptions=True,
+        )
+        for (user_id, (_, fingerprint)), advice in zip(stale.items(), results):
+            if isinstance(advice, Exception):
+                logger.error("analysis for user %s failed: %s", user_id, advice)
+                statuses[user_id] = "failed"
+                continue
+            async with self.sessions() as session:
+                await AsyncAnalysisDal(session).save(user_id, advice, fingerprint)
+            statuses[user_id] = "refreshed"
+        return statuses
@@ -0,0 +1,159 @@
+"""Chunked ledger writers for streaming exports.
+
+Each writer consumes an iterator of row chunks (lists of EXPORT_COLUMNS
+tuples, straight from a server-side cursor) and yields encoded bytes per
+chunk, so the response starts immediately and memory stays bounded by the
+chunk size. Parquet writes one row group per chunk; Arrow writes an IPC
+stream of record batches. Both need the optional `pyarrow` package.
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator, List, Tuple
+
+import orjson
+
+from app.models.transaction import Transaction
+
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+)
+EXPORT_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+Chunks = Iterable[List[Tuple]]
+
+
+class ExportUnavailable(RuntimeError):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ExportUnavailable("Columnar export requires the 'pyarrow' package")
+    return pyarrow
+
+
+def ensure_format_available(fmt: str):
+    if fmt in COLUMNAR_FORMATS:
+        _pyarrow()
+
+
+def csv_chunks(chunks: Chunks) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    for chunk in chunks:
+        writer.writerows(
+            (id_, date.isoformat(), amount, category, description)
+            for id_, date, amount, category, description in chunk
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(chunks: Chunks) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield b"".join(
+            orjson.dumps(dict(zip(EXPORT_HEADER, row))) + b"\n" for row in chunk
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since last drain."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _record_batch(pa, schema, chunk: List[Tuple]):
+    columns = list(zip(*chunk))
+    return pa.record_batch(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def _arrow_schema(pa):
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("date", pa.timestamp("us")),
+            ("amount", pa.float64()),
+            ("category", pa.string()),
+            ("description", pa.string()),
+        ]
+    )
+
+
+def parquet_chunks(chunks: Chunks) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    writer = pa.parquet.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for chunk in chunks:
+            batch = _record_batch(pa, schema, chunk)
+            writer.write_table(pa.Table.from_batches([batch]))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def arrow_chunks(chunks: Chunks) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for chunk in chunks:
+            writer.write_batch(_record_batch(pa, schema, chunk))
+            yield sink.drain()
+    yield sink.drain()
+
+
+_WRITERS = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+    "parquet": parquet_chunks,
+    "arrow": arrow_chunks,
+}
+
+
+def export_chunks(fmt: str, chunks: Chunks) -> Iterator[bytes]:
+    return _WRITERS[fmt](chunks)
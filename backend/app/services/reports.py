@@ -0,0 +1,14 @@
+"""Where statement PDFs live on disk.
+
+Files are sharded as `<user_id % 100>/<user_id>/Statement_...pdf` under
+REPORT_DIR, and catalogued in the `report` table; nothing lists the directory
+at request time. The relative path is what `/reports-files/` serves.
+"""
+
+import os
+
+REPORT_DIR = os.getenv("REPORT_DIR", os.path.join("app", "data", "reports"))
+
+
+def report_subdir(user_id: int) -> str:
+    return os.path.join(f"{user_id % 100:02d}", str(user_id))
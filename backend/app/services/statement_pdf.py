@@ -0,0 +1,37 @@
+"""The statement PDF layout: letterhead header and page footer.
+
+Imported on first render (see app.worker.render_report), so processes that
+never render a statement don't load fpdf.
+"""
+
+from datetime import datetime
+
+from fpdf import FPDF
+
+
+class ExecutivePDF(FPDF):
+    def header(self):
+        self.set_fill_color(33, 38, 45)
+        self.rect(0, 0, 210, 40, "F")
+        self.set_xy(10, 12)
+        self.set_font("Helvetica", "B", 24)
+        self.set_text_color(255, 255, 255)
+        self.cell(0, 10, "SPENDWISE", new_x="LMARGIN", new_y="NEXT")
+        self.set_font("Helvetica", "", 10)
+        self.set_text_color(139, 148, 158)
+        self.cell(
+            0, 5, "EXECUTIVE FINANCIAL INTELLIGENCE", new_x="LMARGIN", new_y="NEXT"
+        )
+        self.ln(15)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Helvetica", "I", 8)
+        self.set_text_color(128, 128, 128)
+        generated = datetime.now().strftime("%Y-%m-%d")
+        self.cell(
+            0,
+            10,
+            f"Confidential Report | Generated on {generated} | Page {self.page_no()}",
+            align="C",
+        )
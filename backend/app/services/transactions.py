@@ -1,62 +1,209 @@
+import base64
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import orjson
 from sqlmodel import Session
-from app.dals.transactions import TransactionDal
-from app.schemas.transaction import TransactionUpdate
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.cache import StatsCache, get_stats_cache
+from app.dals.rollups import AsyncRollupDal, DashboardSummary, RollupDal, RollupDeltas
+from app.dals.transactions import AsyncTransactionDal, TransactionDal
+from app.schemas.transaction import (
+    TransactionImportError,
+    TransactionImportResult,
+    TransactionUpdate,
+)
+from app.services.exports import EXPORT_COLUMNS, export_chunks
+from app.services.imports import RowError, parse_transaction_row
 from app.models.transaction import Transaction
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 
+STREAM_CHUNK_SIZE = 1000
+IMPORT_BATCH_SIZE = 5000
+EXPORT_CHUNK_SIZE = 5000
+MAX_REPORTED_IMPORT_ERRORS = 100
 
-class TransactionService:
-    def __init__(self, session: Session):
-        self.dal = TransactionDal(session)
+# TransactionRead's fields, in its order. Read paths select these columns and
+# encode the tuples straight to JSON: no ORM objects, and no second pass
+# through the response model.
+READ_COLUMNS = (
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+    Transaction.date,
+    Transaction.id,
+    Transaction.user_id,
+)
+READ_KEYS = tuple(column.key for column in READ_COLUMNS)
 
-    def get_dashboard_stats(self, user_id: int):
-        now = datetime.now()
-        first_of_this_month = now.replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        )
 
-        last_day_prev_month = first_of_this_month - timedelta(days=1)
-        first_of_prev_month = last_day_prev_month.replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        )
-        monthly_burn = self.dal.get_monthly_total(user_id, first_of_this_month)
+def encode_cursor(transaction: Transaction) -> str:
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of `encode_cursor`; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def dashboard_window(now: datetime) -> Dict[str, date]:
+    """Date bounds the dashboard aggregates over, relative to `now`."""
+    first_of_this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    last_day_prev_month = first_of_this_month - timedelta(days=1)
+    first_of_prev_month = last_day_prev_month.replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    history_start = (datetime.now(timezone.utc) - timedelta(days=30)).date()
+    return {
+        "month_start": first_of_this_month.date(),
+        "prev_month_start": first_of_prev_month.date(),
+        "history_start": history_start,
+    }
+
+
+def build_dashboard_stats(summary: DashboardSummary, now: datetime):
+    monthly_burn = summary.this_month
+    last_month_total = summary.last_month
+    category_data = summary.categories
+    daily_history = summary.history
+
+    days_passed = now.day
+    daily_avg = monthly_burn / days_passed if days_passed > 0 else 0
+
+    efficiency = max(0, min(100, 100 - (monthly_burn / 100)))
+
+    if last_month_total > 0:
+        trend_pct = ((monthly_burn - last_month_total) / last_month_total) * 100
+    else:
+        trend_pct = 100.0 if monthly_burn > 0 else 0.0
+
+    return {
+        "monthly_burn": monthly_burn,
+        "daily_avg": daily_avg,
+        "trend_pct": round(trend_pct, 1),
+        "efficiency_score": round(efficiency),
+        "history": [{"date": str(h[0]), "amount": float(h[1])} for h in daily_history],
+        "categories": [{"name": c[0], "value": float(c[1])} for c in category_data],
+    }
+
+
+def page_with_cursor(
+    rows: List[Transaction], limit: int
+) -> Tuple[List[Transaction], Optional[str]]:
+    """Trim a `limit + 1` fetch to `limit` rows plus the next page's cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
 
-        total_since_last_month = self.dal.get_monthly_total(
-            user_id, first_of_prev_month
-        )
 
-        last_month_total = total_since_last_month - monthly_burn
+def transactions_json(rows: Iterable[Tuple]) -> bytes:
+    """A JSON array of TransactionRead objects from READ_COLUMNS tuples."""
+    return orjson.dumps([dict(zip(READ_KEYS, row)) for row in rows])
 
-        category_data = self.dal.get_category_breakdown(user_id)
-        daily_history = self.dal.get_daily_spending(user_id)
 
-        days_passed = now.day
-        daily_avg = monthly_burn / days_passed if days_passed > 0 else 0
+def ndjson_lines(chunk: Iterable[Tuple]) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(READ_KEYS, row))) + b"\n" for row in chunk)
 
-        efficiency = max(0, min(100, 100 - (monthly_burn / 100)))
 
-        if last_month_total > 0:
-            trend_pct = ((monthly_burn - last_month_total) / last_month_total) * 100
-        else:
-            trend_pct = 100.0 if monthly_burn > 0 else 0.0
+class TransactionService:
+    def __init__(self, session: Session, cache: Optional[StatsCache] = None):
+        self.session = session
+        self.dal = TransactionDal(session)
+        self.rollups = RollupDal(session)
+        self.cache = cache or get_stats_cache()
+
+    def get_dashboard_stats(self, user_id: int):
+        stats, generation = self.cache.get(user_id)
+        if stats is None:
+            stats = self._compute_dashboard_stats(user_id)
+            self.cache.set(user_id, stats, generation)
+        return stats
+
+    def _compute_dashboard_stats(self, user_id: int):
+        now = datetime.now()
+        summary = self.rollups.get_dashboard_summary(user_id, **dashboard_window(now))
+        return build_dashboard_stats(summary, now)
 
-        return {
-            "monthly_burn": monthly_burn,
-            "daily_avg": daily_avg,
-            "trend_pct": round(trend_pct, 1),
-            "efficiency_score": round(efficiency),
-            "history": [
-                {"date": str(h[0]), "amount": float(h[1])} for h in daily_history
-            ],
-            "categories": [{"name": c[0], "value": float(c[1])} for c in category_data],
-        }
+    def list_user_transactions_page(
+        self, user_id: int, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Transaction], Optional[str]]:
+        before = decode_cursor(cursor) if cursor else None
+        # Fetch one extra row to learn whether another page exists.
+        rows = self.dal.get_page_by_user(user_id, limit + 1, before)
+        return page_with_cursor(rows, limit)
 
-    def list_user_transactions(self, user_id: int):
-        return self.dal.get_all_by_user(user_id)
+    def export_user_transactions(
+        self, user_id: int, fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        chunks = self.dal.iter_row_chunks(user_id, EXPORT_COLUMNS, chunk_size)
+        return export_chunks(fmt, chunks)
 
     def create_user_transaction(self, transaction_data, user_id: int):
         transaction = Transaction(**transaction_data.model_dump(), user_id=user_id)
-        return self.dal.create(transaction)
+        deltas = RollupDeltas()
+        deltas.add_transaction(transaction)
+        self.rollups.apply(deltas)
+        created = self.dal.create(transaction)
+        self.cache.invalidate(user_id)
+        return created
+
+    def import_transactions(
+        self,
+        rows: Iterable[Tuple[int, Any]],
+        user_id: int,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> TransactionImportResult:
+        """Insert parsed `(line, raw)` rows in batches inside one DB transaction.
+
+        Invalid rows are skipped and reported (the first
+        MAX_REPORTED_IMPORT_ERRORS of them); they never abort the import.
+        """
+        batch = []
+        deltas = RollupDeltas()
+        imported = failed = 0
+        errors = []
+        try:
+            for line, raw in rows:
+                try:
+                    if isinstance(raw, RowError):
+                        raise raw
+                    values = parse_transaction_row(raw)
+                except RowError as exc:
+                    failed += 1
+                    if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                        errors.append(TransactionImportError(line=line, error=str(exc)))
+                    continue
+
+                values["user_id"] = user_id
+                batch.append(values)
+                deltas.add(
+                    user_id,
+                    values["date"].date(),
+                    values["category"],
+                    values["amount"],
+                    1,
+                )
+                if len(batch) >= batch_size:
+                    self.dal.bulk_insert(batch)
+                    imported += len(batch)
+                    batch = []
+
+            self.dal.bulk_insert(batch)
+            imported += len(batch)
+            self.rollups.apply(deltas)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        self.cache.invalidate(user_id)
+        return TransactionImportResult(imported=imported, failed=failed, errors=errors)
 
     def update_user_transaction(
         self, transaction_id: int, transaction_data: TransactionUpdate, user_id: int
@@ -65,14 +212,68 @@ class TransactionService:
         if not transaction:
             return None
 
+        deltas = RollupDeltas()
+        deltas.add_transaction(transaction, sign=-1)
         for field, value in transaction_data.model_dump(exclude_unset=True).items():
             setattr(transaction, field, value)
+        deltas.add_transaction(transaction)
+        self.rollups.apply(deltas)
 
-        return self.dal.update(transaction)
+        updated = self.dal.update(transaction)
+        self.cache.invalidate(user_id)
+        return updated
 
     def delete_user_transaction(self, transaction_id: int, user_id: int):
         transaction = self.dal.get_by_id(transaction_id, user_id)
         if not transaction:
             return False
+        deltas = RollupDeltas()
+        deltas.add_transaction(transaction, sign=-1)
+        self.rollups.apply(deltas)
         self.dal.delete(transaction)
+        self.cache.invalidate(user_id)
         return True
+
+
+class AsyncTransactionService:
+    """Read paths of TransactionService on the async engine.
+
+    Writes stay on the sync TransactionService: they maintain rollups and
+    invalidate the stats cache inside the sync unit of work.
+    """
+
+    def __init__(self, session: AsyncSession, cache: Optional[StatsCache] = None):
+        self.dal = AsyncTransactionDal(session)
+        self.rollups = AsyncRollupDal(session)
+        self.cache = cache or get_stats_cache()
+
+    async def get_dashboard_stats(self, user_id: int):
+        stats, generation = await self.cache.aget(user_id)
+        if stats is None:
+            now = datetime.now()
+            summary = await self.rollups.get_dashboard_summary(
+                user_id, **dashboard_window(now)
+            )
+            stats = build_dashboard_stats(summary, now)
+            await self.cache.aset(user_id, stats, generation)
+        return stats
+
+    async def list_user_transactions(self, user_id: int) -> List[Tuple]:
+        """READ_COLUMNS tuples, newest first; encode with `transactions_json`."""
+        return await self.dal.get_rows_by_user(user_id, READ_COLUMNS)
+
+    async def list_user_transactions_page(
+        self, user_id: int, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        before = decode_cursor(cursor) if cursor else None
+        rows = await self.dal.get_rows_by_user(user_id, READ_COLUMNS, limit + 1, before)
+        return page_with_cursor(rows, limit)
+
+    async def stream_user_transactions_ndjson(
+        self, user_id: int
+    ) -> AsyncIterator[bytes]:
+        chunks = self.dal.iter_row_chunks_by_user(
+            user_id, READ_COLUMNS, STREAM_CHUNK_SIZE
+        )
+        async for chunk in chunks:
+            yield ndjson_lines(chunk)
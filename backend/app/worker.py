@@ -1,59 +1,167 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
 import os
-from datetime import datetime
-from fpdf import FPDF
-from arq.connections import RedisSettings
-from sqlmodel import Session, select
+import time as clock
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+from arq.constants import default_queue_name
+from prometheus_client import Gauge, Histogram, start_http_server
+from redis.exceptions import RedisError
+from sqlmodel import Session
 
+from app.core.queue import REDIS_SETTINGS
+from app.dals.reports import ReportDal
+from app.dals.rollups import RollupDal
+from app.dals.transactions import TransactionDal
 from app.database import engine
+from app.models.report import Report
 from app.models.transaction import Transaction
+from app.services.reports import REPORT_DIR, report_subdir
 
-REPORT_DIR = os.path.join("app", "data", "reports")
-
-
-class ExecutivePDF(FPDF):
-    def header(self):
-        self.set_fill_color(33, 38, 45)
-        self.rect(0, 0, 210, 40, "F")
-        self.set_xy(10, 12)
-        self.set_font("Helvetica", "B", 24)
-        self.set_text_color(255, 255, 255)
-        self.cell(0, 10, "SPENDWISE", new_x="LMARGIN", new_y="NEXT")
-        self.set_font("Helvetica", "", 10)
-        self.set_text_color(139, 148, 158)
-        self.cell(
-            0, 5, "EXECUTIVE FINANCIAL INTELLIGENCE", new_x="LMARGIN", new_y="NEXT"
-        )
-        self.ln(15)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font("Helvetica", "I", 8)
-        self.set_text_color(128, 128, 128)
-        self.cell(
-            0,
-            10,
-            f"Confidential Report | Generated on {datetime.now().strftime('%Y-%m-%d')} | Page {self.page_no()}",
-            align="C",
-        )
+logger = logging.getLogger(__name__)
 
+# "all" (the whole ledger), "month" (the current calendar month) or "YYYY-MM".
+REPORT_PERIOD = os.getenv("REPORT_PERIOD", "all")
+# Cap on ledger rows rendered; 0 means no cap. fpdf holds every page in
+# memory until the file is written, so an uncapped statement of a large
+# ledger costs memory in proportion to its length. Summary figures always
+# cover the whole period.
+REPORT_MAX_ROWS = int(os.getenv("REPORT_MAX_ROWS", "5000")) or None
+LEDGER_CHUNK_SIZE = 2000
+# Suffix of a statement still being written; it is renamed once catalogued.
+PARTIAL_SUFFIX = ".part"
+# Statements kept per user; older ones are deleted along with their files.
+REPORT_RETENTION_PER_USER = int(os.getenv("REPORT_RETENTION_PER_USER", "10"))
 
-async def generate_monthly_report(ctx, user_id: int):
-    if not os.path.exists(REPORT_DIR):
-        os.makedirs(REPORT_DIR, exist_ok=True)
+# Rendering is CPU-bound, so it runs in a process pool; the arq loop only
+# dispatches. WORKER_MAX_JOBS bounds how many jobs wait on that pool at once.
+REPORT_RENDER_WORKERS = int(
+    os.getenv("REPORT_RENDER_WORKERS", str(os.cpu_count() or 1))
+)
+WORKER_MAX_JOBS = int(os.getenv("WORKER_MAX_JOBS", str(REPORT_RENDER_WORKERS * 2)))
+WORKER_JOB_TIMEOUT = int(os.getenv("WORKER_JOB_TIMEOUT", "300"))
+WORKER_KEEP_RESULT = int(os.getenv("WORKER_KEEP_RESULT", "3600"))
+WORKER_MAX_TRIES = int(os.getenv("WORKER_MAX_TRIES", "3"))
+# The worker serves its own /metrics (it is a separate process from the API);
+# 0 disables it.
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+WORKER_METRICS_INTERVAL = float(os.getenv("WORKER_METRICS_INTERVAL", "15"))
+# The trailing id is the keyset cursor for the next chunk.
+LEDGER_COLUMNS = (
+    Transaction.date,
+    Transaction.category,
+    Transaction.description,
+    Transaction.amount,
+    Transaction.id,
+)
 
-    with Session(engine) as session:
-        statement = select(Transaction).where(Transaction.user_id == user_id)
-        transactions = session.exec(statement).all()
+JOB_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+JOB_DURATION = Histogram(
+    "spendwise_worker_job_duration_seconds",
+    "Report job run time after dequeue, by outcome.",
+    ["outcome"],
+    buckets=JOB_BUCKETS,
+)
+JOB_QUEUE_WAIT = Histogram(
+    "spendwise_worker_job_queue_seconds",
+    "Time report jobs waited in the queue before starting.",
+    buckets=JOB_BUCKETS,
+)
+JOBS_IN_PROGRESS = Gauge(
+    "spendwise_worker_jobs_in_progress", "Report jobs currently running."
+)
+QUEUE_DEPTH = Gauge(
+    "spendwise_worker_queue_depth",
+    f"Jobs waiting in the arq queue, sampled every {WORKER_METRICS_INTERVAL:g}s.",
+)
 
-    total_spend = sum(t.amount for t in transactions)
-    count = len(transactions)
-    avg_spend = total_spend / count if count > 0 else 0
 
-    categories = {}
-    for t in transactions:
-        categories[t.category] = categories.get(t.category, 0) + t.amount
+def report_window(period: str, now: datetime) -> Tuple[Optional[date], Optional[date]]:
+    """[start, end) days covered by a report period: "all", "month" or "YYYY-MM"."""
+    if period == "all":
+        return None, None
+    if period == "month":
+        start = now.date().replace(day=1)
+    else:
+        try:
+            start = datetime.strptime(period, "%Y-%m").date()
+        except ValueError:
+            raise ValueError(f"Unknown report period: {period!r}") from None
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def statement_filename(user_id: int, report_id: Optional[int] = None) -> str:
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = f"_{report_id}" if report_id is not None else ""
+    return f"Statement_{stamp}_{user_id}{suffix}.pdf"
+
+
+def ledger_chunks(
+    bind,
+    user_id: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    max_rows: Optional[int],
+) -> Iterator[List[Tuple]]:
+    """Newest-first LEDGER_COLUMNS rows, LEDGER_CHUNK_SIZE at a time.
+
+    Each chunk is a keyset page read in its own short session, so no
+    connection or read transaction is held while pages render.
+    """
+    before = None
+    remaining = max_rows
+    while remaining is None or remaining > 0:
+        size = min(remaining or LEDGER_CHUNK_SIZE, LEDGER_CHUNK_SIZE)
+        with Session(bind) as session:
+            chunk = TransactionDal(session).get_row_page(
+                user_id, LEDGER_COLUMNS, size, before, since, until
+            )
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < size:
+            return
+        before = (chunk[-1][0], chunk[-1][-1])
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+def render_report(
+    user_id: int,
+    period: str = REPORT_PERIOD,
+    max_rows: Optional[int] = REPORT_MAX_ROWS,
+    report_dir: Optional[str] = None,
+    bind=None,
+    filename: Optional[str] = None,
+) -> str:
+    """Render one user's statement PDF and return its path.
+
+    Summary figures come from the daily rollups; the ledger is read in
+    LEDGER_CHUNK_SIZE chunks (see `ledger_chunks`), so no more than one chunk
+    of rows is held in memory at a time.
+    """
+    report_dir = report_dir or REPORT_DIR
+    os.makedirs(report_dir, exist_ok=True)
+    start_day, end_day = report_window(period, datetime.now())
+    since = datetime.combine(start_day, time.min) if start_day else None
+    until = datetime.combine(end_day, time.min) if end_day else None
+
+    bind = bind or engine
+    with Session(bind) as session:
+        categories = RollupDal(session).get_category_totals(user_id, start_day, end_day)
+    total_spend = sum(c.total for c in categories)
+    count = sum(c.count for c in categories)
+    avg_spend = total_spend / count if count > 0 else 0
+    top_category = categories[0].category if categories else "N/A"
 
-    top_category = max(categories, key=categories.get) if categories else "N/A"
+    # The arq process only hands renders to the pool, so only the render
+    # processes need fpdf, a good share of this module's import time.
+    from app.services.statement_pdf import ExecutivePDF
 
     pdf = ExecutivePDF()
     pdf.add_page()
@@ -62,6 +170,10 @@ async def generate_monthly_report(ctx, user_id: int):
     pdf.set_font("Helvetica", "B", 14)
     pdf.set_text_color(33, 38, 45)
     pdf.cell(0, 10, "Summary Insights", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.set_text_color(100, 100, 100)
+    label = "All time" if start_day is None else start_day.strftime("%B %Y")
+    pdf.cell(0, 6, f"Period: {label}", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(2)
 
     pdf.set_fill_color(246, 248, 250)
@@ -96,39 +208,281 @@ async def generate_monthly_report(ctx, user_id: int):
     pdf.set_font("Helvetica", "", 9)
     pdf.set_text_color(33, 38, 45)
     fill = False
-    for t in sorted(transactions, key=lambda x: x.date, reverse=True):
-        pdf.set_fill_color(249, 250, 251) if fill else pdf.set_fill_color(255, 255, 255)
-        display_date = (
-            t.date.strftime("%Y-%m-%d") if hasattr(t.date, "strftime") else str(t.date)
-        )
-        pdf.cell(35, 8, f" {display_date}", fill=True)
-        pdf.cell(45, 8, f" {t.category}", fill=True)
-        desc = (
-            (t.description[:40] + "...")
-            if t.description and len(t.description) > 40
-            else (t.description or "")
-        )
-        pdf.cell(80, 8, f" {desc}", fill=True)
-        pdf.cell(30, 8, f"${t.amount:,.2f} ", fill=True, align="R")
-        pdf.ln()
-        fill = not fill
+    rendered = 0
+    for chunk in ledger_chunks(bind, user_id, since, until, max_rows):
+        for day, category, description, amount, _ in chunk:
+            if fill:
+                pdf.set_fill_color(249, 250, 251)
+            else:
+                pdf.set_fill_color(255, 255, 255)
+            display_date = (
+                day.strftime("%Y-%m-%d") if hasattr(day, "strftime") else str(day)
+            )
+            pdf.cell(35, 8, f" {display_date}", fill=True)
+            pdf.cell(45, 8, f" {category}", fill=True)
+            desc = (
+                (description[:40] + "...")
+                if description and len(description) > 40
+                else (description or "")
+            )
+            pdf.cell(80, 8, f" {desc}", fill=True)
+            pdf.cell(30, 8, f"${amount:,.2f} ", fill=True, align="R")
+            pdf.ln()
+            fill = not fill
+        rendered += len(chunk)
+
+    if rendered < count:
+        pdf.ln(4)
+        pdf.set_font("Helvetica", "I", 9)
+        pdf.set_text_color(100, 100, 100)
+        pdf.cell(0, 8, f"Showing the latest {rendered:,} of {count:,} transactions.")
 
-    filename = f"Statement_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{user_id}.pdf"
-    filepath = os.path.join(REPORT_DIR, filename)
+    filepath = os.path.join(report_dir, filename or statement_filename(user_id))
     pdf.output(filepath)
-    print("--- [EXECUTIVE REPORT GENERATED] ---")
+    return filepath
+
+
+def report_fingerprint(
+    session: Session, user_id: int, period: str, max_rows: Optional[int]
+) -> str:
+    """Identifies the ledger state and options a statement is rendered from."""
+    start_day, _ = report_window(period, datetime.now())
+    version = TransactionDal(session).get_ledger_version(user_id)
+    return f"{start_day or 'all'}|{max_rows or 0}|v{version}"
+
+
+def find_current_report(
+    user_id: int, period: str, max_rows: Optional[int]
+) -> Tuple[str, Optional[str]]:
+    """(fingerprint, path of a statement already rendered from it, if any)."""
+    with Session(engine) as session:
+        fingerprint = report_fingerprint(session, user_id, period, max_rows)
+        reports = ReportDal(session)
+        report = reports.get_by_fingerprint(user_id, fingerprint)
+        if report is None:
+            return fingerprint, None
+        filepath = os.path.join(REPORT_DIR, report.path)
+        if not os.path.exists(filepath):
+            reports.delete(report)
+            return fingerprint, None
+        return fingerprint, filepath
+
+
+def start_report(user_id: int, fingerprint: str) -> Tuple[int, str]:
+    """Catalogue a statement as "rendering"; return its id and final path.
+
+    The id goes into the file name, so two renders can never share a file.
+    """
+    with Session(engine) as session:
+        reports = ReportDal(session)
+        report = reports.create(
+            Report(
+                user_id=user_id,
+                filename="",
+                fingerprint=fingerprint,
+                status="rendering",
+            )
+        )
+        report.filename = statement_filename(user_id, report.id)
+        report.path = os.path.join(report_subdir(user_id), report.filename)
+        reports.update(report)
+        return report.id, os.path.join(REPORT_DIR, report.path)
+
+
+def discard(path: str):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def discard_render(future: Future):
+    """Done-callback deleting the file of a render nobody is waiting for."""
+    if not future.cancelled() and future.exception() is None:
+        discard(future.result())
+
+
+def finish_report(report_id: int, rendered: Optional[str]) -> List[str]:
+    """Mark a statement ready (or failed, when `rendered` is None).
+
+    `rendered` is moved to the catalogued path only after the row is
+    committed, so no finished file exists without a catalog row. Renders that
+    outlived WORKER_JOB_TIMEOUT are marked failed, then retention is applied.
+    Returns the paths of evicted statements.
+    """
+    with Session(engine) as session:
+        reports = ReportDal(session)
+        report = reports.get(report_id)
+        if rendered is None:
+            report.status = "failed"
+        else:
+            report.status = "ready"
+            report.size = os.path.getsize(rendered)
+        reports.update(report)
+        if rendered is not None:
+            os.replace(rendered, os.path.join(REPORT_DIR, report.path))
+
+        started_before = datetime.utcnow() - timedelta(seconds=WORKER_JOB_TIMEOUT)
+        for abandoned in reports.fail_abandoned(report.user_id, started_before):
+            discard(os.path.join(REPORT_DIR, abandoned.path) + PARTIAL_SUFFIX)
+        stale = reports.prune(report.user_id, REPORT_RETENTION_PER_USER)
+    removed = []
+    for report in stale:
+        if not report.path:
+            continue
+        stale_path = os.path.join(REPORT_DIR, report.path)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+        removed.append(stale_path)
+    return removed
+
+
+async def sample_queue_depth(redis):
+    while True:
+        try:
+            QUEUE_DEPTH.set(await redis.zcard(default_queue_name))
+        except RedisError as exc:
+            logger.warning("Could not sample queue depth: %s", exc)
+        await asyncio.sleep(WORKER_METRICS_INTERVAL)
+
+
+def new_render_pool() -> ProcessPoolExecutor:
+    # "spawn": children import the worker module fresh instead of inheriting
+    # the parent's event loop, Redis connections and DB pool.
+    return ProcessPoolExecutor(
+        max_workers=REPORT_RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+async def render_in_pool(ctx, *args, **kwargs) -> str:
+    """`render_report` in ctx["render_pool"], replacing the pool once if broken.
+
+    A render process that dies (OOM killer, segfault) breaks the whole pool:
+    its pending renders fail and every later submit raises BrokenProcessPool.
+    """
+    for retry in (True, False):
+        pool = ctx["render_pool"]
+        render = None
+        try:
+            render = pool.submit(render_report, *args, **kwargs)
+            return await asyncio.wrap_future(render)
+        except BrokenProcessPool:
+            if not retry:
+                raise
+            logger.warning("Render pool broke; starting a new one")
+            # Jobs that failed on the same pool all land here; only the first
+            # replaces it.
+            if ctx["render_pool"] is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                ctx["render_pool"] = new_render_pool()
+        except BaseException:
+            # Cancelling the job (job_timeout) does not stop a render that is
+            # already running in the pool: delete whatever it writes.
+            if render is not None:
+                render.add_done_callback(discard_render)
+            raise
+
+
+async def startup(ctx):
+    ctx["render_pool"] = new_render_pool()
+    if "redis" in ctx:
+        ctx["queue_depth_task"] = asyncio.create_task(sample_queue_depth(ctx["redis"]))
+
+
+async def shutdown(ctx):
+    if "queue_depth_task" in ctx:
+        ctx["queue_depth_task"].cancel()
+    ctx["render_pool"].shutdown(wait=True, cancel_futures=True)
+
+
+async def generate_monthly_report(
+    ctx, user_id: int, period: Optional[str] = None, max_rows: Optional[int] = None
+):
+    enqueued = ctx.get("enqueue_time")
+    waited = (datetime.now(timezone.utc) - enqueued).total_seconds() if enqueued else 0
+    JOB_QUEUE_WAIT.observe(waited)
+    outcome = "failed"
+    started = clock.perf_counter()
+    with JOBS_IN_PROGRESS.track_inprogress():
+        try:
+            result = await _generate_report(ctx, user_id, period, max_rows, waited)
+            outcome = "reused" if result["reused"] else "rendered"
+            return result
+        except asyncio.CancelledError:
+            # arq cancels jobs that exceed WORKER_JOB_TIMEOUT.
+            outcome = "cancelled"
+            raise
+        finally:
+            JOB_DURATION.labels(outcome).observe(clock.perf_counter() - started)
+
+
+async def _generate_report(
+    ctx, user_id: int, period: Optional[str], max_rows: Optional[int], waited: float
+):
+    period = period or REPORT_PERIOD
+    max_rows = max_rows or REPORT_MAX_ROWS
+
+    # The fingerprint is taken before rendering: a write that lands mid-render
+    # only makes the next request re-render, never serve stale data.
+    fingerprint, existing = await asyncio.to_thread(
+        find_current_report, user_id, period, max_rows
+    )
+    if existing:
+        logger.info("Report unchanged for user %s; reusing %s", user_id, existing)
+        return {"path": existing, "reused": True, "queued_seconds": round(waited, 3)}
+
+    report_id, filepath = await asyncio.to_thread(start_report, user_id, fingerprint)
+    partial = filepath + PARTIAL_SUFFIX
+    started = clock.perf_counter()
+    try:
+        await render_in_pool(
+            ctx,
+            user_id,
+            period,
+            max_rows,
+            os.path.dirname(partial),
+            filename=os.path.basename(partial),
+        )
+    except BaseException:
+        await asyncio.shield(asyncio.to_thread(finish_report, report_id, None))
+        raise
+    elapsed = clock.perf_counter() - started
+    await asyncio.to_thread(finish_report, report_id, partial)
+    logger.info(
+        "Report generated for user %s: waited %.2fs, rendered in %.2fs",
+        user_id,
+        waited,
+        elapsed,
+    )
+    # Kept by arq as the job result (WORKER_KEEP_RESULT seconds).
+    return {
+        "path": filepath,
+        "reused": False,
+        "queued_seconds": round(waited, 3),
+        "render_seconds": round(elapsed, 3),
+    }
 
 
 class WorkerSettings:
     functions = [generate_monthly_report]
-    redis_settings = RedisSettings(host="redis", port=6379)
+    redis_settings = REDIS_SETTINGS
+    on_startup = startup
+    on_shutdown = shutdown
+    max_jobs = WORKER_MAX_JOBS
+    job_timeout = WORKER_JOB_TIMEOUT
+    keep_result = WORKER_KEEP_RESULT
+    max_tries = WORKER_MAX_TRIES
 
 
 if __name__ == "__main__":
     from arq.worker import run_worker
 
-    # We must use flush=True so Docker shows the logs immediately
-    print("--- [WORKER BOOT] ATTENDING REDIS QUEUE ---", flush=True)
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    if WORKER_METRICS_PORT:
+        start_http_server(WORKER_METRICS_PORT)
+    logger.info("Worker starting; metrics on port %s", WORKER_METRICS_PORT or "off")
 
     # This is the blocking call that keeps the container alive
     run_worker(WorkerSettings)
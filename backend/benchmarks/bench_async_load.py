@@ -0,0 +1,118 @@
+"""Concurrent load: sync threadpool handlers vs async-engine handlers.
+
+Serves the same keyset page of READ_COLUMNS tuples from two in-process
+routes, one `def` handler on the sync engine (runs in the threadpool) and one
+`async def` handler on the aiosqlite engine, then drives each with N
+concurrent clients:
+
+    python -m benchmarks.bench_async_load --clients 200 --requests 20
+
+With --url/--token it drives a running API's GET /transactions?limit=50
+instead.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dals.transactions import AsyncTransactionDal, page_statement
+from app.database import to_async_url
+from app.services.transactions import READ_COLUMNS, transactions_json
+from benchmarks.common import latency_summary, load_ledger, temp_engine
+
+PAGE_SIZE = 50
+
+
+def build_app(engine, async_engine, user_id: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_page():
+        with Session(engine) as session:
+            statement = page_statement(user_id, PAGE_SIZE, columns=READ_COLUMNS)
+            rows = session.exec(statement).all()
+        return Response(transactions_json(rows), media_type="application/json")
+
+    @app.get("/async")
+    async def async_page():
+        async with AsyncSession(async_engine) as session:
+            rows = await AsyncTransactionDal(session).get_rows_by_user(
+                user_id, READ_COLUMNS, PAGE_SIZE
+            )
+        return Response(transactions_json(rows), media_type="application/json")
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, clients: int, requests: int):
+    latencies: List[float] = []
+
+    async def one_client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    return latency_summary(latencies, elapsed)
+
+
+async def in_process(args):
+    engine = temp_engine("async_load.db")
+    user_id = load_ledger(engine, "loaded", args.rows)
+    async_engine = create_async_engine(
+        to_async_url(engine.url.render_as_string(hide_password=False))
+    )
+    app = build_app(engine, async_engine, user_id)
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        report = {
+            variant: await drive(client, f"/{variant}", args.clients, args.requests)
+            for variant in ("sync", "async")
+        }
+    await async_engine.dispose()
+    return report
+
+
+async def live(args):
+    limits = httpx.Limits(max_connections=args.clients)
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(
+        base_url=args.url, headers=headers, limits=limits, timeout=30
+    ) as client:
+        return {
+            "live": await drive(
+                client, f"/transactions?limit={PAGE_SIZE}", args.clients, args.requests
+            )
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="Per client.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--url", help="Base URL of a running API.")
+    parser.add_argument("--token", help="Bearer token for --url.")
+    args = parser.parse_args()
+
+    runner = live if args.url else in_process
+    print(json.dumps(asyncio.run(runner(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Dashboard aggregation latency: raw-table queries vs rollups.
+
+Compares three ways of producing the `get_dashboard_stats` inputs for one
+user at several ledger sizes:
+
+* raw:     the original four aggregate queries over `transaction`
+* rollups: the same four aggregates against `transaction_daily_rollup`
+* summary: RollupDal.get_dashboard_summary, one statement, what the service
+  runs
+
+    python -m benchmarks.bench_dashboard --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, func, select
+
+from app.dals.rollups import RollupDal
+from app.models.transaction import Transaction
+from benchmarks.common import load_ledger, measure, temp_engine
+
+
+def raw_statements(user_id: int, month_start, prev_month_start, history_start):
+    """The dashboard's four aggregates over `transaction`, as it first ran them."""
+    day = func.date(Transaction.date)
+    mine = Transaction.user_id == user_id
+    total = func.sum(Transaction.amount)
+    return [
+        select(total).where(mine, Transaction.date >= month_start),
+        select(total).where(mine, Transaction.date >= prev_month_start),
+        select(Transaction.category, total).where(mine).group_by(Transaction.category),
+        select(day, total)
+        .where(mine, Transaction.date >= history_start)
+        .group_by(day)
+        .order_by(day),
+    ]
+
+
+def run(size: int, repeat: int):
+    engine = temp_engine(f"dashboard_{size}.db")
+    user_id = load_ledger(engine, f"user_{size}", size)
+
+    now = datetime.now()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    prev_month_start = (month_start - timedelta(days=1)).replace(day=1)
+    history_start = now - timedelta(days=30)
+
+    with Session(engine) as session:
+        rollups = RollupDal(session)
+        statements = raw_statements(
+            user_id, month_start, prev_month_start, history_start
+        )
+
+        def raw():
+            for statement in statements:
+                session.exec(statement).all()
+
+        def rollup_queries():
+            rollups.get_total_since(user_id, month_start.date())
+            rollups.get_total_since(user_id, prev_month_start.date())
+            rollups.get_category_breakdown(user_id)
+            rollups.get_daily_spending(user_id, history_start.date())
+
+        def summary():
+            rollups.get_dashboard_summary(
+                user_id,
+                month_start.date(),
+                prev_month_start.date(),
+                history_start.date(),
+            )
+
+        results = {
+            "raw": measure(raw, repeat),
+            "rollups": measure(rollup_queries, repeat),
+            "summary": measure(summary, repeat),
+        }
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Emit JSON only.")
+    args = parser.parse_args()
+
+    report = {size: run(size, args.repeat) for size in args.sizes}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'rows':>10} | {'variant':<8} | {'p50 ms':>9} | {'p95 ms':>9}")
+    print("-" * 46)
+    for size, variants in report.items():
+        for name, stats in variants.items():
+            print(
+                f"{size:>10} | {name:<8} | {stats['p50_ms']:>9.2f} "
+                f"| {stats['p95_ms']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Bulk import throughput (rows/sec) through TransactionService.import_transactions.
+
+Generates an in-memory CSV or NDJSON ledger and times the streaming parse
+plus batched inserts into a throwaway SQLite file:
+
+    python -m benchmarks.bench_import --rows 500000 --format csv
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.core.cache import FakeRedis, StatsCache
+from app.models.user import User
+from app.services.imports import iter_rows
+from app.services.transactions import IMPORT_BATCH_SIZE, TransactionService
+from benchmarks.common import CATEGORIES, temp_engine
+
+
+def build_ledger(rows: int, fmt: str) -> bytes:
+    rng = random.Random(11)
+    start = datetime(2020, 1, 1)
+    buffer = io.StringIO()
+    if fmt == "csv":
+        buffer.write("amount,category,description,date\n")
+    for i in range(rows):
+        amount = round(rng.lognormvariate(3, 1), 2)
+        category = rng.choice(CATEGORIES)
+        date = (start + timedelta(minutes=rng.randrange(3_000_000))).isoformat()
+        if fmt == "csv":
+            buffer.write(f"{amount},{category},Merchant {i % 500},{date}\n")
+        else:
+            row = {
+                "amount": amount,
+                "category": category,
+                "description": f"Merchant {i % 500}",
+                "date": date,
+            }
+            buffer.write(json.dumps(row) + "\n")
+    return buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    ledger = build_ledger(args.rows, args.format)
+    engine = temp_engine("import.db")
+    with Session(engine) as session:
+        user = User(username="importer", hashed_password="x")
+        session.add(user)
+        session.commit()
+
+        service = TransactionService(session, StatsCache(FakeRedis()))
+        started = time.perf_counter()
+        result = service.import_transactions(
+            iter_rows(io.BytesIO(ledger), args.format), user.id, args.batch_size
+        )
+        elapsed = time.perf_counter() - started
+
+    print(
+        json.dumps(
+            {
+                "format": args.format,
+                "rows": result.imported,
+                "failed": result.failed,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(result.imported / elapsed),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Login storm against the real app: bcrypt in the threadpool vs the process pool.
+
+Loads one user with a ledger into a throwaway SQLite database, then fires N
+concurrent `POST /auth/token` logins at the real app while timing
+`GET /transactions/stats/detailed` for the same user:
+
+    python -m benchmarks.bench_login --logins 200 --workers 1 2 4
+
+Each variant swaps the route's hasher: "threadpool" verifies in the request
+threadpool (the old path), "pool_<n>" uses a hashing process pool of n
+workers. Reports login throughput and dashboard p50/p99 for each.
+"""
+
+import os
+import tempfile
+
+BENCH_DIR = tempfile.mkdtemp(prefix="spendwise-bench-")
+# The app binds its engines and settings at import: never the real database.
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/login.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("STATS_CACHE_URL", "memory://")
+os.environ.setdefault("AUTH_REVOCATION_URL", "memory://")
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+from typing import List  # noqa: E402
+
+import httpx  # noqa: E402
+from anyio import to_thread  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+from app.core.cache import get_stats_cache  # noqa: E402
+from app.core.passwords import (  # noqa: E402
+    PasswordHasherPool,
+    hash_password,
+    verify_and_update,
+)
+from app.core.security import create_access_token  # noqa: E402
+from app.database import create_db_and_tables, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.routes import auth  # noqa: E402
+from benchmarks.common import load_ledger, percentile  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+USERNAME = "storm"
+
+
+class ThreadpoolHasher:
+    """The hashing path before the process pool: bcrypt in the threadpool."""
+
+    async def hash(self, password: str) -> str:
+        return await to_thread.run_sync(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str):
+        return await to_thread.run_sync(verify_and_update, password, hashed)
+
+
+def seed_user(rows: int) -> int:
+    create_db_and_tables()
+    user_id = load_ledger(engine, USERNAME, rows)
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        user.hashed_password = hash_password(PASSWORD)
+        session.add(user)
+        session.commit()
+    return user_id
+
+
+async def storm(client: httpx.AsyncClient, user_id: int, logins: int, concurrency: int):
+    done = asyncio.Event()
+    reads: List[float] = []
+    headers = {"Authorization": f"Bearer {create_access_token(USERNAME)}"}
+    form = {"username": USERNAME, "password": PASSWORD}
+
+    async def reader():
+        while not done.is_set():
+            # Drop the cached stats so every read does its database round trip.
+            get_stats_cache().invalidate(user_id)
+            start = time.perf_counter()
+            response = await client.get("/transactions/stats/detailed", headers=headers)
+            response.raise_for_status()
+            reads.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            (await client.post("/auth/token", data=form)).raise_for_status()
+
+    read_task = asyncio.create_task(reader())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await read_task
+
+    reads.sort()
+    return {
+        "logins_per_s": round(logins / elapsed, 1),
+        "dashboard_reads": len(reads),
+        "dashboard_p50_ms": round(percentile(reads, 50), 2),
+        "dashboard_p99_ms": round(percentile(reads, 99), 2),
+    }
+
+
+async def run(args):
+    user_id = seed_user(args.rows)
+    hashers = {"threadpool": ThreadpoolHasher()}
+    for workers in args.workers:
+        hashers[f"pool_{workers}"] = PasswordHasherPool(
+            workers=workers, max_pending=args.logins
+        )
+
+    report = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=300
+    ) as client:
+        hashed = hash_password(PASSWORD)
+        for name, hasher in hashers.items():
+            # Warm the workers so process start-up isn't billed to the logins.
+            await asyncio.gather(
+                *(
+                    hasher.verify_and_update(PASSWORD, hashed)
+                    for _ in range(getattr(hasher, "workers", 1))
+                )
+            )
+            auth.password_hasher = hasher
+            report[name] = await storm(client, user_id, args.logins, args.concurrency)
+            if isinstance(hasher, PasswordHasherPool):
+                hasher.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
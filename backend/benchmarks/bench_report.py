@@ -0,0 +1,123 @@
+"""Report worker memory: the old load-everything path vs streamed rendering.
+
+Each measurement runs in a fresh process so its peak RSS is its own:
+
+    python -m benchmarks.bench_report --sizes 100000 1000000 --max-rows 5000
+
+Variants per ledger size:
+  legacy_load  loads every Transaction ORM object and sorts it in Python (the
+               data phase of the previous worker, without rendering)
+  capped       render_report with the ledger capped at --max-rows
+  streamed     render_report over the whole ledger (skipped with --no-full,
+               fpdf2 still buffers the finished document)
+
+With --parallel 1 2 4 it also renders --jobs capped reports through a
+process pool of each size, as the worker does, and reports reports/second.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlmodel import Session, create_engine, select
+
+from app.models.transaction import Transaction
+from app.worker import render_report, report_window
+from benchmarks.common import load_ledger, peak_rss_mb, temp_engine
+
+
+def _run_variant(url: str, user_id: int, variant: str, max_rows: int, queue):
+    engine = create_engine(url)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if variant == "legacy_load":
+        with Session(engine) as session:
+            rows = session.exec(
+                select(Transaction).where(Transaction.user_id == user_id)
+            ).all()
+            sorted(rows, key=lambda t: t.date, reverse=True)
+    else:
+        render_report(
+            user_id,
+            "all",
+            max_rows if variant == "capped" else None,
+            tempfile.mkdtemp(prefix="spendwise-report-"),
+            engine,
+        )
+    queue.put(
+        {
+            "seconds": round(time.perf_counter() - started, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+        }
+    )
+
+
+def run_isolated(url: str, user_id: int, variant: str, max_rows: int):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_run_variant, args=(url, user_id, variant, max_rows, queue)
+    )
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def throughput(url: str, user_id: int, workers: int, jobs: int, max_rows: int):
+    # Spawned children build app.database.engine from this.
+    os.environ["DATABASE_URL"] = url
+    report_dir = tempfile.mkdtemp(prefix="spendwise-report-")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        # Pay the interpreter and import start-up outside the timed section.
+        list(pool.map(report_window, ["all"] * workers, [datetime.now()] * workers))
+        started = time.perf_counter()
+        futures = [
+            pool.submit(render_report, user_id, "all", max_rows, report_dir)
+            for _ in range(jobs)
+        ]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - started
+    return {"seconds": round(elapsed, 2), "reports_per_s": round(jobs / elapsed, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--max-rows", type=int, default=5000)
+    parser.add_argument("--no-full", action="store_true", help="Skip 'streamed'.")
+    parser.add_argument("--parallel", type=int, nargs="*", default=[])
+    parser.add_argument("--jobs", type=int, default=8)
+    args = parser.parse_args()
+
+    variants = ["legacy_load", "capped"] + ([] if args.no_full else ["streamed"])
+    report = {}
+    for size in args.sizes:
+        engine = temp_engine(f"report_{size}.db")
+        user_id = load_ledger(engine, f"user_{size}", size)
+        url = engine.url.render_as_string(hide_password=False)
+        engine.dispose()
+        report[size] = {
+            variant: run_isolated(url, user_id, variant, args.max_rows)
+            for variant in variants
+        }
+        for workers in args.parallel:
+            report[size][f"parallel_{workers}"] = throughput(
+                url, user_id, workers, args.jobs, args.max_rows
+            )
+        print(json.dumps({size: report[size]}), file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
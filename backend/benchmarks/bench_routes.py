@@ -0,0 +1,352 @@
+"""Every API route, in-process, against a synthetic multi-user ledger.
+
+Loads --users x --transactions rows with benchmarks.synthetic into a
+throwaway SQLite database, runs the real app (lifespan included) behind
+httpx's ASGI transport, and drives each scenario with --concurrency
+clients picking random users. The advisor runs on pydantic-ai's TestModel,
+so AI routes measure everything but the model call.
+
+    python -m benchmarks.bench_routes --users 50 --transactions 2000 \\
+        --requests 200 --concurrency 10 --output routes.json
+
+Prints JSON: per-scenario p50/p95/p99/max latency, throughput, errors and
+RSS growth, plus the process's peak RSS. With --baseline it adds p95 and
+throughput ratios against an earlier run's output and exits 1 if any p95
+grew by more than --max-regression (default 25%).
+
+Report enqueue/status need Redis (REDIS_URL); without it they are listed
+under "skipped".
+"""
+
+import os
+import tempfile
+
+BENCH_DIR = tempfile.mkdtemp(prefix="spendwise-bench-")
+# The app binds its engines and settings at import: never the real database.
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/routes.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["REPORT_DIR"] = os.path.join(BENCH_DIR, "reports")
+os.environ.setdefault("STATS_CACHE_URL", "memory://")
+os.environ.setdefault("AUTH_REVOCATION_URL", "memory://")
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("REFRESH_API_TOKEN", "bench")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import itertools  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from dataclasses import dataclass  # noqa: E402
+from datetime import datetime  # noqa: E402
+from typing import Callable, Dict, List, Optional, Tuple  # noqa: E402
+
+import httpx  # noqa: E402
+from pydantic_ai.models.test import TestModel  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.passwords import hash_password  # noqa: E402
+from app.core.security import create_access_token, user_claims  # noqa: E402
+from app.database import create_db_and_tables, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.ai_service import get_advisor_agent  # noqa: E402
+from benchmarks.common import latency_summary, peak_rss_mb  # noqa: E402
+from benchmarks.synthetic import PROFILES, load_synthetic  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+MAX_LOGINS = 50
+IMPORT_ROWS = 100
+
+# (method, url, httpx request kwargs, user id)
+Call = Tuple[str, str, dict, int]
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[int, random.Random], Call]
+    after: Optional[Callable[[httpx.Response, int], None]] = None
+    requests: Optional[int] = None
+    needs_queue: bool = False
+
+
+class Fleet:
+    """Bench users, their bearer tokens and rows created during the run."""
+
+    def __init__(self, user_ids: List[int]):
+        with Session(engine) as session:
+            users = session.exec(select(User).where(User.id.in_(user_ids))).all()
+        self.user_ids = [user.id for user in users]
+        self.headers = {
+            user.id: {
+                "Authorization": "Bearer "
+                + create_access_token(user.username, claims=user_claims(user))
+            }
+            for user in users
+        }
+        self.created: List[Tuple[int, int]] = []
+
+    def pick(self, rng: random.Random) -> Tuple[int, dict]:
+        user_id = rng.choice(self.user_ids)
+        return user_id, {"headers": self.headers[user_id]}
+
+
+def _transaction_body(rng: random.Random) -> dict:
+    category = rng.choice(list(PROFILES))
+    return {
+        "amount": round(rng.lognormvariate(PROFILES[category].mu, 0.5), 2),
+        "category": category,
+        "description": rng.choice(PROFILES[category].merchants),
+        "date": datetime.now().isoformat(),
+    }
+
+
+def _import_file(rng: random.Random) -> bytes:
+    lines = ["amount,category,description,date"]
+    for _ in range(IMPORT_ROWS):
+        row = _transaction_body(rng)
+        lines.append(",".join(str(row[key]) for key in row))
+    return "\n".join(lines).encode()
+
+
+def scenarios(fleet: Fleet, login_username: str) -> List[Scenario]:
+    def call(method: str, path: str):
+        def build(i, rng):
+            user_id, kwargs = fleet.pick(rng)
+            return method, path, kwargs, user_id
+
+        return build
+
+    def get(path: str):
+        return call("GET", path)
+
+    def login(i, rng):
+        form = {"username": login_username, "password": PASSWORD}
+        return "POST", "/auth/token", {"data": form}, 0
+
+    def create(i, rng):
+        user_id, kwargs = fleet.pick(rng)
+        kwargs["json"] = _transaction_body(rng)
+        return "POST", "/transactions", kwargs, user_id
+
+    def remember(response, user_id):
+        fleet.created.append((user_id, response.json()["id"]))
+
+    def update(i, rng):
+        user_id, transaction_id = fleet.created[i % len(fleet.created)]
+        body = {"amount": round(rng.uniform(1, 200), 2)}
+        kwargs = {"headers": fleet.headers[user_id], "json": body}
+        return "PUT", f"/transactions/{transaction_id}", kwargs, user_id
+
+    def delete(i, rng):
+        user_id, transaction_id = fleet.created.pop()
+        kwargs = {"headers": fleet.headers[user_id]}
+        return "DELETE", f"/transactions/{transaction_id}", kwargs, user_id
+
+    def import_csv(i, rng):
+        user_id, kwargs = fleet.pick(rng)
+        kwargs["files"] = {"file": ("bench.csv", _import_file(rng), "text/csv")}
+        return "POST", "/transactions/import", kwargs, user_id
+
+    def advice(unique: bool, path: str = "/ai/advice"):
+        def build(i, rng):
+            user_id, kwargs = fleet.pick(rng)
+            query = f"How am I doing? ({i})" if unique else "How am I doing?"
+            kwargs["params"] = {"query": query}
+            return "GET", path, kwargs, user_id
+
+        return build
+
+    def analyze(i, rng):
+        user_id = rng.choice(fleet.user_ids)
+        kwargs = {
+            "headers": {"X-Refresh-Token": os.environ["REFRESH_API_TOKEN"]},
+            "params": {"user_id": user_id},
+        }
+        return "POST", "/ai/analyze", kwargs, user_id
+
+    return [
+        Scenario("auth_login", login, requests=MAX_LOGINS),
+        Scenario("transactions_page", get("/transactions?limit=50")),
+        Scenario("transactions_full", get("/transactions")),
+        Scenario("transactions_ndjson", get("/transactions?format=ndjson")),
+        Scenario("stats_detailed", get("/transactions/stats/detailed")),
+        Scenario("export_csv", get("/transactions/export?format=csv")),
+        Scenario("transaction_create", create, after=remember),
+        Scenario("transaction_update", update),
+        Scenario("transaction_delete", delete),
+        Scenario("transactions_import", import_csv),
+        Scenario(
+            "report_enqueue", call("POST", "/transactions/report"), needs_queue=True
+        ),
+        Scenario("report_status", get("/transactions/report/status"), needs_queue=True),
+        Scenario("report_list", get("/transactions/report/list")),
+        Scenario("ai_advice_cached", advice(unique=False)),
+        Scenario("ai_advice_uncached", advice(unique=True)),
+        Scenario("ai_advice_stream", advice(True, "/ai/advice/stream")),
+        Scenario("ai_analyze", analyze),
+    ]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    seed: int,
+    warmup: int = 0,
+) -> Dict[str, float]:
+    rng = random.Random(seed)
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def send(i: int) -> float:
+        method, url, kwargs, user_id = scenario.build(i, rng)
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if response.is_success:
+            if scenario.after:
+                scenario.after(response, user_id)
+        else:
+            status = str(response.status_code)
+            errors[status] = errors.get(status, 0) + 1
+        return elapsed_ms
+
+    async def one_client():
+        while (i := next(counter)) < requests:
+            latencies.append(await send(warmup + i))
+
+    # Untimed, so the first scenario doesn't absorb cold-start costs.
+    for i in range(warmup):
+        await send(i)
+    errors.clear()
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(one_client() for _ in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - started
+    return {
+        **latency_summary(latencies, elapsed),
+        "errors": errors,
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Annotate scenarios with ratios to `baseline`; return those that regressed."""
+    regressed = []
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        p95_ratio = result["p95_ms"] / before["p95_ms"] if before["p95_ms"] else None
+        result["baseline"] = {
+            "p95_ms": before["p95_ms"],
+            "throughput_rps": before["throughput_rps"],
+            "p95_ratio": round(p95_ratio, 2) if p95_ratio else None,
+            "throughput_ratio": round(
+                result["throughput_rps"] / before["throughput_rps"], 2
+            ),
+        }
+        if p95_ratio and p95_ratio > 1 + max_regression:
+            regressed.append(name)
+    return regressed
+
+
+def seed_users(users: int, transactions: int, seed: int) -> Tuple[Fleet, str]:
+    create_db_and_tables()
+    started = time.perf_counter()
+    fleet = Fleet(load_synthetic(engine, users, transactions, seed=seed))
+    print(
+        f"loaded {users} x {transactions} rows in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+    login_user = User(
+        username=f"bench_login_{seed}", hashed_password=hash_password(PASSWORD)
+    )
+    with Session(engine) as session:
+        session.add(login_user)
+        session.commit()
+        username = login_user.username
+    return fleet, username
+
+
+async def run(args) -> dict:
+    fleet, login_username = seed_users(args.users, args.transactions, args.seed)
+    report = {
+        "config": {
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+        },
+        "scenarios": {},
+        "skipped": [],
+    }
+    selected = set(args.only or [])
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=120
+        ) as client:
+            with get_advisor_agent().override(model=TestModel()):
+                for scenario in scenarios(fleet, login_username):
+                    if selected and scenario.name not in selected:
+                        continue
+                    if scenario.needs_queue and app.state.arq_pool is None:
+                        report["skipped"].append(scenario.name)
+                        continue
+                    requests = min(args.requests, scenario.requests or args.requests)
+                    result = await drive(
+                        client,
+                        scenario,
+                        requests,
+                        args.concurrency,
+                        args.seed,
+                        min(args.warmup, requests),
+                    )
+                    report["scenarios"][scenario.name] = result
+                    print(json.dumps({scenario.name: result}), file=sys.stderr)
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--transactions", type=int, default=2000, help="Per user.")
+    parser.add_argument("--requests", type=int, default=200, help="Per scenario.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed, per scenario.")
+    parser.add_argument("--only", nargs="*", help="Scenario names to run.")
+    parser.add_argument("--output", help="Also write the JSON report here.")
+    parser.add_argument("--baseline", help="Earlier --output to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    regressed = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressed = compare(report, json.load(f), args.max_regression)
+        report["regressions"] = regressed
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Large ledger responses: pydantic response models vs rows encoded by orjson.
+
+Loads one user with --rows transactions and serves their whole ledger from
+three in-process routes on the async engine:
+
+* orm_pydantic: ORM objects through `response_model=List[TransactionRead]`
+  and the stock JSONResponse, which is how GET /transactions used to work.
+* orm_pydantic_orjson: the same with ORJSONResponse, i.e. what changing the
+  app's default response class buys on its own.
+* rows_orjson: READ_COLUMNS tuples encoded by `transactions_json`, which is
+  what GET /transactions does now.
+
+    python -m benchmarks.bench_serialization --rows 100000 --requests 10
+
+Prints JSON per variant: p50/max latency, p50 CPU time per request (this
+process, so the server side of an in-process call), response size, and p50
+latency and CPU relative to orm_pydantic. Every variant must return the same
+objects.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dals.transactions import AsyncTransactionDal
+from app.database import to_async_url
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionRead
+from app.services.transactions import READ_COLUMNS, transactions_json
+from benchmarks.common import load_ledger, temp_engine
+
+VARIANTS = ("orm_pydantic", "orm_pydantic_orjson", "rows_orjson")
+
+
+def build_app(async_engine, user_id: int) -> FastAPI:
+    app = FastAPI()
+    # The app no longer loads ledgers as ORM objects; this is the old query.
+    ledger = select(Transaction).where(Transaction.user_id == user_id)
+
+    @app.get(
+        "/orm_pydantic",
+        response_model=List[TransactionRead],
+        response_class=JSONResponse,
+    )
+    async def orm_pydantic():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return (await session.exec(ledger)).all()
+
+    @app.get(
+        "/orm_pydantic_orjson",
+        response_model=List[TransactionRead],
+        response_class=ORJSONResponse,
+    )
+    async def orm_pydantic_orjson():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return (await session.exec(ledger)).all()
+
+    @app.get("/rows_orjson", response_model=List[TransactionRead])
+    async def rows_orjson():
+        async with AsyncSession(async_engine) as session:
+            rows = await AsyncTransactionDal(session).get_rows_by_user(
+                user_id, READ_COLUMNS
+            )
+        return Response(transactions_json(rows), media_type="application/json")
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int) -> dict:
+    await client.get(path)  # warm the pool, caches and code paths
+    walls: List[float] = []
+    cpus: List[float] = []
+    for _ in range(requests):
+        wall, cpu = time.perf_counter(), time.process_time()
+        response = await client.get(path)
+        cpus.append((time.process_time() - cpu) * 1000)
+        walls.append((time.perf_counter() - wall) * 1000)
+        response.raise_for_status()
+    return {
+        "p50_ms": round(statistics.median(walls), 1),
+        "max_ms": round(max(walls), 1),
+        "cpu_p50_ms": round(statistics.median(cpus), 1),
+        "bytes": len(response.content),
+        "body": response.content,
+    }
+
+
+async def run(args) -> dict:
+    engine = temp_engine("serialization.db")
+    user_id = load_ledger(engine, "serialized", args.rows)
+    async_engine = create_async_engine(
+        to_async_url(engine.url.render_as_string(hide_password=False))
+    )
+    transport = httpx.ASGITransport(app=build_app(async_engine, user_id))
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        results = {
+            variant: await drive(client, f"/{variant}", args.requests)
+            for variant in VARIANTS
+        }
+    await async_engine.dispose()
+
+    # The ORM routes return rows in storage order, the tuple route newest first.
+    payloads = [
+        sorted(json.loads(result.pop("body")), key=lambda row: row["id"])
+        for result in results.values()
+    ]
+    assert all(payload == payloads[0] for payload in payloads)
+    base = results["orm_pydantic"]
+    for result in results.values():
+        result["latency_vs_orm_pydantic"] = round(result["p50_ms"] / base["p50_ms"], 2)
+        result["cpu_vs_orm_pydantic"] = round(
+            result["cpu_p50_ms"] / base["cpu_p50_ms"], 2
+        )
+    return {"rows": args.rows, "variants": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=10, help="Per variant.")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Mixed read/write contention on one SQLite file, per engine profile.
+
+Reader threads run the dashboard summary and a keyset page (the API's hot
+reads) while writer threads insert transactions through TransactionService
+(the API's writes), all for a fixed duration. Each profile gets a fresh
+database file:
+
+    python -m benchmarks.bench_sqlite_profile --readers 8 --writers 2 --seconds 10
+
+Reports p50/p99 latency per operation and how many operations failed with
+"database is locked".
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.core.cache import FakeRedis, StatsCache
+from app.dals.rollups import RollupDal
+from app.dals.transactions import TransactionDal
+from app.database import make_engine
+from app.schemas.transaction import TransactionCreate
+from app.services.transactions import TransactionService, dashboard_window
+from benchmarks.common import load_ledger, percentile, temp_engine
+
+
+def rounded_percentile(samples, q):
+    """None when every operation of a kind hit "database is locked"."""
+    return round(percentile(sorted(samples), q), 2) if samples else None
+
+
+def run_profile(profile: str, args):
+    seeded = temp_engine(f"contention_{profile}.db")
+    url = seeded.url.render_as_string(hide_password=False)
+    seeded.dispose()
+
+    engine = make_engine(url, profile=profile)
+    user_id = load_ledger(engine, f"contended_{profile}", args.rows)
+
+    deadline = time.perf_counter() + args.seconds
+    results = {"read": [], "write": []}
+    locked = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def record(kind, started):
+        with lock:
+            results[kind].append((time.perf_counter() - started) * 1000)
+
+    def reader():
+        with Session(engine) as session:
+            rollups, dal = RollupDal(session), TransactionDal(session)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    rollups.get_dashboard_summary(
+                        user_id, **dashboard_window(datetime.now())
+                    )
+                    dal.get_page_by_user(user_id, 50)
+                    session.rollback()  # end the read transaction
+                    record("read", started)
+                except OperationalError:
+                    session.rollback()
+                    locked["read"] += 1
+
+    def writer():
+        cache = StatsCache(FakeRedis())
+        with Session(engine) as session:
+            service = TransactionService(session, cache)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    service.create_user_transaction(
+                        TransactionCreate(
+                            amount=9.5,
+                            category="Food",
+                            description="contention",
+                            date=datetime.now(),
+                        ),
+                        user_id,
+                    )
+                    record("write", started)
+                except OperationalError:
+                    session.rollback()
+                    locked["write"] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        kind: {
+            "ops": len(samples),
+            "ops_per_sec": round(len(samples) / args.seconds, 1),
+            "p50_ms": rounded_percentile(samples, 50),
+            "p99_ms": rounded_percentile(samples, 99),
+            "locked_errors": locked[kind],
+        }
+        for kind, samples in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    report = {profile: run_profile(profile, args) for profile in ("default", "tuned")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Cold-start cost of the API, the CLI and the report worker.
+
+Each target runs --runs times in a fresh interpreter under `-X importtime`
+against a throwaway database, so nothing is shared between runs:
+
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+
+* api: `import app.main`, what uvicorn does before it can bind.
+* worker: `import app.worker`, what arq does before it picks up jobs.
+* cli: `app.cli --help`, a whole CLI invocation.
+
+Prints JSON: per-target p50/max wall-clock and module import time, the
+heaviest direct imports, and which of the deliberately lazy dependencies
+(pydantic_ai, openai, fpdf, passlib) were loaded anyway. With --baseline it
+adds ratios against an earlier run's output and exits 1 if any target's p50
+import time grew by more than --max-regression (default 25%).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# (module timed, argv after the interpreter flags)
+TARGETS: Dict[str, Tuple[str, List[str]]] = {
+    "api": ("app.main", ["-c", "import app.main"]),
+    "worker": ("app.worker", ["-c", "import app.worker"]),
+    # Not `-m app.cli`: run as __main__, it would be missing from importtime.
+    "cli": ("app.cli", ["-c", "from app.cli import app; app()", "--help"]),
+}
+# Loaded on first use only; a target importing one at startup is a regression.
+LAZY_MODULES = ("pydantic_ai", "openai", "fpdf", "passlib")
+
+
+def startup_env(directory: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("ASYNC_DATABASE_URL", None)
+    env["DATABASE_URL"] = f"sqlite:///{directory}/startup.db"
+    env["REPORT_DIR"] = os.path.join(directory, "reports")
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str, int]]:
+    """(depth, module, cumulative microseconds) per `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(cumulative)))
+    return rows
+
+
+def heaviest_imports(
+    rows: List[Tuple[int, str, int]], module: str, top: int = 5
+) -> Dict[str, float]:
+    """The costliest modules `module` imported directly, in milliseconds."""
+    children: List[Tuple[int, str]] = []
+    for index, (depth, name, _) in enumerate(rows):
+        if name != module:
+            continue
+        # importtime prints children before their parent, one level deeper.
+        for child_depth, child, cumulative in reversed(rows[:index]):
+            if child_depth <= depth:
+                break
+            if child_depth == depth + 1:
+                children.append((cumulative, child))
+        break
+    children.sort(reverse=True)
+    return {name: round(us / 1000, 1) for us, name in children[:top]}
+
+
+def run_target(name: str, runs: int, env: Dict[str, str]) -> dict:
+    module, argv = TARGETS[name]
+    walls, imports = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", *argv],
+            cwd=BACKEND,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        walls.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"{name} exited {result.returncode}:\n{result.stderr}")
+        rows = parse_importtime(result.stderr)
+        imports.append(next(us for _, mod, us in rows if mod == module) / 1000)
+
+    loaded = {mod for _, mod, _ in rows}
+    return {
+        "p50_ms": round(statistics.median(walls), 1),
+        "max_ms": round(max(walls), 1),
+        "import_p50_ms": round(statistics.median(imports), 1),
+        "heaviest_imports_ms": heaviest_imports(rows, module),
+        "lazy_modules_loaded": [mod for mod in LAZY_MODULES if mod in loaded],
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Annotate targets with ratios to `baseline`; return those that regressed."""
+    regressed = []
+    for name, result in report["targets"].items():
+        before = baseline.get("targets", {}).get(name)
+        if not before:
+            continue
+        ratio = result["import_p50_ms"] / before["import_p50_ms"]
+        result["baseline"] = {
+            "import_p50_ms": before["import_p50_ms"],
+            "import_ratio": round(ratio, 2),
+        }
+        if ratio > 1 + max_regression:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Per target.")
+    parser.add_argument("--only", nargs="*", choices=sorted(TARGETS))
+    parser.add_argument("--output", help="Also write the JSON report here.")
+    parser.add_argument("--baseline", help="Earlier --output to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    env = startup_env(tempfile.mkdtemp(prefix="spendwise-bench-"))
+    # One untimed pass, so every run sees warm .pyc and page caches.
+    for name in args.only or TARGETS:
+        run_target(name, 1, env)
+    report = {
+        "python": sys.version.split()[0],
+        "targets": {
+            name: run_target(name, args.runs, env) for name in args.only or TARGETS
+        },
+    }
+    regressed = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressed = compare(report, json.load(f), args.max_regression)
+        report["regressions"] = regressed
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Shared helpers for the benchmarks in this package.
+
+Benchmarks run against throwaway SQLite files, never the app database:
+
+    python -m benchmarks.bench_dashboard --sizes 10000 100000
+"""
+
+import math
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.dals.rollups import RollupDal
+from app.migrations import run_migrations
+from app.models.transaction import Transaction
+from app.models.user import User
+
+CATEGORIES = ["Food", "Bills", "Travel", "Shopping", "Health", "Fun", "Transport"]
+
+
+def temp_engine(name: str = "bench.db"):
+    directory = Path(tempfile.mkdtemp(prefix="spendwise-bench-"))
+    engine = create_engine(f"sqlite:///{directory / name}")
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    return engine
+
+
+def load_ledger(engine, username: str, rows: int, days: int = 730, seed: int = 7):
+    """Insert one user with `rows` transactions spread over the last `days`."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    with Session(engine) as session:
+        user = User(username=username, hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+        batch = []
+        for i in range(rows):
+            batch.append(
+                {
+                    "amount": round(rng.lognormvariate(3, 1), 2),
+                    "category": rng.choice(CATEGORIES),
+                    "description": f"txn {i}",
+                    "date": now - timedelta(seconds=rng.randrange(days * 86400)),
+                    "user_id": user_id,
+                }
+            )
+            if len(batch) == 10_000:
+                session.exec(insert(Transaction), params=batch)
+                batch = []
+        if batch:
+            session.exec(insert(Transaction), params=batch)
+        RollupDal(session).rebuild(user_id)
+        session.commit()
+    return user_id
+
+
+def measure(fn: Callable[[], object], repeat: int = 20) -> Dict[str, float]:
+    """Wall-clock latency of `fn` in milliseconds over `repeat` runs."""
+    fn()  # warm caches and the connection pool
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty sequence."""
+    rank = math.ceil(len(ordered) * q / 100)
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def latency_summary(samples_ms: List[float], elapsed_s: float) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed_s, 1),
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
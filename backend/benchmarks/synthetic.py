@@ -0,0 +1,252 @@
+"""Synthetic ledgers with realistic shape, for benchmarks and local load.
+
+Each user gets monthly recurring bills (rent, utilities, subscriptions) on
+fixed days, plus discretionary spending drawn from per-category profiles.
+Profiles set how often a category occurs, its lognormal amount, the weekday
+and hour it tends to happen at, and the merchants it is spent at. Users
+differ in overall spending level and category mix, and December shopping
+runs heavier. Everything is seeded, so a given (seed, users, rows) always
+produces the same ledger.
+
+    python -m benchmarks.synthetic --users 100 --transactions 5000
+
+loads into a throwaway SQLite file and prints its URL; pass --url to load
+into another database instead (its schema is created and migrated first).
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.dals.rollups import RollupDal
+from app.migrations import run_migrations
+from app.models.transaction import Transaction
+from app.models.user import User
+from benchmarks.common import temp_engine
+
+INSERT_BATCH = 10_000
+
+
+@dataclass(frozen=True)
+class Profile:
+    weight: float
+    # Parameters of the lognormal amount, in dollars.
+    mu: float
+    sigma: float
+    merchants: Sequence[str]
+    # Relative likelihood Monday..Sunday and the (start, end) hours it happens.
+    weekdays: Sequence[float] = (1, 1, 1, 1, 1, 1, 1)
+    hours: Tuple[int, int] = (8, 22)
+
+
+PROFILES: Dict[str, Profile] = {
+    "Food": Profile(
+        0.34,
+        2.6,
+        0.6,
+        ("Corner Deli", "Green Grocer", "Pizza Place", "Sushi Bar", "Coffee Co"),
+        (1, 1, 1, 1, 1.3, 1.6, 1.4),
+        (7, 22),
+    ),
+    "Transport": Profile(
+        0.18,
+        2.4,
+        0.7,
+        ("Metro Card", "City Cabs", "Fuel Stop", "Bike Share"),
+        (1.2, 1.2, 1.2, 1.2, 1.2, 0.6, 0.5),
+        (6, 21),
+    ),
+    "Shopping": Profile(
+        0.16,
+        3.4,
+        0.9,
+        ("Online Mart", "Book Nook", "Home Goods", "Shoe Store", "Electronics Hub"),
+        (0.8, 0.8, 0.9, 0.9, 1.1, 1.6, 1.3),
+        (10, 21),
+    ),
+    "Fun": Profile(
+        0.14,
+        3.1,
+        0.8,
+        ("Cinema", "Concert Hall", "Game Store", "Bowling Alley", "Pub"),
+        (0.5, 0.5, 0.7, 0.9, 1.6, 2.0, 1.2),
+        (17, 24),
+    ),
+    "Health": Profile(
+        0.08,
+        3.6,
+        0.8,
+        ("Pharmacy", "Dental Clinic", "Gym", "Optician"),
+        (1.1, 1.1, 1.1, 1.1, 1.0, 0.7, 0.4),
+        (8, 19),
+    ),
+    "Travel": Profile(
+        0.04,
+        5.2,
+        0.7,
+        ("Airline", "Hotel Group", "Rail Europe", "Car Rental"),
+        (0.8, 0.8, 0.8, 0.9, 1.3, 1.2, 1.0),
+        (6, 23),
+    ),
+}
+
+# (description, typical amount, relative jitter, day of month)
+BILLS: Sequence[Tuple[str, float, float, int]] = (
+    ("Rent", 1400.0, 0.0, 1),
+    ("Electricity", 85.0, 0.25, 12),
+    ("Water", 35.0, 0.15, 15),
+    ("Internet", 60.0, 0.0, 18),
+    ("Phone Plan", 40.0, 0.0, 20),
+    ("Streaming", 15.99, 0.0, 24),
+)
+
+
+def _weights(rng: random.Random) -> List[float]:
+    # Everyone shares the same broad mix, but not exactly.
+    return [p.weight * rng.uniform(0.6, 1.4) for p in PROFILES.values()]
+
+
+def _moment(rng: random.Random, profile: Profile, start: datetime, days: int):
+    """A timestamp in the window, following the profile's weekday and hours."""
+    top = max(profile.weekdays)
+    while True:
+        day = start + timedelta(days=rng.randrange(days))
+        if rng.random() * top <= profile.weekdays[day.weekday()]:
+            break
+    low, high = profile.hours
+    return day + timedelta(minutes=rng.randrange(low * 60, high * 60))
+
+
+def synthetic_rows(
+    user_id: int,
+    rows: int,
+    days: int = 730,
+    now: Optional[datetime] = None,
+    rng: Optional[random.Random] = None,
+) -> Iterator[dict]:
+    """`rows` transaction dicts for one user over the last `days`."""
+    rng = rng or random.Random(user_id)
+    now = now or datetime.now()
+    start = (now - timedelta(days=days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    scale = rng.lognormvariate(0, 0.35)
+
+    # Recurring bills first, capped so tiny ledgers are not all bills.
+    bills = []
+    month = start.replace(day=1)
+    while month <= now:
+        for description, amount, jitter, day in BILLS:
+            when = month.replace(day=day, hour=9)
+            if start <= when <= now:
+                amount *= 1 + rng.uniform(-1, 1) * jitter
+                bills.append((when, description, amount))
+        month = (month + timedelta(days=32)).replace(day=1)
+    bills = bills[-(rows // 5) :] if rows >= 5 else []
+    for when, description, amount in bills:
+        yield {
+            "amount": round(amount * scale, 2),
+            "category": "Bills",
+            "description": description,
+            "date": when,
+            "user_id": user_id,
+        }
+
+    categories = list(PROFILES)
+    weights = _weights(rng)
+    for _ in range(rows - len(bills)):
+        category = rng.choices(categories, weights)[0]
+        profile = PROFILES[category]
+        when = min(_moment(rng, profile, start, days), now)
+        amount = rng.lognormvariate(profile.mu, profile.sigma) * scale
+        if category == "Shopping" and when.month == 12:
+            amount *= 1.5
+        yield {
+            "amount": round(max(amount, 0.5), 2),
+            "category": category,
+            "description": rng.choice(profile.merchants),
+            "date": when,
+            "user_id": user_id,
+        }
+
+
+def load_synthetic(
+    engine,
+    users: int,
+    rows: int,
+    days: int = 730,
+    seed: int = 7,
+    prefix: str = "synthetic",
+    hashed_password: str = "x",
+) -> List[int]:
+    """Insert `users` users with `rows` transactions each; returns their ids."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    with Session(engine) as session:
+        accounts = [
+            User(username=f"{prefix}_{seed}_{i}", hashed_password=hashed_password)
+            for i in range(users)
+        ]
+        session.add_all(accounts)
+        session.commit()
+        user_ids = [account.id for account in accounts]
+
+        batch = []
+        for user_id in user_ids:
+            user_rng = random.Random(rng.getrandbits(64))
+            for row in synthetic_rows(user_id, rows, days, now, user_rng):
+                batch.append(row)
+                if len(batch) == INSERT_BATCH:
+                    session.exec(insert(Transaction), params=batch)
+                    batch = []
+        if batch:
+            session.exec(insert(Transaction), params=batch)
+        RollupDal(session).rebuild()
+        session.commit()
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=1000, help="Per user.")
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="Existing database to load into.")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+        SQLModel.metadata.create_all(engine)
+        run_migrations(engine)
+    else:
+        engine = temp_engine("synthetic.db")
+    started = time.perf_counter()
+    user_ids = load_synthetic(
+        engine, args.users, args.transactions, args.days, args.seed
+    )
+    seconds = time.perf_counter() - started
+    print(
+        json.dumps(
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "users": len(user_ids),
+                "rows": len(user_ids) * args.transactions,
+                "seconds": round(seconds, 2),
+                "rows_per_s": math.floor(len(user_ids) * args.transactions / seconds),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,248 @@
+"""Refresh every user's precomputed AI analysis through the API.
+
+User ids are paged out of the database. Users refreshed recently (a Redis
+key per user, REFRESH_LOCK_TTL seconds) are filtered out with one pipelined
+EXISTS batch per page. The rest go to POST /ai/analyze/batch in groups of
+--batch-size, over a single pooled HTTP client with at most --concurrency
+requests in flight. Transport errors, 429s and 5xxs are retried with
+jittered exponential backoff.
+
+    python -m scripts.refresh --concurrency 8 --batch-size 25
+"""
+
+import argparse
 import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
 import httpx
 import redis.asyncio as redis
-import os
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import async_engine
+from app.models.user import User
 
 # Updated to match main.py routing (removed /api/v1)
 API_URL = os.getenv("API_URL", "http://spendwise-backend:8000")
 REDIS_URL = os.getenv("REDIS_URL", "redis://spendwise-redis:6379")
+REFRESH_API_TOKEN = os.getenv("REFRESH_API_TOKEN", "")
+
+REFRESH_PAGE_SIZE = int(os.getenv("REFRESH_PAGE_SIZE", "1000"))
+REFRESH_BATCH_SIZE = int(os.getenv("REFRESH_BATCH_SIZE", "25"))
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "5"))
+REFRESH_RETRIES = int(os.getenv("REFRESH_RETRIES", "3"))
+REFRESH_BACKOFF_SECONDS = float(os.getenv("REFRESH_BACKOFF_SECONDS", "1"))
+REFRESH_TIMEOUT = float(os.getenv("REFRESH_TIMEOUT", "120"))
+REFRESH_LOCK_TTL = int(os.getenv("REFRESH_LOCK_TTL", "300"))
+
+# Statuses after which a user needs no further attempt this window.
+DONE_STATUSES = ("refreshed", "unchanged")
+
+
+def lock_key(user_id: int) -> str:
+    return f"refresh_lock:user:{user_id}"
+
+
+@dataclass
+class RefreshStats:
+    seen: int = 0
+    skipped: int = 0
+    refreshed: int = 0
+    unchanged: int = 0
+    not_found: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def count(self, status: str, n: int = 1):
+        if status not in ("refreshed", "unchanged", "not_found"):
+            status = "failed"
+        setattr(self, status, getattr(self, status) + n)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        handled = self.seen - self.skipped
+        return (
+            f"{self.seen} users: {self.refreshed} refreshed, {self.unchanged} "
+            f"unchanged, {self.skipped} skipped, {self.not_found} not found, "
+            f"{self.failed} failed in {elapsed:.1f}s "
+            f"({handled / elapsed if elapsed else 0:.1f} users/s)"
+        )
+
+
+def make_client(concurrency: int = REFRESH_CONCURRENCY) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=API_URL,
+        headers={"X-Refresh-Token": REFRESH_API_TOKEN},
+        limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ),
+        timeout=REFRESH_TIMEOUT,
+    )
+
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    retry_after = response.headers.get("Retry-After") if response else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    # Full jitter, so a fleet of retries doesn't arrive in lockstep.
+    return random.uniform(0, REFRESH_BACKOFF_SECONDS * 2**attempt)
+
+
+async def post_with_backoff(
+    client: httpx.AsyncClient, path: str, retries: int = REFRESH_RETRIES, **kwargs
+) -> Optional[httpx.Response]:
+    """The first non-retryable response, or None once retries are exhausted."""
+    for attempt in range(retries):
+        response = None
+        try:
+            response = await client.post(path, **kwargs)
+        except httpx.HTTPError as e:
+            print(f"⚠️ {path} attempt {attempt + 1} failed: {e}")
+        else:
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            print(f"⚠️ {path} attempt {attempt + 1}: HTTP {response.status_code}")
+        if attempt + 1 < retries:
+            await asyncio.sleep(backoff_delay(attempt, response))
+    return None
+
+
+async def user_id_pages(
+    page_size: int = REFRESH_PAGE_SIZE, bind=None
+) -> AsyncIterator[List[int]]:
+    """All user ids in ascending pages, keyset-paged on the primary key."""
+    after = 0
+    async with AsyncSession(bind or async_engine) as session:
+        while True:
+            statement = select(User.id).where(User.id > after)
+            statement = statement.order_by(User.id).limit(page_size)
+            page = list((await session.exec(statement)).all())
+            if not page:
+                return
+            yield page
+            after = page[-1]
+
+
+async def pending_user_ids(r: redis.Redis, user_ids: List[int]) -> List[int]:
+    """`user_ids` without a refresh lock, in one pipelined round trip."""
+    pipe = r.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.exists(lock_key(user_id))
+    locked = await pipe.execute()
+    return [user_id for user_id, held in zip(user_ids, locked) if not held]
+
+
+async def mark_done(r: redis.Redis, user_ids: List[int]):
+    if not user_ids:
+        return
+    pipe = r.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.setex(lock_key(user_id), REFRESH_LOCK_TTL, "done")
+    await pipe.execute()
 
 
 async def refresh_user_analysis(
-    user_id: int, r: redis.Redis, semaphore: asyncio.Semaphore
+    user_id: int,
+    r: redis.Redis,
+    semaphore: asyncio.Semaphore,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Optional[str]:
+    """Refresh one user via /ai/analyze; None if skipped or it failed."""
+    async with semaphore:
+        if await r.exists(lock_key(user_id)):
+            print(f"⏩ User {user_id} already processed. Skipping.")
+            return None
+
+        owned = client is None
+        client = client or make_client(1)
+        try:
+            response = await post_with_backoff(
+                client, "/ai/analyze", params={"user_id": user_id}
+            )
+        finally:
+            if owned:
+                await client.aclose()
+
+    if response is None or response.status_code != 200:
+        print(f"❌ User {user_id} failed")
+        return None
+    await mark_done(r, [user_id])
+    print(f"✅ Refreshed User {user_id}")
+    return response.json()["status"]
+
+
+async def refresh_batch(
+    user_ids: List[int],
+    r: redis.Redis,
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    stats: RefreshStats,
 ):
     async with semaphore:
-        idempotency_key = f"refresh_lock:user:{user_id}"
+        response = await post_with_backoff(
+            client, "/ai/analyze/batch", json={"user_ids": user_ids}
+        )
+    if response is None or response.status_code != 200:
+        status = "no response" if response is None else response.status_code
+        print(f"❌ Batch of {len(user_ids)} from user {user_ids[0]} failed: {status}")
+        stats.count("failed", len(user_ids))
+        return
+
+    results = response.json()["results"]
+    for result in results:
+        stats.count(result["status"])
+    await mark_done(
+        r, [res["user_id"] for res in results if res["status"] in DONE_STATUSES]
+    )
+
+
+async def run(
+    r: redis.Redis,
+    client: httpx.AsyncClient,
+    page_size: int = REFRESH_PAGE_SIZE,
+    batch_size: int = REFRESH_BATCH_SIZE,
+    concurrency: int = REFRESH_CONCURRENCY,
+    bind=None,
+) -> RefreshStats:
+    stats = RefreshStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    async for page in user_id_pages(page_size, bind):
+        stats.seen += len(page)
+        pending = await pending_user_ids(r, page)
+        stats.skipped += len(page) - len(pending)
+        await asyncio.gather(
+            *(
+                refresh_batch(pending[i : i + batch_size], r, client, semaphore, stats)
+                for i in range(0, len(pending), batch_size)
+            )
+        )
+        print(f"… {stats.summary()}")
+    return stats
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=REFRESH_PAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=REFRESH_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=REFRESH_CONCURRENCY)
+    args = parser.parse_args(argv)
 
-        if await r.exists(idempotency_key):
-            print(f"⏩ User {user_id} already processed. Skipping.")
-            return
-
-        async with httpx.AsyncClient() as client:
-            for attempt in range(3):
-                try:
-                    # AI route prefix is /ai based on your code
-                    response = await client.post(
-                        f"{API_URL}/ai/analyze", params={"user_id": user_id}
-                    )
-                    if response.status_code == 200:
-                        await r.setex(idempotency_key, 300, "done")
-                        print(f"✅ Refreshed User {user_id}")
-                        return
-                except Exception as e:
-                    print(f"⚠️ Attempt {attempt + 1} failed: {e}")
-                    await asyncio.sleep(2**attempt)
-
-
-async def main():
     r = redis.from_url(REDIS_URL)
-    semaphore = asyncio.Semaphore(5)
-    user_ids = [1]
-    tasks = [refresh_user_analysis(uid, r, semaphore) for uid in user_ids]
-    await asyncio.gather(*tasks)
-    await r.aclose()
+    try:
+        async with make_client(args.concurrency) as client:
+            stats = await run(
+                r, client, args.page_size, args.batch_size, args.concurrency
+            )
+    finally:
+        await r.aclose()
+    print(f"🏁 {stats.summary()}")
+    return 1 if stats.failed else 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
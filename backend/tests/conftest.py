@@ -0,0 +1,124 @@
+import os
+
+# Tests never need a live Redis for caching: use the in-process fake.
+os.environ.setdefault("STATS_CACHE_URL", "memory://")
+os.environ.setdefault("AUTH_REVOCATION_URL", "memory://")
+
+import uuid  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+from app.core.cache import FakeRedis, StatsCache  # noqa: E402
+from app.dals.rollups import RollupDal  # noqa: E402
+from app.core.metrics import request_query_listeners  # noqa: E402
+from app.main import app  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    # The app only runs on asyncio (uvicorn, aiosqlite, arq).
+    return "asyncio"
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """A throwaway SQLite database with the full, migrated schema."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def seed_ledger(request):
+    """`seed_ledger(rows)` adds a new user with `rows` transactions; returns the id.
+
+    Row i defaults to 10.0 of alternating Food/Bills, described "row i" and
+    dated i days after 2025-01-01; `row(i)` returns fields to override. Rollups
+    are rebuilt. Seeds `sqlite_engine` unless another `engine` is given.
+    """
+
+    def seed(rows: int = 0, row=None, engine=None) -> int:
+        engine = engine or request.getfixturevalue("sqlite_engine")
+        with Session(engine) as session:
+            user = User(username=f"seeded_{uuid.uuid4().hex}", hashed_password="x")
+            session.add(user)
+            session.commit()
+            start = datetime(2025, 1, 1)
+            params = [
+                {
+                    "amount": 10.0,
+                    "category": ["Food", "Bills"][i % 2],
+                    "description": f"row {i}",
+                    "date": start + timedelta(days=i),
+                    "user_id": user.id,
+                    **(row(i) if row else {}),
+                }
+                for i in range(rows)
+            ]
+            if params:
+                session.exec(insert(Transaction), params=params)
+            RollupDal(session).rebuild(user.id)
+            session.commit()
+            return user.id
+
+    return seed
+
+
+@pytest.fixture
+def isolated_auth_header():
+    """Bearer header for a new user, so no other test shares their ledger."""
+    client = TestClient(app)
+    username = f"isolated_{uuid.uuid4().hex}"
+    password = "Password123!"
+
+    client.post("/auth/register", json={"username": username, "password": password})
+    response = client.post(
+        "/auth/token", data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def stats_cache():
+    """A private cache, so user ids from different test databases never collide."""
+    return StatsCache(FakeRedis())
+
+
+@pytest.fixture
+def max_queries():
+    """`with max_queries(n): client.get(...)` fails any request over n statements.
+
+    Yields the (method, path, QueryLog) of each request served in the block.
+    """
+
+    @contextmanager
+    def budget(limit: int):
+        served = []
+
+        def listener(scope, queries):
+            served.append((scope["method"], scope["path"], queries))
+
+        request_query_listeners.append(listener)
+        try:
+            yield served
+        finally:
+            request_query_listeners.remove(listener)
+        assert served, "no requests were made inside max_queries()"
+        for method, path, queries in served:
+            assert queries.count <= limit, (
+                f"{method} {path} ran {queries.count} SQL statements, "
+                f"over the budget of {limit}:\n{queries.describe()}"
+            )
+
+    return budget
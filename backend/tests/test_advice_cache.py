@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from fastapi.testclient import TestClient
+from pydantic_ai.models.function import FunctionModel
+
+from app.core.advice_cache import (
+    ADVICE_CACHE_REQUESTS,
+    AdviceCache,
+    advice_key,
+    async_client_from_url,
+    normalize_query,
+)
+from app.database import async_engine
+from app.main import app
+from app.services.ai_service import AIService, ai_service, get_advisor_agent
+
+client = TestClient(app)
+
+
+def slow_advisor():
+    """A stub model that counts its runs and takes a moment to answer."""
+    runs = []
+
+    async def advise(messages, info):
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return ModelResponse(parts=[TextPart(f"advice #{len(runs)}")])
+
+    return FunctionModel(advise), runs
+
+
+def _count(result: str) -> float:
+    return ADVICE_CACHE_REQUESTS.labels(result=result)._value.get()
+
+
+def test_normalize_query_ignores_case_spacing_and_punctuation():
+    assert normalize_query("  How am   I doing?? ") == "how am i doing"
+    key = advice_key(1, "how am i doing", "v1")
+    assert advice_key(1, "How am I doing?", "v1") == key
+    assert advice_key(1, "how am i doing", "v2") != key
+    assert advice_key(2, "how am i doing", "v1") != key
+
+
+@pytest.mark.anyio
+async def test_identical_concurrent_requests_share_one_run():
+    model, runs = slow_advisor()
+    service = AIService(AdviceCache())
+    coalesced = _count("coalesced")
+
+    with get_advisor_agent().override(model=model):
+        answers = await asyncio.gather(
+            *(service.get_advice(1, "How am I doing?", "v1") for _ in range(5))
+        )
+        again = await service.get_advice(1, "how am i doing", "v1")
+
+    assert len(runs) == 1
+    assert set(answers) == {"advice #1"} and again == "advice #1"
+    assert _count("coalesced") - coalesced == 4
+
+
+@pytest.mark.anyio
+async def test_new_data_version_reruns_the_agent():
+    model, runs = slow_advisor()
+    service = AIService(AdviceCache())
+
+    with get_advisor_agent().override(model=model):
+        first = await service.get_advice(1, "Summary", "v1")
+        second = await service.get_advice(1, "Summary", "v2")
+        uncached = await service.get_advice(1, "Summary")
+
+    assert (first, second, uncached) == ("advice #1", "advice #2", "advice #3")
+
+
+def test_advice_follows_delete_then_insert(isolated_auth_header, monkeypatch):
+    monkeypatch.setattr(ai_service, "cache", AdviceCache())
+    model, runs = slow_advisor()
+    row = {
+        "amount": 5.0,
+        "category": "Food",
+        "description": "Lunch",
+        "date": "2026-03-02T12:00:00",
+    }
+
+    def advice():
+        response = client.get("/ai/advice", headers=isolated_auth_header)
+        return response.json()["advice"]
+
+    with get_advisor_agent().override(model=model):
+        client.post("/transactions", json=row, headers=isolated_auth_header)
+        newest = client.post("/transactions", json=row, headers=isolated_auth_header)
+        first, cached = advice(), advice()
+
+        # SQLite reuses the deleted row's id: same highest id, same row count.
+        transaction_id = newest.json()["id"]
+        client.delete(f"/transactions/{transaction_id}", headers=isolated_auth_header)
+        row["amount"] = 500.0
+        replaced = client.post("/transactions", json=row, headers=isolated_auth_header)
+        assert replaced.json()["id"] == transaction_id
+        after = advice()
+
+    assert (first, cached, after) == ("advice #1", "advice #1", "advice #2")
+
+
+def test_advice_runs_without_holding_a_connection(isolated_auth_header, monkeypatch):
+    monkeypatch.setattr(ai_service, "cache", AdviceCache())
+    checked_out = []
+
+    async def advise(messages, info):
+        checked_out.append(async_engine.pool.checkedout())
+        return ModelResponse(parts=[TextPart("advice")])
+
+    with get_advisor_agent().override(model=FunctionModel(advise)):
+        response = client.get("/ai/advice", headers=isolated_auth_header)
+
+    assert response.json()["advice"] == "advice"
+    assert checked_out == [0]
+
+
+@pytest.mark.anyio
+async def test_entries_expire_and_evict():
+    runs = []
+
+    async def run():
+        runs.append(1)
+        return f"advice #{len(runs)}"
+
+    cache = AdviceCache(maxsize=2, ttl=0.05)
+    await cache.get_or_run("a", run)
+    assert await cache.get_or_run("a", run) == ("advice #1", "local")
+    await asyncio.sleep(0.06)
+    assert await cache.get_or_run("a", run) == ("advice #2", "miss")
+
+    await cache.get_or_run("b", run)
+    await cache.get_or_run("c", run)
+    assert (await cache.get_or_run("a", run))[1] == "miss"
+
+
+@pytest.mark.anyio
+async def test_redis_tier_is_shared_between_processes():
+    client = async_client_from_url("memory://")
+    runs = []
+
+    async def run():
+        runs.append(1)
+        return "shared advice"
+
+    await AdviceCache(client=client).get_or_run("k", run)
+    # A second API process with an empty local tier.
+    assert await AdviceCache(client=client).get_or_run("k", run) == (
+        "shared advice",
+        "redis",
+    )
+    assert len(runs) == 1
+
+
+@pytest.mark.anyio
+async def test_sub_second_ttl_expires_in_redis():
+    client = async_client_from_url("memory://")
+    cache = AdviceCache(ttl=0.05, client=client)
+
+    await cache.store("k", "short-lived", 1.0)
+    assert await client.get("k") is not None
+    await asyncio.sleep(0.06)
+    assert await client.get("k") is None
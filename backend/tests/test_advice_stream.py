@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+
+import pytest
+from pydantic_ai.models.function import FunctionModel
+
+from app.core.advice_cache import AdviceCache
+from app.core.deps import get_current_user
+from app.database import async_engine
+from app.main import app
+from app.models.user import User
+from app.services.ai_service import AIService, ai_service, get_advisor_agent
+
+THINKING_SECONDS = 0.5
+
+
+def slow_streaming_advisor(state):
+    """A stub model whose first token is instant and the rest take a while."""
+
+    async def advise(messages, info):
+        state["started"] = True
+        try:
+            yield "Spend "
+            await asyncio.sleep(THINKING_SECONDS)
+            yield "less on food."
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    return FunctionModel(stream_function=advise)
+
+
+async def _call(path: str, disconnect_after_first_frame: bool = False):
+    """Drive the ASGI app directly, recording when each body chunk arrives.
+
+    httpx's ASGI transport buffers whole responses, which hides TTFB.
+    """
+    started = time.perf_counter()
+    frames = []
+    first_frame = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if disconnect_after_first_frame:
+            await first_frame.wait()
+            return {"type": "http.disconnect"}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            frames.append((time.perf_counter() - started, message["body"].decode()))
+            first_frame.set()
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    return frames
+
+
+@pytest.fixture
+def streaming_user(monkeypatch):
+    monkeypatch.setattr(ai_service, "cache", AdviceCache())
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=987654, username="streamer", hashed_password="x"
+    )
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.anyio
+async def test_first_token_arrives_before_generation_finishes(streaming_user):
+    state = {}
+    with get_advisor_agent().override(model=slow_streaming_advisor(state)):
+        frames = await _call("/ai/advice/stream?query=Budget%20tips")
+
+    first_at, first = frames[0]
+    assert first_at < THINKING_SECONDS / 2
+    assert json.loads(first.removeprefix("data: ")) == "Spend "
+    body = "".join(frame for _, frame in frames)
+    deltas = [
+        json.loads(line.removeprefix("data: "))
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert "".join(deltas) == "Spend less on food."
+    assert "event: done" in body
+
+    # A finished stream is cached: the repeat comes back in a single frame.
+    frames = await _call("/ai/advice/stream?query=budget%20tips")
+    assert json.loads(frames[0][1].removeprefix("data: ")) == "Spend less on food."
+
+
+@pytest.mark.anyio
+async def test_client_disconnect_cancels_generation(streaming_user):
+    state = {}
+    started = time.perf_counter()
+    with get_advisor_agent().override(model=slow_streaming_advisor(state)):
+        frames = await _call("/ai/advice/stream", disconnect_after_first_frame=True)
+
+    assert time.perf_counter() - started < THINKING_SECONDS
+    assert state == {"started": True, "cancelled": True}
+    assert "event: done" not in "".join(frame for _, frame in frames)
+
+
+@pytest.mark.anyio
+async def test_stream_holds_no_connection(streaming_user):
+    checked_out = []
+
+    async def advise(messages, info):
+        checked_out.append(async_engine.pool.checkedout())
+        yield "Fine."
+
+    with get_advisor_agent().override(model=FunctionModel(stream_function=advise)):
+        await _call("/ai/advice/stream?query=Anything")
+
+    assert checked_out == [0]
+
+
+def counting_streaming_advisor(runs):
+    async def advise(messages, info):
+        runs.append(1)
+        yield "Spend "
+        await asyncio.sleep(0.05)
+        yield "less."
+
+    return FunctionModel(stream_function=advise)
+
+
+async def _collect(service: AIService):
+    return [delta async for delta in service.stream_advice(1, "Tips", "v1")]
+
+
+@pytest.mark.anyio
+async def test_identical_streams_share_one_run():
+    runs = []
+    service = AIService(AdviceCache())
+    with get_advisor_agent().override(model=counting_streaming_advisor(runs)):
+        first, second = await asyncio.gather(_collect(service), _collect(service))
+        advice = await service.get_advice(1, "tips", "v1")
+
+    assert len(runs) == 1
+    assert first == ["Spend ", "less."]
+    assert second == ["Spend less."] and advice == "Spend less."
+
+
+@pytest.mark.anyio
+async def test_waiters_start_over_when_the_stream_is_abandoned():
+    runs = []
+    service = AIService(AdviceCache())
+    with get_advisor_agent().override(model=counting_streaming_advisor(runs)):
+        leader = service.stream_advice(1, "Tips", "v1")
+        assert await leader.__anext__() == "Spend "
+        follower = asyncio.create_task(_collect(service))
+        await asyncio.sleep(0.01)
+        await leader.aclose()
+        assert await follower == ["Spend ", "less."]
+
+    assert len(runs) == 2
@@ -0,0 +1,93 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic_ai.models.test import TestModel
+from sqlmodel import Session
+
+from app.dals.rollups import RollupDal
+from app.dals.transactions import TransactionDal
+from app.models.transaction import Transaction
+from app.services import ai_context
+from app.services.ai_context import (
+    SpendContextCache,
+    build_spend_context,
+    estimate_tokens,
+    fit_to_budget,
+)
+from app.services.ai_service import get_advisor_agent
+
+
+def _spending(seed: int = 3):
+    rng = random.Random(seed)
+    now = datetime.now()
+    return lambda i: {
+        "amount": round(rng.uniform(1, 300), 2),
+        "category": rng.choice(["Food", "Bills", "Travel", "Fun"]),
+        "description": f"Merchant {rng.randrange(50)}",
+        "date": now - timedelta(hours=rng.randrange(24 * 400)),
+    }
+
+
+def test_fit_to_budget_keeps_priority_order():
+    sections = [("A:", ["- a1", "- a2"]), ("B:", ["- b" * 50]), ("C:", ["- c1"])]
+    text = fit_to_budget(sections, budget=8)
+    assert text.startswith("A:\n- a1\n- a2")
+    assert "B:" not in text and "C:\n- c1" in text
+
+
+def test_context_size_is_bounded_by_budget(sqlite_engine, seed_ledger):
+    user_id = seed_ledger(5000, _spending())
+    with Session(sqlite_engine) as session:
+        small = build_spend_context(session, user_id, budget=200)
+        large = build_spend_context(session, user_id, budget=2000)
+
+    assert small.startswith("Overview:\n")
+    assert "5,000 transactions" in small
+    assert estimate_tokens(small) <= 200
+    assert estimate_tokens(large) <= 2000
+    assert "Most recent:" in large and "Top descriptions by spend:" in large
+
+
+def test_context_cache_follows_ledger_changes(sqlite_engine, seed_ledger):
+    user_id = seed_ledger(100, _spending())
+    cache = SpendContextCache(maxsize=4)
+    with Session(sqlite_engine) as session:
+        dal = TransactionDal(session)
+        first = cache.get_or_build(session, user_id)
+        assert cache.get_or_build(session, user_id) == first
+        dal.create(
+            Transaction(amount=1.0, category="Food", description="new", user_id=user_id)
+        )
+        RollupDal(session).rebuild(user_id)
+        session.commit()
+        added = cache.get_or_build(session, user_id)
+
+        # Delete the newest row and insert another: SQLite reuses its id, so
+        # the row count and highest id are back where they were.
+        newest = dal.get_by_id(101, user_id)
+        dal.delete(newest)
+        replacement = Transaction(
+            amount=2.0, category="Fun", description="replacement", user_id=user_id
+        )
+        assert dal.create(replacement).id == newest.id
+        RollupDal(session).rebuild(user_id)
+        session.commit()
+        replaced = cache.get_or_build(session, user_id)
+
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert "101 transactions" in added and "(new)" in added
+    assert "(new)" not in replaced and "(replacement)" in replaced
+
+
+@pytest.mark.anyio
+async def test_advisor_tool_returns_summary(sqlite_engine, seed_ledger, monkeypatch):
+    user_id = seed_ledger(500, _spending())
+    monkeypatch.setattr(ai_context, "engine", sqlite_engine)
+    monkeypatch.setattr(ai_context, "spend_context_cache", SpendContextCache())
+
+    agent = get_advisor_agent()
+    with agent.override(model=TestModel()):
+        result = await agent.run("How am I doing?", deps=user_id)
+
+    assert "500 transactions" in result.data
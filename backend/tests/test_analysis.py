@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+from sqlmodel import Session
+
+from app.core import deps
+from app.core.advice_cache import AdviceCache
+from app.dals.transactions import TransactionDal
+from app.database import async_engine, engine
+from app.main import app
+from app.models.transaction import Transaction
+from app.services.ai_service import ai_service, get_advisor_agent
+
+client = TestClient(app)
+TOKEN = {"X-Refresh-Token": "refresh-secret"}
+
+
+@pytest.fixture
+def analyst(monkeypatch):
+    """Enable the refresh endpoints and count agent runs."""
+    monkeypatch.setattr(deps, "REFRESH_API_TOKEN", TOKEN["X-Refresh-Token"])
+    monkeypatch.setattr(ai_service, "cache", AdviceCache())
+    runs = []
+
+    def analyze(messages, info):
+        runs.append(1)
+        return ModelResponse(parts=[TextPart(f"analysis #{len(runs)}")])
+
+    with get_advisor_agent().override(model=FunctionModel(analyze)):
+        yield runs
+
+
+def _spend(user_id: int):
+    with Session(engine) as session:
+        TransactionDal(session).create(
+            Transaction(
+                amount=12.5,
+                category="Food",
+                description="Lunch",
+                date=datetime.now(),
+                user_id=user_id,
+            )
+        )
+
+
+def test_analyze_requires_the_refresh_token(analyst):
+    assert client.post("/ai/analyze", params={"user_id": 1}).status_code == 401
+    response = client.post(
+        "/ai/analyze", params={"user_id": 1}, headers={"X-Refresh-Token": "wrong"}
+    )
+    assert response.status_code == 401
+
+
+def test_analyze_regenerates_only_after_ledger_changes(analyst, seed_ledger):
+    user_id = seed_ledger(engine=engine)
+
+    def analyze():
+        response = client.post(
+            "/ai/analyze", params={"user_id": user_id}, headers=TOKEN
+        )
+        assert response.status_code == 200
+        return response.json()["status"]
+
+    assert analyze() == "refreshed"
+    assert analyze() == "unchanged"
+    _spend(user_id)
+    assert analyze() == "refreshed"
+    assert len(analyst) == 2
+
+
+def test_batch_reports_status_per_user(analyst, seed_ledger):
+    fresh, known = seed_ledger(engine=engine), seed_ledger(engine=engine)
+    client.post("/ai/analyze", params={"user_id": known}, headers=TOKEN)
+
+    response = client.post(
+        "/ai/analyze/batch", json={"user_ids": [fresh, known, 10**9]}, headers=TOKEN
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"user_id": fresh, "status": "refreshed"},
+        {"user_id": known, "status": "unchanged"},
+        {"user_id": 10**9, "status": "not_found"},
+    ]
+    assert (
+        client.post("/ai/analyze", params={"user_id": 10**9}, headers=TOKEN).status_code
+        == 404
+    )
+
+
+def test_batch_checks_versions_in_one_query(analyst, seed_ledger, max_queries):
+    user_ids = [seed_ledger(engine=engine) for _ in range(5)]
+    batch = {"user_ids": user_ids}
+    client.post("/ai/analyze/batch", json=batch, headers=TOKEN)
+
+    # Stored fingerprints, then every user's ledger version.
+    with max_queries(2):
+        response = client.post("/ai/analyze/batch", json=batch, headers=TOKEN)
+
+    statuses = {result["status"] for result in response.json()["results"]}
+    assert statuses == {"unchanged"}
+
+
+def test_batch_holds_no_connection_while_analyzing(analyst, seed_ledger):
+    checked_out = []
+
+    def analyze(messages, info):
+        checked_out.append(async_engine.pool.checkedout())
+        return ModelResponse(parts=[TextPart("analysis")])
+
+    batch = {"user_ids": [seed_ledger(engine=engine) for _ in range(3)]}
+    with get_advisor_agent().override(model=FunctionModel(analyze)):
+        client.post("/ai/analyze/batch", json=batch, headers=TOKEN)
+
+    assert checked_out == [0, 0, 0]
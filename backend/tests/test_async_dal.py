@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import to_async_url
+from app.schemas.transaction import TransactionRead
+from app.services.transactions import (
+    AsyncTransactionService,
+    TransactionService,
+    transactions_json,
+)
+
+
+def _recent(i):
+    return {"amount": 10 + i, "date": datetime.now() - timedelta(hours=i)}
+
+
+@pytest.mark.anyio
+async def test_async_reads_match_sync_reads(sqlite_engine, stats_cache, seed_ledger):
+    user_id = seed_ledger(5, _recent)
+    with Session(sqlite_engine) as session:
+        service = TransactionService(session, stats_cache)
+        expected_stats = service._compute_dashboard_stats(user_id)
+        page, _ = service.list_user_transactions_page(user_id, 3)
+        expected_page = [t.id for t in page]
+
+    async_engine = create_async_engine(
+        to_async_url(sqlite_engine.url.render_as_string(hide_password=False))
+    )
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            service = AsyncTransactionService(session, stats_cache)
+            assert await service.get_dashboard_stats(user_id) == expected_stats
+
+            rows, cursor = await service.list_user_transactions_page(user_id, 3)
+            assert [t.id for t in rows] == expected_page
+            rest, last_cursor = await service.list_user_transactions_page(
+                user_id, 3, cursor
+            )
+            assert len(rest) == 2 and last_cursor is None
+
+            lines = [
+                line
+                async for chunk in service.stream_user_transactions_ndjson(user_id)
+                for line in chunk.splitlines()
+            ]
+            assert len(lines) == 5
+    finally:
+        await async_engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_row_json_matches_the_response_model(
+    sqlite_engine, stats_cache, seed_ledger
+):
+    user_id = seed_ledger(5, _recent)
+    with Session(sqlite_engine) as session:
+        service = TransactionService(session, stats_cache)
+        page, _ = service.list_user_transactions_page(user_id, 10)
+        expected = [
+            TransactionRead.model_validate(t).model_dump(mode="json") for t in page
+        ]
+
+    async_engine = create_async_engine(
+        to_async_url(sqlite_engine.url.render_as_string(hide_password=False))
+    )
+    try:
+        async with AsyncSession(async_engine) as session:
+            service = AsyncTransactionService(session, stats_cache)
+            rows = await service.list_user_transactions(user_id)
+            lines = [
+                line
+                async for chunk in service.stream_user_transactions_ndjson(user_id)
+                for line in chunk.splitlines()
+            ]
+    finally:
+        await async_engine.dispose()
+
+    assert json.loads(transactions_json(rows)) == expected
+    assert [json.loads(line) for line in lines] == expected
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.auth_cache import UserCache, invalidate_user, revocations, user_cache
+from app.core.deps import get_current_user
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+class _ExplodingSession:
+    async def exec(self, statement):
+        raise AssertionError("get_current_user should not have queried the database")
+
+
+class _OneUserSession:
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+
+    async def exec(self, statement):
+        self.queries += 1
+        user = self.user
+
+        class _Result:
+            def first(self):
+                return user
+
+        return _Result()
+
+
+@pytest.fixture(autouse=True)
+def fresh_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+def test_user_cache_evicts_least_recently_used():
+    cache = UserCache(maxsize=2, ttl=60)
+    for i, name in enumerate(["a", "b"], start=1):
+        cache.put(name, User(id=i, username=name, hashed_password="x"))
+    cache.get("a")
+    cache.put("c", User(id=3, username="c", hashed_password="x"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").id == 1
+    assert cache.hits == 2 and cache.misses == 1
+
+
+def test_user_cache_expires_entries():
+    cache = UserCache(maxsize=10, ttl=0.01)
+    cache.put("a", User(id=1, username="a", hashed_password="x"))
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+@pytest.mark.anyio
+async def test_claims_token_needs_no_database():
+    token = create_access_token("claims_user", claims={"uid": 41, "role": "admin"})
+    user = await get_current_user(token=token, session=_ExplodingSession())
+    assert (user.id, user.username, user.role) == (41, "claims_user", "admin")
+
+
+@pytest.mark.anyio
+async def test_plain_token_hits_database_once_then_cache():
+    session = _OneUserSession(User(id=7, username="plain", hashed_password="x"))
+    token = create_access_token("plain")
+
+    first = await get_current_user(token=token, session=session)
+    second = await get_current_user(token=token, session=session)
+
+    assert first.id == second.id == 7
+    assert session.queries == 1
+
+
+@pytest.mark.anyio
+async def test_revocation_on_another_replica_distrusts_claims_and_cache():
+    claims_token = create_access_token("changed", claims={"uid": 9, "role": "admin"})
+    plain_token = create_access_token("changed")
+    user_cache.put(
+        "changed", User(id=9, username="changed", role="admin", hashed_password="x")
+    )
+    time.sleep(0.01)
+
+    # Another replica demotes the user; this process's cache is untouched.
+    await revocations.revoke("changed")
+    session = _OneUserSession(User(id=9, username="changed", hashed_password="x"))
+
+    from_claims = await get_current_user(token=claims_token, session=session)
+    from_cache = await get_current_user(token=plain_token, session=session)
+
+    assert from_claims.role == from_cache.role == "user"
+    # The first lookup re-read the database and re-cached the demoted user.
+    assert session.queries == 1
+
+
+@pytest.mark.anyio
+async def test_deleted_user_is_rejected_before_the_cache_expires():
+    token = create_access_token("deleted", claims={"uid": 8, "role": "user"})
+    user_cache.put("deleted", User(id=8, username="deleted", hashed_password="x"))
+
+    await invalidate_user("deleted")
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token=token, session=_OneUserSession(None))
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_unknown_user_is_rejected():
+    token = create_access_token("ghost")
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token=token, session=_OneUserSession(None))
+    assert exc.value.status_code == 401
@@ -0,0 +1,76 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import SQLModel
+
+from app.database import DB_POOL_SIZE, SQLITE_PRAGMAS, make_engine
+from app.migrations import run_migrations
+
+# The two tables as the first release created them.
+FIRST_RELEASE_SCHEMA = [
+    "CREATE TABLE user (id INTEGER NOT NULL, username VARCHAR NOT NULL, "
+    "hashed_password VARCHAR NOT NULL, role VARCHAR NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_user_username ON user (username)",
+    'CREATE TABLE "transaction" (id INTEGER NOT NULL, amount FLOAT NOT NULL, '
+    "category VARCHAR NOT NULL, description VARCHAR NOT NULL, "
+    "date DATETIME NOT NULL, user_id INTEGER NOT NULL, PRIMARY KEY (id))",
+    "INSERT INTO user VALUES (1, 'old', 'x', 'user')",
+    "INSERT INTO \"transaction\" VALUES (1, 5.0, 'Food', 'Lunch', "
+    "'2024-01-02 12:00:00.000000', 1)",
+]
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_tuned_profile_applies_pragmas_on_connect(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'tuned.db'}", profile="tuned")
+    try:
+        assert _pragma(engine, "journal_mode") == "wal"
+        assert _pragma(engine, "busy_timeout") == SQLITE_PRAGMAS["busy_timeout"]
+        assert _pragma(engine, "cache_size") == SQLITE_PRAGMAS["cache_size"]
+        assert engine.pool.size() == DB_POOL_SIZE
+    finally:
+        engine.dispose()
+
+
+def test_default_profile_keeps_sqlite_defaults(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'default.db'}", profile="default")
+    try:
+        assert _pragma(engine, "journal_mode") == "delete"
+    finally:
+        engine.dispose()
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (
+            sorted(c["name"] for c in inspector.get_columns(table)),
+            sorted(i["name"] for i in inspector.get_indexes(table)),
+        )
+        for table in inspector.get_table_names()
+    }
+
+
+def test_migrations_bring_an_old_database_to_the_current_schema(tmp_path, monkeypatch):
+    report_dir = tmp_path / "reports"
+    report_dir.mkdir()
+    (report_dir / "Statement_20240102_120000_1.pdf").write_bytes(b"%PDF")
+    monkeypatch.setenv("REPORT_DIR", str(report_dir))
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with old.begin() as conn:
+        for statement in FIRST_RELEASE_SCHEMA:
+            conn.exec_driver_sql(statement)
+
+    for engine in (old, fresh):
+        SQLModel.metadata.create_all(engine)
+        run_migrations(engine)
+
+    assert _schema(old) == _schema(fresh)
+    with old.connect() as conn:
+        rollups = conn.exec_driver_sql("SELECT * FROM transaction_daily_rollup")
+        assert rollups.all() == [(1, "2024-01-02", "Food", 5.0, 1)]
+        reports = conn.exec_driver_sql("SELECT user_id, path, status FROM report")
+        assert reports.all() == [(1, "Statement_20240102_120000_1.pdf", "ready")]
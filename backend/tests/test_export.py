@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlmodel import Session
+
+from app.services.transactions import TransactionService
+
+
+def _export(engine, cache, user_id, fmt, **kwargs):
+    with Session(engine) as session:
+        service = TransactionService(session, cache)
+        return list(service.export_user_transactions(user_id, fmt, **kwargs))
+
+
+def _rising_amounts(i):
+    return {"amount": i, "category": "Food"}
+
+
+def test_csv_export_streams_chunks_in_date_order(
+    sqlite_engine, stats_cache, seed_ledger
+):
+    user_id = seed_ledger(7, _rising_amounts)
+    chunks = _export(sqlite_engine, stats_cache, user_id, "csv", chunk_size=3)
+
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [row["description"] for row in rows] == [f"row {i}" for i in range(7)]
+    assert rows[0]["date"] == "2025-01-01T00:00:00"
+
+
+def test_ndjson_export(sqlite_engine, stats_cache, seed_ledger):
+    user_id = seed_ledger(7, _rising_amounts)
+    body = b"".join(_export(sqlite_engine, stats_cache, user_id, "ndjson"))
+    rows = [json.loads(line) for line in body.splitlines()]
+    assert [row["amount"] for row in rows] == list(range(7))
+    assert list(rows[0]) == ["id", "date", "amount", "category", "description"]
+    assert rows[0]["date"] == "2025-01-01T00:00:00"
+
+
+def test_parquet_export_round_trips(sqlite_engine, stats_cache, seed_ledger):
+    pq = pytest.importorskip("pyarrow.parquet")
+    user_id = seed_ledger(7, _rising_amounts)
+    chunks = _export(sqlite_engine, stats_cache, user_id, "parquet", chunk_size=3)
+    body = b"".join(chunks)
+
+    table = pq.read_table(io.BytesIO(body))
+    assert table.num_rows == 7
+    assert pq.ParquetFile(io.BytesIO(body)).num_row_groups == 3
+    assert table.column("description").to_pylist()[-1] == "row 6"
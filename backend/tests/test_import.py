@@ -0,0 +1,56 @@
+import io
+
+from sqlmodel import Session, select
+
+from app.dals.rollups import RollupDal
+from app.models.transaction import Transaction
+from app.services.imports import iter_rows
+from app.services.transactions import TransactionService
+
+CSV_LEDGER = b"""amount,category,description,date
+12.50,Food,Lunch,2025-03-01
+oops,Food,Broken amount,2025-03-02
+40,Travel,Train,2025-03-03T08:30:00
+7,,No category,2025-03-04
+3.20,Food,Coffee,not-a-date
+"""
+
+
+def test_csv_import_reports_bad_rows_and_keeps_good_ones(
+    sqlite_engine, stats_cache, seed_ledger
+):
+    user_id = seed_ledger()
+    with Session(sqlite_engine) as session:
+        service = TransactionService(session, stats_cache)
+        result = service.import_transactions(
+            iter_rows(io.BytesIO(CSV_LEDGER), "csv"), user_id, batch_size=1
+        )
+
+        assert result.imported == 2
+        assert result.failed == 3
+        assert [(e.line, e.error) for e in result.errors] == [
+            (3, "amount must be a number"),
+            (5, "missing field 'category'"),
+            (6, "invalid date 'not-a-date'"),
+        ]
+        amounts = select(Transaction.amount).where(Transaction.user_id == user_id)
+        assert sorted(session.exec(amounts)) == [12.5, 40.0]
+        assert RollupDal(session).verify(user_id) == []
+
+
+def test_ndjson_import_reports_invalid_json(sqlite_engine, stats_cache, seed_ledger):
+    ledger = (
+        b'{"amount": 5, "category": "Fun", "description": "Movie", '
+        b'"date": "2025-04-01"}\n'
+        b"\n"
+        b"{not json\n"
+        b"[1, 2]\n"
+    )
+    user_id = seed_ledger()
+    with Session(sqlite_engine) as session:
+        result = TransactionService(session, stats_cache).import_transactions(
+            iter_rows(io.BytesIO(ledger), "ndjson"), user_id
+        )
+
+    assert result.imported == 1
+    assert [e.line for e in result.errors] == [3, 4]
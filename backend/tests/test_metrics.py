@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.metrics import current_route, instrument_dal
+from app.main import app
+
+client = TestClient(app)
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template(isolated_auth_header):
+    labels = {"method": "PUT", "route": "/transactions/{transaction_id}"}
+    before = _sample(
+        "spendwise_http_request_duration_seconds_count", status="404", **labels
+    )
+
+    for transaction_id in (10**9, 10**9 + 1):
+        response = client.put(
+            f"/transactions/{transaction_id}",
+            json={"amount": 1},
+            headers=isolated_auth_header,
+        )
+        assert response.status_code == 404
+
+    after = _sample(
+        "spendwise_http_request_duration_seconds_count", status="404", **labels
+    )
+    assert after - before == 2
+    assert (
+        "spendwise_http_request_duration_seconds_bucket" in client.get("/metrics/").text
+    )
+
+
+def test_unknown_paths_share_one_label():
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = _sample("spendwise_http_request_duration_seconds_count", **labels)
+
+    for path in ("/no/such/route", "/another/missing/path"):
+        assert client.get(path).status_code == 404
+
+    assert (
+        _sample("spendwise_http_request_duration_seconds_count", **labels) == before + 2
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        # async engine, in the request task
+        "/transactions?limit=5",
+        # sync engine, in the threadpool, streamed
+        "/transactions/export",
+    ],
+)
+def test_queries_are_attributed_to_their_route(isolated_auth_header, path):
+    route = path.split("?")[0]
+    before = _sample(
+        "spendwise_db_query_duration_seconds_count", operation="SELECT", route=route
+    )
+
+    response = client.get(path, headers=isolated_auth_header)
+
+    assert response.status_code == 200
+    assert (
+        _sample(
+            "spendwise_db_query_duration_seconds_count",
+            operation="SELECT",
+            route=route,
+        )
+        > before
+    )
+
+
+def test_dal_calls_are_timed_per_route(isolated_auth_header):
+    labels = {"route": "/transactions", "call": "AsyncTransactionDal.get_rows_by_user"}
+    before = _sample("spendwise_dal_call_duration_seconds_count", **labels)
+
+    client.get("/transactions?limit=5", headers=isolated_auth_header)
+
+    assert _sample("spendwise_dal_call_duration_seconds_count", **labels) == before + 1
+
+
+def test_instrument_dal_outside_a_request():
+    @instrument_dal
+    class ProbeDal:
+        def get(self):
+            return current_route()
+
+        def iter_rows(self):
+            yield 1
+
+    assert ProbeDal().get() == "-"
+    assert list(ProbeDal().iter_rows()) == [1]
+    assert (
+        _sample(
+            "spendwise_dal_call_duration_seconds_count", route="-", call="ProbeDal.get"
+        )
+        == 1
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "spendwise_dal_call_duration_seconds_count",
+            {"route": "-", "call": "ProbeDal.iter_rows"},
+        )
+        is None
+    )
@@ -0,0 +1,97 @@
+import os
+import signal
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlmodel import Session, select
+
+from app.core.passwords import (
+    BCRYPT_ROUNDS,
+    PasswordHasherPool,
+    PasswordHashingBusy,
+    verify_and_update,
+)
+from app.database import async_engine, engine
+from app.main import app
+from app.models.user import User
+from app.routes import auth
+
+
+def test_verify_and_update_rehashes_other_costs():
+    cheap = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+    old_hash = cheap.hash("hunter2")
+
+    valid, new_hash = verify_and_update("hunter2", old_hash)
+
+    assert valid
+    assert new_hash is not None and f"${BCRYPT_ROUNDS:02d}$" in new_hash
+    assert verify_and_update("hunter2", new_hash) == (True, None)
+    assert verify_and_update("wrong", old_hash) == (False, None)
+
+
+@pytest.mark.anyio
+async def test_pool_hashes_off_the_loop():
+    pool = PasswordHasherPool(workers=1, max_pending=2)
+    try:
+        hashed = await pool.hash("hunter2")
+        assert await pool.verify_and_update("hunter2", hashed) == (True, None)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_pool_recovers_from_a_killed_worker():
+    pool = PasswordHasherPool(workers=1, max_pending=2)
+    try:
+        hashed = await pool.hash("hunter2")
+        os.kill(await pool._run(os.getpid), signal.SIGKILL)
+
+        assert await pool.verify_and_update("hunter2", hashed) == (True, None)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_pool_rejects_when_saturated():
+    pool = PasswordHasherPool(workers=1, max_pending=0)
+    with pytest.raises(PasswordHashingBusy):
+        await pool.hash("hunter2")
+    assert pool._executor is None
+
+
+class _RecordingHasher:
+    """Hashes in process at a cheap cost, noting connections held meanwhile."""
+
+    def __init__(self):
+        self.cheap = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+        self.checked_out = []
+
+    async def hash(self, password):
+        self.checked_out.append(async_engine.pool.checkedout())
+        return self.cheap.hash(password)
+
+    async def verify_and_update(self, password, hashed):
+        self.checked_out.append(async_engine.pool.checkedout())
+        return verify_and_update(password, hashed)
+
+
+def test_auth_hashes_without_holding_a_connection(monkeypatch):
+    hasher = _RecordingHasher()
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+    client = TestClient(app)
+    credentials = {"username": f"hashed_{uuid.uuid4().hex}", "password": "hunter2"}
+
+    assert client.post("/auth/register", json=credentials).status_code == 200
+    assert client.post("/auth/token", data=credentials).status_code == 200
+
+    assert hasher.checked_out == [0, 0]
+    # The cheap hash was upgraded to BCRYPT_ROUNDS on login.
+    with Session(engine) as session:
+        statement = select(User.hashed_password).where(
+            User.username == credentials["username"]
+        )
+        assert f"${BCRYPT_ROUNDS:02d}$" in session.exec(statement).one()
@@ -0,0 +1,109 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.core import metrics
+from app.core.metrics import check_query_budget, instrument_queries, track_queries
+from app.main import app
+
+client = TestClient(app)
+
+
+def _create(isolated_auth_header) -> int:
+    response = client.post(
+        "/transactions",
+        json={
+            "amount": 12.5,
+            "category": "Food",
+            "description": "Lunch",
+            "date": "2026-03-02T12:00:00",
+        },
+        headers=isolated_auth_header,
+    )
+    return response.json()["id"]
+
+
+def test_endpoint_query_budgets(isolated_auth_header, max_queries):
+    # Rollup upsert, ledger version bump, insert, refresh.
+    with max_queries(4):
+        transaction_id = _create(isolated_auth_header)
+
+    with max_queries(1):
+        client.get("/transactions/stats/detailed", headers=isolated_auth_header)
+        client.get("/transactions?limit=20", headers=isolated_auth_header)
+        client.get("/transactions/export", headers=isolated_auth_header)
+        client.get("/transactions/report/list", headers=isolated_auth_header)
+
+    # Lookup, rollup upsert (plus cleanup on delete), ledger version bump,
+    # write, refresh on update.
+    with max_queries(5):
+        client.put(
+            f"/transactions/{transaction_id}",
+            json={"amount": 20},
+            headers=isolated_auth_header,
+        )
+        client.delete(f"/transactions/{transaction_id}", headers=isolated_auth_header)
+
+
+def test_import_writes_rollups_in_one_statement(isolated_auth_header, max_queries):
+    lines = [
+        f"2026-{month:02d}-{day:02d},{day},Cat{day % 4},Row"
+        for month in range(1, 7)
+        for day in range(1, 29)
+    ]
+    csv = "date,amount,category,description\n" + "\n".join(lines)
+
+    # Ledger version bump, row insert, rollup upsert.
+    with max_queries(3) as served:
+        response = client.post(
+            "/transactions/import",
+            files={"file": ("ledger.csv", csv, "text/csv")},
+            headers=isolated_auth_header,
+        )
+
+    assert response.json()["imported"] == len(lines)
+    [(_, _, queries)] = served
+    assert queries.most_repeated()[1] == 1
+
+
+def test_max_queries_fails_requests_over_budget(isolated_auth_header, max_queries):
+    with pytest.raises(AssertionError, match="over the budget of 0"):
+        with max_queries(0):
+            _create(isolated_auth_header)
+
+
+def test_over_budget_requests_are_logged(isolated_auth_header, monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "QUERY_BUDGET", 2)
+    labels = {"route": "/transactions", "reason": "budget"}
+    before = (
+        REGISTRY.get_sample_value("spendwise_query_budget_exceeded_total", labels) or 0
+    )
+
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        _create(isolated_auth_header)
+
+    assert "POST /transactions ran 4 SQL statements (budget 2)" in caplog.text
+    assert "INSERT INTO transaction_daily_rollup" in caplog.text
+    after = REGISTRY.get_sample_value("spendwise_query_budget_exceeded_total", labels)
+    assert after == before + 1
+
+
+def test_repeated_statements_are_flagged(sqlite_engine, caplog):
+    instrument_queries(sqlite_engine)
+
+    with track_queries() as outer:
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with track_queries() as inner:
+                for user_id in range(8):
+                    conn.execute(text("SELECT :id"), {"id": user_id})
+
+    assert (outer.count, inner.count) == (9, 8)
+    assert inner.most_repeated() == ("SELECT ?", 8)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        check_query_budget("GET", "/probe", inner)
+    assert "GET /probe ran one statement 8 times, likely an N+1" in caplog.text
@@ -0,0 +1,107 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.dals.reports import page_statement
+from app.dals.rollups import RollupDal
+from app.dals.transactions import TransactionDal
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.exports import EXPORT_COLUMNS
+
+# "SCAN transaction" (or "SCAN TABLE transaction" on older SQLite) means the
+# planner walks the whole table or a whole index instead of seeking on user_id.
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\"?(transaction|transaction_daily_rollup)\"?\b")
+
+
+@pytest.fixture
+def plan_engine(sqlite_engine):
+    engine = sqlite_engine
+    with Session(engine) as session:
+        for username in ("alice", "bob"):
+            session.add(User(username=username, hashed_password="x"))
+        session.commit()
+        start = datetime(2025, 1, 1)
+        session.add_all(
+            Transaction(
+                amount=float(i),
+                category=["Food", "Bills", "Travel"][i % 3],
+                description=f"row {i}",
+                date=start + timedelta(hours=i),
+                user_id=1 + i % 2,
+            )
+            for i in range(200)
+        )
+        session.commit()
+        RollupDal(session).rebuild()
+        session.commit()
+    return engine
+
+
+def _capture_selects(engine, calls):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as session:
+            for call in calls:
+                call(TransactionDal(session), RollupDal(session))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_dal_queries_never_scan_transaction_table(plan_engine):
+    since = datetime(2025, 1, 3)
+    calls = [
+        lambda dal, _: dal.get_by_id(5, 1),
+        lambda dal, _: dal.get_top_descriptions(1),
+        lambda dal, _: dal.get_largest_since(1, since),
+        lambda dal, _: dal.get_page_by_user(1, 10),
+        lambda dal, _: dal.get_page_by_user(1, 10, (since, 40)),
+        lambda dal, _: list(dal.iter_row_chunks(1, EXPORT_COLUMNS, chunk_size=50)),
+        lambda dal, _: dal.get_row_page(
+            1, EXPORT_COLUMNS, 10, (since, 40), since, since + timedelta(days=5)
+        ),
+        lambda _, rollups: rollups.get_total_since(1, since.date()),
+        lambda _, rollups: rollups.get_category_breakdown(1),
+        lambda _, rollups: rollups.get_category_totals(
+            1, since.date(), since.date() + timedelta(days=5)
+        ),
+        lambda _, rollups: rollups.get_daily_spending(1, since.date()),
+        lambda _, rollups: rollups.get_monthly_totals(1, since.date()),
+        lambda _, rollups: rollups.get_day_span(1),
+        lambda _, rollups: rollups.get_dashboard_summary(
+            1, since.date(), since.date() - timedelta(days=31), since.date()
+        ),
+    ]
+    statements = _capture_selects(plan_engine, calls)
+    assert len(statements) == len(calls)
+
+    with plan_engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).all()
+            scans = [row[-1] for row in plan if FULL_SCAN.match(row[-1])]
+            assert not scans, f"full scan in plan for:\n{statement}\n{plan}"
+
+
+def test_report_listing_seeks_without_sorting(sqlite_engine):
+    statements = [page_statement(1, 50), page_statement(1, 50, before=10)]
+    with sqlite_engine.connect() as conn:
+        for statement in statements:
+            sql = statement.compile(
+                sqlite_engine, compile_kwargs={"literal_binds": True}
+            )
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+            plan = [row[-1] for row in rows]
+            assert any("ix_report_user_status" in step for step in plan), plan
+            assert not any("TEMP B-TREE" in step for step in plan), plan
@@ -1,5 +1,10 @@
 import pytest
 import asyncio
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from app.models.user import User
+from scripts import refresh
 from scripts.refresh import refresh_user_analysis
 import redis.asyncio as redis
 
@@ -20,3 +25,36 @@ async def test_refresh_idempotency():
 
     await r.delete(f"refresh_lock:user:{user_id}")
     await r.aclose()
+
+
+@pytest.mark.anyio
+async def test_post_with_backoff_retries_server_errors(monkeypatch):
+    monkeypatch.setattr(refresh, "REFRESH_BACKOFF_SECONDS", 0)
+    statuses = iter([503, 429, 200])
+
+    def handler(request):
+        return httpx.Response(next(statuses), headers={"Retry-After": "0"})
+
+    async with httpx.AsyncClient(
+        base_url="http://api", transport=httpx.MockTransport(handler)
+    ) as client:
+        response = await refresh.post_with_backoff(client, "/ai/analyze")
+        assert response.status_code == 200
+
+        statuses = iter([500] * 3)
+        assert await refresh.post_with_backoff(client, "/ai/analyze") is None
+
+
+@pytest.mark.anyio
+async def test_user_id_pages_cover_every_user(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        session.add_all(User(username=f"u{i}", hashed_password="x") for i in range(7))
+        session.commit()
+    url = sqlite_engine.url.render_as_string().replace("sqlite", "sqlite+aiosqlite")
+    bind = create_async_engine(url)
+
+    pages = [page async for page in refresh.user_id_pages(3, bind)]
+    await bind.dispose()
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == list(range(1, 8))
@@ -0,0 +1,251 @@
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlmodel import Session
+
+from app import worker
+from app.dals.reports import ReportDal
+from app.dals.transactions import TransactionDal
+from app.models.report import Report
+from app.models.transaction import Transaction
+from app.services.transactions import TransactionService
+from app.worker import generate_monthly_report, render_report, report_window
+
+
+def _jobs(outcome: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "spendwise_worker_job_duration_seconds_count", {"outcome": outcome}
+        )
+        or 0.0
+    )
+
+
+def test_report_window():
+    now = datetime(2025, 12, 15)
+    assert report_window("all", now) == (None, None)
+    assert report_window("month", now) == (date(2025, 12, 1), date(2026, 1, 1))
+    assert report_window("2025-02", now) == (date(2025, 2, 1), date(2025, 3, 1))
+
+
+def test_render_report_streams_ledger(sqlite_engine, seed_ledger, tmp_path):
+    user_id = seed_ledger(400)
+
+    full = render_report(user_id, "all", None, str(tmp_path / "full"), sqlite_engine)
+    capped = render_report(user_id, "all", 20, str(tmp_path / "capped"), sqlite_engine)
+    january = render_report(
+        user_id, "2025-01", None, str(tmp_path / "month"), sqlite_engine
+    )
+
+    sizes = {}
+    for name, path in (("full", full), ("capped", capped), ("month", january)):
+        with open(path, "rb") as handle:
+            content = handle.read()
+        assert content.startswith(b"%PDF")
+        sizes[name] = len(content)
+    assert sizes["capped"] < sizes["month"] < sizes["full"]
+
+
+def test_ledger_is_read_in_short_sessions(sqlite_engine, seed_ledger, monkeypatch):
+    user_id = seed_ledger(25)
+    monkeypatch.setattr(worker, "LEDGER_CHUNK_SIZE", 10)
+
+    held, rows = [], []
+    for chunk in worker.ledger_chunks(sqlite_engine, user_id, None, None, 22):
+        held.append(sqlite_engine.pool.checkedout())
+        rows.extend(chunk)
+
+    assert held == [0, 0, 0]
+    assert [row[-1] for row in rows] == list(range(25, 3, -1))
+
+
+@pytest.mark.anyio
+async def test_report_job_renders_in_executor(
+    sqlite_engine, seed_ledger, tmp_path, monkeypatch
+):
+    user_id = seed_ledger(50)
+    monkeypatch.setattr(worker, "engine", sqlite_engine)
+    monkeypatch.setattr(worker, "REPORT_DIR", str(tmp_path))
+
+    # A thread pool stands in for the process pool so the patched engine is seen.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        ctx = {"render_pool": pool, "enqueue_time": datetime.now(timezone.utc)}
+        result = await generate_monthly_report(ctx, user_id)
+
+    assert result["path"].startswith(str(tmp_path))
+    assert result["render_seconds"] >= 0 and result["queued_seconds"] >= 0
+
+
+@pytest.mark.anyio
+async def test_worker_startup_creates_render_pool():
+    ctx = {}
+    await worker.startup(ctx)
+    assert isinstance(ctx["render_pool"], ProcessPoolExecutor)
+    await worker.shutdown(ctx)
+
+
+@pytest.mark.anyio
+async def test_report_job_replaces_a_broken_render_pool(
+    sqlite_engine, seed_ledger, tmp_path, monkeypatch
+):
+    user_id = seed_ledger(20)
+    monkeypatch.setattr(worker, "engine", sqlite_engine)
+    monkeypatch.setattr(worker, "REPORT_DIR", str(tmp_path))
+    ctx = {}
+    await worker.startup(ctx)
+    broken = ctx["render_pool"]
+    os.kill(broken.submit(os.getpid).result(), signal.SIGKILL)
+
+    # The replacement is a thread pool so the patched engine is seen.
+    replacement = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(worker, "new_render_pool", lambda: replacement)
+    try:
+        result = await generate_monthly_report(ctx, user_id)
+    finally:
+        await worker.shutdown(ctx)
+
+    assert ctx["render_pool"] is replacement
+    assert not result["reused"] and os.path.exists(result["path"])
+
+
+@pytest.mark.anyio
+async def test_unchanged_ledger_reuses_report(
+    sqlite_engine, seed_ledger, tmp_path, monkeypatch
+):
+    user_id = seed_ledger(30)
+    monkeypatch.setattr(worker, "engine", sqlite_engine)
+    monkeypatch.setattr(worker, "REPORT_DIR", str(tmp_path))
+    before = {outcome: _jobs(outcome) for outcome in ("rendered", "reused")}
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        ctx = {"render_pool": pool}
+        first = await generate_monthly_report(ctx, user_id)
+        again = await generate_monthly_report(ctx, user_id)
+
+        with Session(sqlite_engine) as session:
+            transaction = session.get(Transaction, 1)
+            transaction.amount = 99.0
+            TransactionDal(session).update(transaction)
+        changed = await generate_monthly_report(ctx, user_id)
+
+    assert not first["reused"]
+    assert first["path"].startswith(str(tmp_path / worker.report_subdir(user_id)))
+    assert again["reused"] and again["path"] == first["path"]
+    assert not changed["reused"]
+    assert _jobs("rendered") - before["rendered"] == 2
+    assert _jobs("reused") - before["reused"] == 1
+
+
+@pytest.mark.anyio
+async def test_delete_then_insert_renders_again(
+    sqlite_engine, seed_ledger, stats_cache, tmp_path, monkeypatch
+):
+    user_id = seed_ledger(2)
+    monkeypatch.setattr(worker, "engine", sqlite_engine)
+    monkeypatch.setattr(worker, "REPORT_DIR", str(tmp_path))
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        ctx = {"render_pool": pool}
+        first = await generate_monthly_report(ctx, user_id)
+
+        # SQLite hands the deleted row's id to the next insert: same max(id),
+        # same count, yet a different ledger.
+        with Session(sqlite_engine) as session:
+            service = TransactionService(session, stats_cache)
+            assert service.delete_user_transaction(2, user_id)
+            transaction = Transaction(
+                amount=500.0,
+                category="Travel",
+                description="replacement",
+                date=datetime(2025, 3, 1),
+                user_id=user_id,
+            )
+            assert TransactionDal(session).create(transaction).id == 2
+        after = await generate_monthly_report(ctx, user_id)
+
+    assert not first["reused"] and not after["reused"]
+    assert after["path"] != first["path"]
+
+
+def test_finish_report_evicts_beyond_retention(
+    sqlite_engine, seed_ledger, tmp_path, monkeypatch
+):
+    user_id = seed_ledger(1)
+    monkeypatch.setattr(worker, "engine", sqlite_engine)
+    monkeypatch.setattr(worker, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(worker, "REPORT_RETENTION_PER_USER", 2)
+
+    paths = []
+    for i in range(3):
+        report_id, path = worker.start_report(user_id, f"fp{i}")
+        partial = path + worker.PARTIAL_SUFFIX
+        os.makedirs(os.path.dirname(partial), exist_ok=True)
+        with open(partial, "wb") as handle:
+            handle.write(b"%PDF")
+        removed = worker.finish_report(report_id, partial)
+        assert os.path.exists(path) and not os.path.exists(partial)
+        paths.append(path)
+
+    assert str(report_id) in os.path.basename(paths[-1])
+    assert removed == [paths[0]]
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) and os.path.exists(paths[2])
+
+
+def test_abandoned_renders_fail_and_are_pruned(
+    sqlite_engine, seed_ledger, tmp_path, monkeypatch
+):
+    user_id = seed_ledger(1)
+    monkeypatch.setattr(worker, "engine", sqlite_engine)
+    monkeypatch.setattr(worker, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(worker, "REPORT_RETENTION_PER_USER", 1)
+
+    # A worker that died mid-render, longer ago than the job timeout.
+    crashed_id, crashed_path = worker.start_report(user_id, "crashed")
+    os.makedirs(os.path.dirname(crashed_path), exist_ok=True)
+    with open(crashed_path + worker.PARTIAL_SUFFIX, "wb") as handle:
+        handle.write(b"%PDF")
+    with Session(sqlite_engine) as session:
+        reports = ReportDal(session)
+        crashed = reports.get(crashed_id)
+        crashed.created_at -= timedelta(seconds=worker.WORKER_JOB_TIMEOUT + 1)
+        reports.update(crashed)
+    running_id, _ = worker.start_report(user_id, "running")
+
+    report_id, path = worker.start_report(user_id, "done")
+    with open(path + worker.PARTIAL_SUFFIX, "wb") as handle:
+        handle.write(b"%PDF")
+    worker.finish_report(report_id, path + worker.PARTIAL_SUFFIX)
+
+    with Session(sqlite_engine) as session:
+        reports = ReportDal(session)
+        assert reports.get(crashed_id) is None
+        assert reports.get(running_id).status == "rendering"
+    assert not os.path.exists(crashed_path + worker.PARTIAL_SUFFIX)
+
+
+def test_report_catalog_pages_ready_reports(sqlite_engine, seed_ledger):
+    user_id = seed_ledger(1)
+    with Session(sqlite_engine) as session:
+        reports = ReportDal(session)
+        for i in range(5):
+            reports.create(
+                Report(
+                    user_id=user_id,
+                    filename=f"s{i}.pdf",
+                    path=f"{user_id:02d}/{user_id}/s{i}.pdf",
+                    fingerprint="",
+                    status="rendering" if i == 4 else "ready",
+                )
+            )
+        first = reports.get_page_by_user(user_id, 2)
+        second = reports.get_page_by_user(user_id, 2, first[-1].id)
+        third = reports.get_page_by_user(user_id, 2, second[-1].id)
+
+    names = [r.filename for r in first + second]
+    assert names == ["s3.pdf", "s2.pdf", "s1.pdf", "s0.pdf"]
+    assert third == []
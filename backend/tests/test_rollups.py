@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlmodel import Session, delete
+
+from app.dals.rollups import RollupDal
+from app.models.rollup import TransactionDailyRollup
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.transactions import TransactionService
+
+
+def test_write_paths_keep_rollups_consistent(sqlite_engine, stats_cache, seed_ledger):
+    now = datetime.now().replace(microsecond=0)
+    user_id = seed_ledger()
+    with Session(sqlite_engine) as session:
+        service = TransactionService(session, stats_cache)
+
+        lunch = service.create_user_transaction(
+            TransactionCreate(
+                amount=20, category="Food", description="Lunch", date=now
+            ),
+            user_id,
+        )
+        rent = service.create_user_transaction(
+            TransactionCreate(
+                amount=900, category="Bills", description="Rent", date=now
+            ),
+            user_id,
+        )
+        service.update_user_transaction(
+            lunch.id, TransactionUpdate(amount=35, category="Dining"), user_id
+        )
+        service.delete_user_transaction(rent.id, user_id)
+
+        assert RollupDal(session).verify(user_id) == []
+        stats = service.get_dashboard_stats(user_id)
+
+    assert stats["monthly_burn"] == 35
+    assert stats["categories"] == [{"name": "Dining", "value": 35.0}]
+    assert stats["history"] == [{"date": str(now.date()), "amount": 35.0}]
+
+
+def test_rebuild_repairs_drifted_rollups(sqlite_engine, stats_cache, seed_ledger):
+    user_id = seed_ledger()
+    with Session(sqlite_engine) as session:
+        TransactionService(session, stats_cache).create_user_transaction(
+            TransactionCreate(
+                amount=12, category="Food", description="Snack", date=datetime.now()
+            ),
+            user_id,
+        )
+        session.exec(delete(TransactionDailyRollup))
+        session.commit()
+
+        dal = RollupDal(session)
+        assert [row[0] for row in dal.verify(user_id)] == ["missing"]
+
+        assert dal.rebuild(user_id) == 1
+        session.commit()
+        assert dal.verify(user_id) == []
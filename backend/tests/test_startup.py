@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.core import security
+
+BACKEND = Path(__file__).resolve().parents[1]
+# Loaded on first use only (see benchmarks.bench_startup).
+LAZY_MODULES = ("pydantic_ai", "openai", "fpdf", "passlib")
+
+
+def _fresh_python(code: str, tmp_path) -> str:
+    """Run `code` in a new interpreter without any secrets; return its stdout."""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("JWT_SECRET_KEY", "OPENAI_API_KEY", "ASYNC_DATABASE_URL")
+    }
+    env["DATABASE_URL"] = f"sqlite:///{tmp_path / 'startup.db'}"
+    env["REPORT_DIR"] = str(tmp_path / "reports")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+@pytest.mark.parametrize("module", ["app.main", "app.worker", "app.cli"])
+def test_startup_defers_heavy_imports(module, tmp_path):
+    out = _fresh_python(
+        f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))",
+        tmp_path,
+    )
+    modules = set(json.loads(out))
+
+    assert [name for name in LAZY_MODULES if name in modules] == []
+    if module == "app.worker":
+        assert "fastapi" not in modules
+
+
+def test_advisor_is_built_on_first_use(tmp_path):
+    out = _fresh_python(
+        "import sys\n"
+        "from app.services import ai_service\n"
+        "assert 'pydantic_ai' not in sys.modules\n"
+        "agent = ai_service.get_advisor_agent()\n"
+        "assert agent is ai_service.get_advisor_agent()\n"
+        "print(sorted(agent._function_tools))\n",
+        tmp_path,
+    )
+    assert out.strip() == "['get_spend_history']"
+
+
+def test_missing_secret_key_fails_on_use(monkeypatch):
+    monkeypatch.delenv("JWT_SECRET_KEY", raising=False)
+    with pytest.raises(ValueError, match="JWT_SECRET_KEY"):
+        security.create_access_token("someone")
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models.user import User
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.transactions import TransactionService
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def _lunch(amount):
+    return TransactionCreate(
+        amount=amount, category="Food", description="Lunch", date=datetime.now()
+    )
+
+
+def test_repeated_dashboard_loads_skip_the_database(sqlite_engine, stats_cache):
+    with Session(sqlite_engine) as session:
+        user = User(username="cached", hashed_password="x")
+        session.add(user)
+        session.commit()
+        service = TransactionService(session, stats_cache)
+        service.create_user_transaction(_lunch(10), user.id)
+
+        first = service.get_dashboard_stats(user.id)
+        statements = _count_statements(sqlite_engine)
+        second = service.get_dashboard_stats(user.id)
+
+    assert second == first
+    assert statements == []
+    assert (stats_cache.hits, stats_cache.misses) == (1, 1)
+
+
+def test_writes_invalidate_cached_stats(sqlite_engine, stats_cache):
+    with Session(sqlite_engine) as session:
+        user = User(username="invalidated", hashed_password="x")
+        session.add(user)
+        session.commit()
+        service = TransactionService(session, stats_cache)
+
+        created = service.create_user_transaction(_lunch(10), user.id)
+        assert service.get_dashboard_stats(user.id)["monthly_burn"] == 10
+
+        service.update_user_transaction(
+            created.id, TransactionUpdate(amount=25), user.id
+        )
+        assert service.get_dashboard_stats(user.id)["monthly_burn"] == 25
+
+        service.delete_user_transaction(created.id, user.id)
+        assert service.get_dashboard_stats(user.id)["monthly_burn"] == 0
+
+
+def test_stats_computed_across_a_write_are_not_served(sqlite_engine, stats_cache):
+    with Session(sqlite_engine) as session:
+        user = User(username="interleaved", hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+        service = TransactionService(session, stats_cache)
+        service.create_user_transaction(_lunch(10), user_id)
+        compute = service._compute_dashboard_stats
+
+        def compute_then_write(user_id):
+            # Another request writes after the stats were read, before they are set.
+            stats = compute(user_id)
+            with Session(sqlite_engine) as other:
+                writer = TransactionService(other, stats_cache)
+                writer.create_user_transaction(_lunch(25), user_id)
+            return stats
+
+        service._compute_dashboard_stats = compute_then_write
+        assert service.get_dashboard_stats(user_id)["monthly_burn"] == 10
+
+        service._compute_dashboard_stats = compute
+        assert service.get_dashboard_stats(user_id)["monthly_burn"] == 35
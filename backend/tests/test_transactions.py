@@ -1,3 +1,4 @@
+import json
 import pytest
 import time
 from fastapi.testclient import TestClient
@@ -62,6 +63,73 @@ def test_get_transactions(auth_header):
     assert isinstance(response.json(), list)
 
 
+def test_list_transactions_keyset_pages(isolated_auth_header):
+    for day in range(1, 6):
+        client.post(
+            "/transactions",
+            json={
+                "amount": day,
+                "category": "Food",
+                "description": f"Lunch {day}",
+                "date": f"2025-11-0{day}",
+            },
+            headers=isolated_auth_header,
+        )
+
+    first = client.get("/transactions?limit=3", headers=isolated_auth_header)
+    assert first.status_code == 200
+    assert [t["amount"] for t in first.json()] == [5, 4, 3]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(
+        f"/transactions?limit=3&cursor={cursor}", headers=isolated_auth_header
+    )
+    assert [t["amount"] for t in second.json()] == [2, 1]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_list_transactions_rejects_bad_cursor(auth_header):
+    response = client.get("/transactions?limit=3&cursor=garbage", headers=auth_header)
+    assert response.status_code == 400
+
+
+def test_list_transactions_ndjson_stream(isolated_auth_header):
+    client.post(
+        "/transactions",
+        json={
+            "amount": 9.99,
+            "category": "Subscriptions",
+            "description": "Music",
+            "date": "2025-12-01",
+        },
+        headers=isolated_auth_header,
+    )
+    response = client.get("/transactions?format=ndjson", headers=isolated_auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["description"] == "Music"
+
+
+def test_import_transactions_csv_upload(isolated_auth_header):
+    ledger = (
+        "amount,category,description,date\n"
+        "10,Food,Groceries,2025-10-01\n"
+        "abc,Food,Bad row,2025-10-02\n"
+    )
+    response = client.post(
+        "/transactions/import",
+        files={"file": ("ledger.csv", ledger, "text/csv")},
+        headers=isolated_auth_header,
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    assert response.json()["failed"] == 1
+
+    rows = client.get("/transactions", headers=isolated_auth_header).json()
+    assert [t["description"] for t in rows] == ["Groceries"]
+
+
 def test_get_detailed_stats(auth_header):
     client.post(
         "/transactions",
@@ -89,3 +157,23 @@ def test_unauthorized_access():
 def test_generate_report_request(auth_header):
     response = client.post("/transactions/report", headers=auth_header)
     assert response.status_code == 200
+
+
+def test_report_requests_coalesce_per_user(isolated_auth_header):
+    # Context-managed so both requests share the lifespan's arq pool.
+    with TestClient(app) as live_client:
+        first = live_client.post("/transactions/report", headers=isolated_auth_header)
+        second = live_client.post("/transactions/report", headers=isolated_auth_header)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["job_id"] == second.json()["job_id"]
+    assert second.json()["status"] in ("queued", "in_progress", "deferred")
+
+
+def test_list_reports_is_paginated(isolated_auth_header):
+    response = client.get(
+        "/transactions/report/list", params={"limit": 5}, headers=isolated_auth_header
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
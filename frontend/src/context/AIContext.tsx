@@ -32,12 +32,47 @@ export const AIProvider: React.FC<{ children: React.ReactNode }> = ({ children }
     abortControllerRef.current = controller;
 
     try {
-      const response = await apiClient.get('/ai/advice', {
-        params: { query: finalQuery },
+      // axios can't read a streaming body in the browser, so use fetch for SSE.
+      const url = new URL('/ai/advice/stream', apiClient.defaults.baseURL);
+      url.searchParams.set('query', finalQuery);
+      const token = localStorage.getItem('token');
+      const response = await fetch(url, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
         signal: controller.signal,
       });
+      if (response.status === 401) {
+        localStorage.removeItem('token');
+        window.location.href = '/login';
+        return;
+      }
+      if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
 
-      setAdvice(response.data.advice);
+      // Aborting the controller closes the connection, which stops generation server-side.
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      let text = '';
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop() ?? '';
+        for (const frame of frames) {
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (event === 'error') throw new Error(data ? JSON.parse(data) : 'stream failed');
+          if (event === 'done') {
+            finished = true;
+            break;
+          }
+          if (data) {
+            text += JSON.parse(data);
+            setAdvice(text);
+          }
+        }
+      }
+      if (!finished) throw new Error('stream ended early');
 
       const isOnAIPage = window.location.pathname === '/ai-advisor';
       toast.success(isOnAIPage ? 'Analysis Synchronized' : 'Strategic Insight Ready in Advisor', {
@@ -45,7 +80,7 @@ export const AIProvider: React.FC<{ children: React.ReactNode }> = ({ children }
       });
     } catch (err: any) {
       // Check if the error was caused by our handleStop() call
-      if (err.name === 'CanceledError' || err.code === 'ERR_CANCELED') {
+      if (err.name === 'AbortError' || err.name === 'CanceledError') {
         console.log('Neural link intentionally severed');
       } else {
         toast.error('AI Core Offline');
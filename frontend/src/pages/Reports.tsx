@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useRef } from 'react';
+import React, { useEffect, useState } from 'react';
 import { FileText, Download, RefreshCw, Clock, FileCheck, Search } from 'lucide-react';
 import toast, { Toaster } from 'react-hot-toast';
 import apiClient from '../api/client';
@@ -8,9 +8,6 @@ export const Reports: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [isGenerating, setIsGenerating] = useState(false);
 
-  // Use a ref to keep track of the count for polling comparison
-  const reportCountRef = useRef(0);
-
   useEffect(() => {
     fetchReports();
   }, []);
@@ -19,7 +16,6 @@ export const Reports: React.FC = () => {
     try {
       const res = await apiClient.get<string[]>('/transactions/report/list');
       setReports(res.data);
-      reportCountRef.current = res.data.length;
     } catch (err) {
       toast.error('Failed to sync vault');
     } finally {
@@ -40,12 +36,12 @@ export const Reports: React.FC = () => {
 
       const interval = setInterval(async () => {
         try {
-          const res = await apiClient.get<string[]>('/transactions/report/list');
+          const res = await apiClient.get<{ status: string }>('/transactions/report/status');
 
-          // Check if a new file has appeared in the list
-          if (res.data.length > reportCountRef.current) {
-            setReports(res.data);
-            reportCountRef.current = res.data.length;
+          // The job finishes when its statement is in the list (or an
+          // unchanged ledger's existing statement was reused)
+          if (res.data.status === 'complete' || res.data.status === 'not_found') {
+            await fetchReports();
             setIsGenerating(false);
             clearInterval(interval);
             toast.success('Report Ready in Vault');
@@ -66,14 +62,17 @@ export const Reports: React.FC = () => {
     }
   };
 
-  const handleDownload = (filename: string) => {
+  // The list returns paths relative to /reports-files (sharded per user)
+  const baseName = (path: string) => path.split('/').pop() ?? path;
+
+  const handleDownload = (path: string) => {
     // UPDATED: Points to your new mount path in main.py
-    const url = `${import.meta.env.VITE_API_URL}/reports-files/${filename}`;
+    const url = `${import.meta.env.VITE_API_URL}/reports-files/${path}`;
 
     // Create a temporary anchor to force download behavior
     const link = document.createElement('a');
     link.href = url;
-    link.setAttribute('download', filename);
+    link.setAttribute('download', baseName(path));
     link.setAttribute('target', '_blank');
     document.body.appendChild(link);
     link.click();
@@ -138,7 +137,7 @@ export const Reports: React.FC = () => {
               </button>
             </div>
             <div>
-              <p className="text-white font-bold text-lg truncate pr-4">{filename}</p>
+              <p className="text-white font-bold text-lg truncate pr-4">{baseName(filename)}</p>
               <div className="flex items-center gap-4 mt-2">
                 <span className="flex items-center gap-1 text-[10px] font-black uppercase text-[#8b949e] tracking-widest">
                   <Clock size={12} /> Verified